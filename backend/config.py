@@ -23,6 +23,19 @@ class Settings(BaseSettings):
     # OpenAI Settings (Optional)
     OPENAI_API_KEY: Optional[str] = None
     OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-small"
+    # Query embeddings in flight at once per process
+    OPENAI_MAX_CONCURRENCY: int = 10
+
+    # RAG semantic cache (reuse retrievals for near-duplicate queries)
+    RAG_SEMANTIC_CACHE_THRESHOLD: float = 0.85
+    RAG_SEMANTIC_CACHE_TTL: int = 300
+    RAG_SEMANTIC_CACHE_SIZE: int = 1000
+
+    # Redis Settings (Optional - caching is disabled when unset)
+    REDIS_URL: Optional[str] = None
+
+    # Direct Postgres DSN (Optional - enables asyncpg for vector search)
+    DATABASE_URL: Optional[str] = None
 
     # Agent Configuration
     AGENT_ID: str = "eagle_ai_agent_001"
@@ -1,5 +1,6 @@
 # backend/main.py
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from backend.routers import (
@@ -25,15 +26,11 @@ from backend.routers import (
     agent_router
 )
 
-app = FastAPI(
-    title="Eagle Eyed API",
-    description="Backend API for Eagle Eyed - AI-powered financial compliance platform for CAs",
-    version="1.0.0"
-)
-
 from backend.services.admin.system_monitor import SystemMonitor
+from backend.services.ocr.table_extractor import shutdown_table_pool
+from backend.services.query_engine.query_llm import open_async_http_client, close_async_http_client
+from backend.utils.cache import close_async_redis_client
 
-@app.on_event("startup")
 async def startup_event():
     print("Eagle Eyed API starting up...")
     print("Checking Database Connection...")
@@ -48,6 +45,23 @@ async def startup_event():
     except Exception as e:
         print(f"❌ Failed to check database connection: {e}")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup_event()
+    await open_async_http_client()
+    yield
+    await close_async_http_client()
+    await close_async_redis_client()
+    # Worker processes are not daemons; stop them before the server exits
+    shutdown_table_pool()
+
+app = FastAPI(
+    title="Eagle Eyed API",
+    description="Backend API for Eagle Eyed - AI-powered financial compliance platform for CAs",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
 # CORS configuration
 from backend.middleware.jwt_verification import JWTVerificationMiddleware
 from backend.middleware.multi_tenant_rls import MultiTenantRLSMiddleware
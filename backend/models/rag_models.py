@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
 
 class EmbeddingChunk(BaseModel):
@@ -9,4 +9,5 @@ class EmbeddingChunk(BaseModel):
 
 class RetrievalResult(BaseModel):
     chunk_text: str
-    similarity: float
\ No newline at end of file
+    similarity: float
+    source: Optional[str] = None
\ No newline at end of file
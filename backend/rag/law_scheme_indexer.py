@@ -1,7 +1,7 @@
 from typing import List
 from backend.rag.chunker import TextChunker
 from backend.rag.embedder import Embedder
-from backend.rag.vector_store import VectorStore
+from backend.rag.vector_store import get_vector_store
 from backend.crawlers.gst_crawler import GSTCrawler
 from backend.crawlers.income_tax_crawler import IncomeTaxCrawler
 from backend.models.rag_models import EmbeddingChunk
@@ -15,7 +15,7 @@ class LawSchemeIndexer:
     def __init__(self):
         self.chunker = TextChunker()
         self.embedder = Embedder()
-        self.vector_store = VectorStore()
+        self.vector_store = get_vector_store()
         
         # Initialize crawlers
         self.gst_crawler = GSTCrawler()
@@ -1,7 +1,7 @@
 from typing import List, Dict, Any
 from backend.models.rag_models import RetrievalResult
 from backend.rag.embedder import Embedder
-from backend.rag.vector_store import VectorStore
+from backend.rag.vector_store import get_vector_store
 
 class Retriever:
     """
@@ -10,7 +10,7 @@ class Retriever:
 
     def __init__(self):
         self.embedder = Embedder()
-        self.vector_store = VectorStore()
+        self.vector_store = get_vector_store()
 
     def retrieve(self, query: str, top_k: int = 5) -> List[RetrievalResult]:
         """
@@ -1,7 +1,12 @@
 from typing import List, Dict, Any, Optional
+from functools import lru_cache
 from backend.models.rag_models import EmbeddingChunk, RetrievalResult
 from backend.utils.supabase_client import supabase
 
+# Candidates fetched from the half-precision index per requested result;
+# match_documents rescores them at full precision before trimming to top_k
+SEARCH_OVERSAMPLING = 2.0
+
 class VectorStore:
     """
     Interface for storing, updating, and querying embeddings in pgvector via Supabase.
@@ -33,18 +38,26 @@ class VectorStore:
             print(f"Error storing embeddings: {e}")
             raise e
 
-    def search(self, query_embedding: List[float], top_k: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[RetrievalResult]:
+    def search(
+        self,
+        query_embedding: List[float],
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        score_threshold: float = 0.5
+    ) -> List[RetrievalResult]:
         """
         Performs a similarity search using pgvector via Supabase RPC.
+        Only matches above score_threshold are returned.
         """
         try:
             # Call a Postgres function (RPC) that executes the vector similarity search
-            # CREATE FUNCTION match_documents (query_embedding vector(1536), match_threshold float, match_count int) ...
+            # (see match_documents in schema.sql)
             
             params = {
                 "query_embedding": query_embedding,
-                "match_threshold": 0.5, # Configurable
-                "match_count": top_k
+                "match_threshold": score_threshold,
+                "match_count": top_k,
+                "oversampling": SEARCH_OVERSAMPLING
             }
             
             # If filters are supported by the RPC, add them
@@ -57,7 +70,8 @@ class VectorStore:
             for item in response.data:
                 results.append(RetrievalResult(
                     chunk_text=item["chunk_text"],
-                    similarity=item["similarity"]
+                    similarity=item["similarity"],
+                    source=item.get("source")
                 ))
             return results
 
@@ -65,6 +79,23 @@ class VectorStore:
             print(f"Error searching vectors: {e}")
             return []
 
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns an approximate embedding count.
+        
+        Uses PostgREST's planned count, read from the planner's table
+        statistics, so it costs no table scan however large the store grows.
+        """
+        try:
+            response = supabase.table("embeddings").select("id", count="planned").limit(1).execute()
+            return {
+                "status": "active",
+                "vector_count": response.count
+            }
+        except Exception as e:
+            print(f"Error fetching vector store stats: {e}")
+            return {"status": "error", "message": str(e)}
+
     def delete_by_source(self, source: str):
         """
         Deletes all embeddings associated with a specific source.
@@ -74,3 +105,11 @@ class VectorStore:
         except Exception as e:
             print(f"Error deleting embeddings for source {source}: {e}")
             raise e
+
+
+@lru_cache(maxsize=1)
+def get_vector_store() -> VectorStore:
+    """
+    Return the process-wide VectorStore shared by retrieval and indexing.
+    """
+    return VectorStore()
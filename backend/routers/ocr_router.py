@@ -18,7 +18,7 @@ async def extract_text(
     """
     Extract text from an image or PDF using OCR.
     """
-    return ocr_service.extract_text(file)
+    return await ocr_service.extract_text(file)
 
 @router.post("/extract-table", response_model=SuccessResponse)
 async def extract_table(
@@ -28,4 +28,14 @@ async def extract_table(
     """
     Extract tabular data from a document.
     """
-    return ocr_service.extract_table(file)
+    return await ocr_service.extract_table(file)
+
+@router.post("/extract-tables", response_model=SuccessResponse)
+async def extract_tables(
+    file: UploadFile = File(...),
+    ocr_service: OCRService = Depends(get_ocr_service)
+):
+    """
+    Extract every table from a document as a list of tables.
+    """
+    return await ocr_service.extract_tables(file)
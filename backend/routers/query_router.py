@@ -13,4 +13,4 @@ async def execute_query(
     Execute a natural language query on financial data.
     Returns table data, summary, and law references.
     """
-    return service.process_query(request)
+    return await service.process_query(request)
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends
 from typing import List
 from backend.models.rag_models import RetrievalResult
+from backend.rag.vector_store import VectorStore, get_vector_store
 from backend.services.rag_service.rag_manager import RAGManager
 
 router = APIRouter(prefix="/rag", tags=["RAG"])
@@ -10,14 +11,14 @@ async def reindex_documents(service: RAGManager = Depends()):
     """
     Trigger a full re-indexing of all law and scheme documents.
     """
-    return service.reindex_all()
+    return await service.reindex_all()
 
 @router.post("/refresh-laws")
 async def refresh_laws(service: RAGManager = Depends()):
     """
     Crawl and update only the latest law changes.
     """
-    return service.refresh_laws()
+    return await service.refresh_laws()
 
 @router.get("/test-retrieval", response_model=List[RetrievalResult])
 async def test_retrieval(
@@ -28,4 +29,12 @@ async def test_retrieval(
     """
     Test the retrieval engine with a sample query.
     """
-    return service.test_retrieval(query, top_k)
+    return await service.test_retrieval(query, top_k)
+
+@router.get("/stats")
+async def vector_store_stats(vector_store: VectorStore = Depends(get_vector_store)):
+    """
+    Approximate size of the vector store, cheap enough for dashboard polling.
+    Uses the shared store directly, skipping RAGManager's crawler setup.
+    """
+    return vector_store.get_stats()
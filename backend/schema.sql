@@ -206,6 +206,7 @@ CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(date);
 CREATE INDEX IF NOT EXISTS idx_transactions_ledger ON transactions(ledger);
 CREATE INDEX IF NOT EXISTS idx_transactions_type ON transactions(type);
 CREATE INDEX IF NOT EXISTS idx_transactions_deleted_at ON transactions(deleted_at);
+CREATE INDEX IF NOT EXISTS idx_transactions_sheet_vendor_date ON transactions(sheet_id, vendor, date) WHERE deleted_at IS NULL;
 
 -- Documents indexes
 CREATE INDEX IF NOT EXISTS idx_documents_client ON documents(client_id);
@@ -217,7 +218,12 @@ CREATE INDEX IF NOT EXISTS idx_recycle_bin_expires_at ON recycle_bin(expires_at)
 
 -- Embeddings indexes (for vector similarity search)
 CREATE INDEX IF NOT EXISTS idx_embeddings_source ON embeddings(source);
-CREATE INDEX IF NOT EXISTS idx_embeddings_vector ON embeddings USING ivfflat (embedding vector_cosine_ops);
+-- HNSW over half-precision copies of the vectors (pgvector >= 0.7): half the
+-- index memory of float32, and match_documents rescores the candidates
+-- against the full-precision column
+CREATE INDEX IF NOT EXISTS idx_embeddings_vector_hnsw ON embeddings
+    USING hnsw ((embedding::halfvec(1536)) halfvec_cosine_ops)
+    WITH (m = 16, ef_construction = 128);
 
 -- Red Flags indexes
 CREATE INDEX IF NOT EXISTS idx_redflags_client ON red_flags(client_id);
@@ -334,7 +340,9 @@ CREATE POLICY "Users can delete (restore/permanent) their items"
 -- FUNCTIONS
 -- =====================================================
 
--- Function for vector similarity search
+-- Function for vector similarity search: like match_documents, walks the
+-- halfvec HNSW index for 2 * match_count candidates and rescores them at
+-- full precision
 CREATE OR REPLACE FUNCTION match_embeddings(
     query_embedding vector(1536),
     match_threshold float,
@@ -350,19 +358,219 @@ RETURNS TABLE (
 )
 LANGUAGE sql STABLE
 AS $$
+    WITH candidates AS (
+        SELECT e.id, e.chunk_text, e.source, e.source_type, e.metadata, e.embedding
+        FROM embeddings e
+        ORDER BY e.embedding::halfvec(1536) <=> query_embedding::halfvec(1536)
+        LIMIT match_count * 2
+    )
     SELECT
-        id,
-        chunk_text,
-        source,
-        source_type,
-        metadata,
-        1 - (embedding <=> query_embedding) as similarity
-    FROM embeddings
-    WHERE 1 - (embedding <=> query_embedding) > match_threshold
-    ORDER BY embedding <=> query_embedding
+        c.id,
+        c.chunk_text,
+        c.source,
+        c.source_type,
+        c.metadata,
+        1 - (c.embedding <=> query_embedding) as similarity
+    FROM candidates c
+    WHERE 1 - (c.embedding <=> query_embedding) > match_threshold
+    ORDER BY c.embedding <=> query_embedding
     LIMIT match_count;
 $$;
 
+-- Vector search used by VectorStore.search: walks the halfvec HNSW index for
+-- match_count * oversampling candidates, then rescores them at full precision
+CREATE OR REPLACE FUNCTION match_documents(
+    query_embedding vector(1536),
+    match_threshold float,
+    match_count int,
+    oversampling float DEFAULT 2.0,
+    filter jsonb DEFAULT NULL
+)
+RETURNS TABLE (
+    id uuid,
+    chunk_text text,
+    source text,
+    similarity float
+)
+LANGUAGE sql STABLE
+AS $$
+    WITH candidates AS (
+        SELECT e.id, e.chunk_text, e.source, e.embedding
+        FROM embeddings e
+        WHERE filter IS NULL OR e.metadata @> filter
+        ORDER BY e.embedding::halfvec(1536) <=> query_embedding::halfvec(1536)
+        LIMIT ceil(match_count * oversampling)::int
+    )
+    SELECT
+        c.id,
+        c.chunk_text,
+        c.source,
+        1 - (c.embedding <=> query_embedding) AS similarity
+    FROM candidates c
+    WHERE 1 - (c.embedding <=> query_embedding) >= match_threshold
+    ORDER BY c.embedding <=> query_embedding
+    LIMIT match_count;
+$$;
+
+-- Function detecting a client's recurring payments: clusters each vendor's
+-- amounts, averages the gaps between consecutive dates in a cluster and maps
+-- the average to a frequency
+CREATE OR REPLACE FUNCTION recurring_patterns(
+    cid uuid,
+    lookback_months int DEFAULT 12,
+    min_count int DEFAULT 3,
+    amount_tolerance numeric DEFAULT 0.1
+)
+RETURNS TABLE (
+    vendor_name text,
+    average_amount decimal,
+    frequency text,
+    next_expected_date date,
+    transaction_ids uuid[],
+    occurrence_count int
+)
+LANGUAGE sql STABLE
+AS $$
+    WITH RECURSIVE candidates AS (
+        SELECT
+            t.id,
+            t.vendor,
+            t.amount,
+            t.date,
+            -- Integer join key that also keeps NULL vendors together
+            dense_rank() OVER (ORDER BY t.vendor) AS vendor_key
+        FROM transactions t
+        JOIN sheets s ON s.id = t.sheet_id
+        WHERE s.client_id = cid
+          AND t.date >= current_date - lookback_months * 30
+          AND t.deleted_at IS NULL
+          AND t.amount > 0
+    ),
+    vendor_amounts AS (
+        SELECT c.vendor_key, array_agg(c.amount ORDER BY c.amount) AS amounts
+        FROM candidates c
+        GROUP BY c.vendor_key
+    ),
+    -- Each cluster is anchored at its smallest amount and takes every amount
+    -- within amount_tolerance above it; the next cluster starts at the first
+    -- amount past that. Near-identical amounts (9999 and 10001) share a
+    -- cluster, while a steady drift (1000, 1090, 1180, ...) cannot chain into
+    -- one. width_bucket binary-searches the sorted amounts, so this recurses
+    -- once per cluster rather than once per row
+    anchors AS (
+        SELECT v.vendor_key, v.amounts[1] AS anchor
+        FROM vendor_amounts v
+        UNION ALL
+        SELECT v.vendor_key, v.amounts[width_bucket((1 + amount_tolerance) * a.anchor, v.amounts) + 1]
+        FROM anchors a
+        JOIN vendor_amounts v ON v.vendor_key = a.vendor_key
+        WHERE width_bucket((1 + amount_tolerance) * a.anchor, v.amounts) < cardinality(v.amounts)
+    ),
+    vendor_anchors AS (
+        SELECT a.vendor_key, array_agg(a.anchor ORDER BY a.anchor) AS anchors
+        FROM anchors a
+        GROUP BY a.vendor_key
+    ),
+    clustered AS (
+        SELECT
+            c.id,
+            c.vendor,
+            c.amount,
+            c.date,
+            width_bucket(c.amount, va.anchors) AS bucket
+        FROM candidates c
+        JOIN vendor_anchors va ON va.vendor_key = c.vendor_key
+    ),
+    gaps AS (
+        SELECT
+            c.*,
+            c.date - lag(c.date) OVER w AS gap
+        FROM clustered c
+        WINDOW w AS (PARTITION BY c.vendor, c.bucket ORDER BY c.date)
+    ),
+    stats AS (
+        SELECT
+            g.vendor,
+            round(avg(g.amount), 2) AS avg_amount,
+            avg(g.gap) AS avg_interval,
+            max(g.date) AS last_date,
+            array_agg(g.id ORDER BY g.date) AS ids,
+            count(*)::int AS cnt
+        FROM gaps g
+        GROUP BY g.vendor, g.bucket
+        HAVING count(*) >= min_count
+    ),
+    classified AS (
+        SELECT
+            st.*,
+            CASE
+                WHEN st.avg_interval BETWEEN 5 AND 9 THEN 'weekly'
+                WHEN st.avg_interval BETWEEN 25 AND 35 THEN 'monthly'
+                WHEN st.avg_interval BETWEEN 85 AND 95 THEN 'quarterly'
+                WHEN st.avg_interval BETWEEN 355 AND 375 THEN 'annual'
+                ELSE 'irregular'
+            END AS freq
+        FROM stats st
+    )
+    SELECT
+        cl.vendor,
+        cl.avg_amount,
+        cl.freq,
+        cl.last_date + CASE cl.freq
+            WHEN 'weekly' THEN 7
+            WHEN 'monthly' THEN 30
+            WHEN 'quarterly' THEN 90
+            ELSE 365
+        END,
+        cl.ids,
+        cl.cnt
+    FROM classified cl
+    WHERE cl.freq <> 'irregular'
+    ORDER BY cl.vendor;
+$$;
+
+-- Red flag detectors for AnomalyDetectorService.scan_for_red_flags: both
+-- aggregate server-side so only violating rows cross the wire
+
+-- Groups of a sheet's transactions sharing vendor (case-insensitive),
+-- amount and date
+CREATE OR REPLACE FUNCTION detect_duplicates(sid uuid)
+RETURNS TABLE (
+    vendor text,
+    amount decimal,
+    txn_date date,
+    transaction_ids uuid[]
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        lower(trim(coalesce(t.vendor, ''))),
+        t.amount,
+        t.date,
+        array_agg(t.id ORDER BY t.created_at)
+    FROM transactions t
+    WHERE t.sheet_id = sid
+      AND t.deleted_at IS NULL
+    GROUP BY lower(trim(coalesce(t.vendor, ''))), t.amount, t.date
+    HAVING count(*) > 1;
+$$;
+
+-- A sheet's transactions above thr that are whole multiples of 1000
+CREATE OR REPLACE FUNCTION detect_round_numbers(sid uuid, thr numeric DEFAULT 1000)
+RETURNS TABLE (
+    id uuid,
+    amount decimal
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT t.id, t.amount
+    FROM transactions t
+    WHERE t.sheet_id = sid
+      AND t.deleted_at IS NULL
+      AND t.amount > thr
+      AND t.amount % 1000 = 0;
+$$;
+
 -- Function to update updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
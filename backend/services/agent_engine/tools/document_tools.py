@@ -92,7 +92,7 @@ async def parse_invoice(file_path: str) -> Dict[str, Any]:
         logger.error(f"Invoice parsing failed: {e}")
         return {"error": str(e)}
 
-def extract_ocr(file_path: str) -> Dict[str, Any]:
+async def extract_ocr(file_path: str) -> Dict[str, Any]:
     """
     Extract text from an image or PDF using OCR.
     """
@@ -107,7 +107,7 @@ def extract_ocr(file_path: str) -> Dict[str, Any]:
         from io import BytesIO
         file_obj = UploadFile(filename=filename, file=BytesIO(content))
         
-        result = _ocr_service.extract_text(file_obj)
+        result = await _ocr_service.extract_text(file_obj)
         return result.dict() if hasattr(result, 'dict') else result.__dict__
         
     except Exception as e:
@@ -9,7 +9,7 @@ from backend.utils.logger import logger
 _query_service = QueryService()
 _retrieval_service = RetrievalService()
 
-def nl_query(query_text: str, client_id: str) -> Dict[str, Any]:
+async def nl_query(query_text: str, client_id: str) -> Dict[str, Any]:
     """
     Execute a natural language query on financial data.
     """
@@ -17,15 +17,15 @@ def nl_query(query_text: str, client_id: str) -> Dict[str, Any]:
         query_text=query_text,
         client_id=client_id
     )
-    result = _query_service.process_query(request)
+    result = await _query_service.process_query(request)
     # Convert Pydantic model to dict
     return result.model_dump() if hasattr(result, 'model_dump') else result.__dict__
 
-def rag_lookup(query: str, limit: int = 5) -> List[Dict[str, Any]]:
+async def rag_lookup(query: str, limit: int = 5) -> List[Dict[str, Any]]:
     """
     Retrieve relevant legal/compliance context from the knowledge base.
     """
-    results = _retrieval_service.retrieve_context(query, limit=limit)
+    results = await _retrieval_service.retrieve_context(query, limit=limit)
     # Convert Pydantic models to dicts
     return [result.model_dump() if hasattr(result, 'model_dump') else result.__dict__ for result in results]
 
@@ -2,7 +2,7 @@ from datetime import datetime, timedelta
 import jwt
 from fastapi import HTTPException
 from backend.models.auth_models import LoginRequest, SignupRequest, AuthToken, RefreshTokenRequest, TokenPayload
-from backend.utils.supabase_client import supabase
+from backend.utils.supabase_client import supabase, get_supabase_admin_client
 from backend.config import settings
 
 class AuthService:
@@ -38,8 +38,7 @@ class AuthService:
             
             # Use service role key to bypass RLS for initial user creation
             # This ensures we can write to users/clients/cas tables without auth context issues
-            from supabase import create_client
-            admin_supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+            admin_supabase = get_supabase_admin_client()
 
             # Create user record in users table
             user_data = {
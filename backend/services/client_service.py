@@ -4,7 +4,7 @@ import uuid
 from fastapi import HTTPException
 from backend.models.client_models import ClientCreate, ClientResponse
 from backend.config import settings
-from supabase import create_client
+from backend.utils.supabase_client import get_supabase_admin_client
 
 class ClientService:
     """
@@ -12,7 +12,7 @@ class ClientService:
     """
     
     def __init__(self):
-        self.supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+        self.supabase = get_supabase_admin_client()
 
     def create_client(self, client_data: ClientCreate, user_id: str) -> ClientResponse:
         """
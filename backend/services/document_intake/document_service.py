@@ -7,7 +7,7 @@ from datetime import datetime
 
 from backend.models.document_models import Document, DocumentUploadResponse
 from backend.services.document_intake.document_classifier import DocumentClassifier
-from supabase import create_client
+from backend.utils.supabase_client import get_supabase_admin_client
 from backend.config import settings
 from backend.utils.logger import logger
 
@@ -33,7 +33,7 @@ class DocumentIntakeService:
     def __init__(self) -> None:
         self.classifier = DocumentClassifier()
         # Use Service Role Key to bypass RLS for document ingestion
-        self.supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+        self.supabase = get_supabase_admin_client()
         logger.info("DocumentIntakeService initialized")
 
     def detect_type(self, file: UploadFile) -> str:
@@ -51,9 +51,7 @@ class InvoiceParser:
             pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
             
             # Extract text from all pages
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
+            text = "".join(page.extract_text() for page in pdf_reader.pages)
             
             # Extract invoice details using pattern matching
             invoice_data = self._extract_invoice_details(text)
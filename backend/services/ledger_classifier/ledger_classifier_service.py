@@ -2,12 +2,33 @@
 
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+from collections import Counter
 from backend.models.ledger_models import LedgerClassification
 from backend.services.ledger_classifier.ledger_rules_engine import LedgerRulesEngine
 from backend.utils.supabase_client import supabase
 from backend.utils.logger import logger
+from backend.utils.cache import cache_get, cache_set, cache_hget, cache_hset, cache_delete
 from fastapi import HTTPException
 
+# Cache TTLs (seconds) for read-heavy classification lookups
+HISTORY_CACHE_TTL = 60
+SUGGESTIONS_CACHE_TTL = 300
+
+
+def _history_cache_key(transaction_id: str) -> str:
+    return f"clshist:{transaction_id}"
+
+
+def _suggestions_cache_key(transaction_id: str) -> str:
+    return f"clssugg:{transaction_id}"
+
+
+def invalidate_classification_cache(transaction_id: str) -> None:
+    """
+    Drop cached history and suggestions after a transaction's ledger or description changes.
+    """
+    cache_delete(_history_cache_key(transaction_id), _suggestions_cache_key(transaction_id))
+
 
 class LedgerClassifierService:
     """
@@ -34,20 +55,23 @@ class LedgerClassifierService:
             transactions = response.data
             
             if not transactions:
-                logger.warning(f"No transactions found for IDs: {transaction_ids}")
+                logger.warning("No transactions found for IDs: %s", transaction_ids)
                 return []
             
             classifications = []
+            # One timestamp for the whole batch; every row is classified in the same run
+            now_iso = datetime.utcnow().isoformat()
             
-            for txn in transactions:
-                # Apply rule-based classification
-                predicted_ledger = self.rules_engine.classify_by_rules(txn)
-                
+            # Apply rule-based classification, then score the whole batch in one pass
+            predicted_ledgers = [self.rules_engine.classify_by_rules(txn) for txn in transactions]
+            confidences = self.rules_engine.get_confidence_scores(transactions, predicted_ledgers)
+            
+            for txn, predicted_ledger, score in zip(transactions, predicted_ledgers, confidences):
                 if not predicted_ledger:
                     predicted_ledger = "Uncategorized"
                     confidence = 0.0
                 else:
-                    confidence = self.rules_engine.get_confidence_score(txn, predicted_ledger)
+                    confidence = float(score)
                 
                 # Determine compliance flags
                 gst_applicable = self.rules_engine.is_gst_applicable(txn)
@@ -57,7 +81,7 @@ class LedgerClassifierService:
                 # Update transaction in database
                 supabase.table("transactions").update({
                     "ledger": predicted_ledger,
-                    "updated_at": datetime.utcnow().isoformat()
+                    "updated_at": now_iso
                 }).eq("id", txn["id"]).execute()
                 
                 # Create classification object
@@ -83,19 +107,22 @@ class LedgerClassifierService:
                         "gst_applicable": gst_applicable,
                         "tds_applicable": tds_applicable,
                         "is_capital_expense": is_capital,
-                        "timestamp": datetime.utcnow().isoformat()
+                        "timestamp": now_iso
                     }
                     supabase.table("classification_history").insert(classification_log).execute()
-                    logger.debug(f"Classification history logged for transaction {txn['id']}")
+                    logger.debug("Classification history logged for transaction %s", txn["id"])
                 except Exception as history_error:
                     # Don't fail classification if history logging fails
-                    logger.warning(f"Failed to log classification history: {history_error}")
+                    logger.warning("Failed to log classification history: %s", history_error)
             
-            logger.info(f"Successfully classified {len(classifications)} transactions")
+            # New history rows were written for every classified transaction
+            cache_delete(*(_history_cache_key(txn["id"]) for txn in transactions))
+            
+            logger.info("Successfully classified %s transactions", len(classifications))
             return classifications
             
         except Exception as e:
-            logger.error(f"Classification failed: {e}")
+            logger.error("Classification failed: %s", e)
             raise HTTPException(status_code=500, detail=f"Classification failed: {str(e)}")
 
     def override_classification(self, transaction_id: str, new_ledger: str, reason: str, user_id: Optional[str] = None) -> LedgerClassification:
@@ -138,9 +165,11 @@ class LedgerClassifierService:
                     "timestamp": datetime.utcnow().isoformat()
                 }
                 supabase.table("classification_history").insert(classification_log).execute()
-                logger.info(f"Override logged for transaction {transaction_id}: {old_ledger} -> {new_ledger}")
+                logger.info("Override logged for transaction %s: %s -> %s", transaction_id, old_ledger, new_ledger)
             except Exception as history_error:
-                logger.warning(f"Failed to log override history: {history_error}")
+                logger.warning("Failed to log override history: %s", history_error)
+            
+            invalidate_classification_cache(transaction_id)
             
             # Return updated classification
             return LedgerClassification(
@@ -155,7 +184,7 @@ class LedgerClassifierService:
         except HTTPException:
             raise
         except Exception as e:
-            logger.error(f"Override failed: {e}")
+            logger.error("Override failed: %s", e)
             raise HTTPException(status_code=500, detail=f"Override failed: {str(e)}")
 
     def get_classification_history(self, transaction_id: str) -> List[Dict[str, Any]]:
@@ -168,20 +197,26 @@ class LedgerClassifierService:
         Returns:
             List of classification history entries, ordered by timestamp (newest first)
         """
+        cache_key = _history_cache_key(transaction_id)
+        cached = cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             # TODO: Query classification_history table
             # Query classification_history table
             response = supabase.table("classification_history").select("*").eq("transaction_id", transaction_id).order("timestamp", desc=True).execute()
+            history = response.data or []
+            cache_set(cache_key, history, HISTORY_CACHE_TTL)
             
-            if response.data:
-                logger.info(f"Retrieved {len(response.data)} history entries for transaction {transaction_id}")
-                return response.data
+            if history:
+                logger.info("Retrieved %s history entries for transaction %s", len(history), transaction_id)
             else:
-                logger.debug(f"No classification history found for transaction {transaction_id}")
-                return []
+                logger.debug("No classification history found for transaction %s", transaction_id)
+            return history
             
         except Exception as e:
-            logger.error(f"Failed to fetch classification history: {e}")
+            logger.error("Failed to fetch classification history: %s", e)
             # Return empty list instead of raising exception
             return []
 
@@ -202,7 +237,7 @@ class LedgerClassifierService:
             transactions = response.data
             
             if not transactions:
-                logger.warning(f"No transactions found for sheet {sheet_id}")
+                logger.warning("No transactions found for sheet %s", sheet_id)
                 return {"total": 0, "high_confidence": 0, "low_confidence": 0, "uncategorized": 0}
             
             # Extract transaction IDs
@@ -227,11 +262,11 @@ class LedgerClassifierService:
                 "uncategorized_percentage": round((uncategorized / total * 100) if total > 0 else 0, 2)
             }
             
-            logger.info(f"Bulk classification completed for sheet {sheet_id}: {result}")
+            logger.info("Bulk classification completed for sheet %s: %s", sheet_id, result)
             return result
             
         except Exception as e:
-            logger.error(f"Bulk classification failed: {e}")
+            logger.error("Bulk classification failed: %s", e)
             raise HTTPException(status_code=500, detail=f"Bulk classification failed: {str(e)}")
 
     def get_classification_suggestions(self, transaction_id: str, top_n: int = 3) -> List[Dict[str, Any]]:
@@ -245,6 +280,11 @@ class LedgerClassifierService:
         Returns:
             List of ledger suggestions with confidence scores
         """
+        cache_key = _suggestions_cache_key(transaction_id)
+        cached = cache_hget(cache_key, str(top_n))
+        if cached is not None:
+            return cached
+        
         try:
             # Fetch transaction
             txn_response = supabase.table("transactions").select("*").eq("id", transaction_id).execute()
@@ -256,14 +296,15 @@ class LedgerClassifierService:
             
             # Get suggestions from rules engine
             suggestions = self.rules_engine.get_top_suggestions(txn, top_n)
+            cache_hset(cache_key, str(top_n), suggestions, SUGGESTIONS_CACHE_TTL)
             
-            logger.debug(f"Generated {len(suggestions)} suggestions for transaction {transaction_id}")
+            logger.debug("Generated %s suggestions for transaction %s", len(suggestions), transaction_id)
             return suggestions
             
         except HTTPException:
             raise
         except Exception as e:
-            logger.error(f"Failed to get suggestions: {e}")
+            logger.error("Failed to get suggestions: %s", e)
             return []
 
     def retrain_model(self, training_data: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
@@ -297,7 +338,7 @@ class LedgerClassifierService:
                 training_data = response.data
             
             # Step 2: Prepare training dataset
-            logger.info(f"Preparing training dataset with {len(training_data)} samples...")
+            logger.info("Preparing training dataset with %s samples...", len(training_data))
             
             # TODO: Implement actual ML training here
             # For now, update rules engine with learned patterns
@@ -306,7 +347,7 @@ class LedgerClassifierService:
             # Step 3: Update rules engine
             if learned_patterns:
                 self.rules_engine.update_learned_patterns(learned_patterns)
-                logger.info(f"Updated rules engine with {len(learned_patterns)} learned patterns")
+                logger.info("Updated rules engine with %s learned patterns", len(learned_patterns))
             
             return {
                 "status": "success",
@@ -317,7 +358,7 @@ class LedgerClassifierService:
             }
             
         except Exception as e:
-            logger.error(f"Model retraining failed: {e}")
+            logger.error("Model retraining failed: %s", e)
             return {
                 "status": "error",
                 "message": str(e)
@@ -333,28 +374,21 @@ class LedgerClassifierService:
         Returns:
             List of learned patterns
         """
-        patterns = []
-        
-        # Group overrides by ledger
-        ledger_groups = {}
-        for override in overrides:
-            ledger = override.get("predicted_ledger", "")
-            if ledger not in ledger_groups:
-                ledger_groups[ledger] = []
-            ledger_groups[ledger].append(override)
+        # Only per-ledger counts are needed, so tally instead of grouping full records
+        ledger_counts = Counter(override.get("predicted_ledger", "") for override in overrides)
         
-        # Extract common keywords for each ledger
-        for ledger, group in ledger_groups.items():
-            if len(group) >= 3:  # Only create pattern if we have at least 3 examples
-                # This is a simplified pattern extraction
-                # In production, use NLP techniques
-                patterns.append({
-                    "ledger": ledger,
-                    "sample_count": len(group),
-                    "confidence": min(0.9, 0.5 + (len(group) * 0.05))  # Confidence increases with samples
-                })
-        
-        return patterns
+        # Only create a pattern if we have at least 3 examples.
+        # This is a simplified pattern extraction; in production, use NLP techniques.
+        # Confidence increases with samples.
+        return [
+            {
+                "ledger": ledger,
+                "sample_count": count,
+                "confidence": min(0.9, 0.5 + (count * 0.05))
+            }
+            for ledger, count in ledger_counts.items()
+            if count >= 3 and ledger
+        ]
 
     def get_statistics(self, client_id: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -369,8 +403,16 @@ class LedgerClassifierService:
             Dictionary with classification statistics
         """
         try:
+            # Transactions belong to a client through its sheets
+            sheets_response = supabase.table("sheets").select("id").eq("client_id", client_id).is_("deleted_at", "null").execute()
+            
+            if not sheets_response.data:
+                return {"total": 0, "by_ledger": {}, "uncategorized_count": 0}
+            
+            sheet_ids = [sheet["id"] for sheet in sheets_response.data]
+            
             # Build query
-            query = supabase.table("transactions").select("ledger, id").eq("client_id", client_id).is_("deleted_at", "null")
+            query = supabase.table("transactions").select("ledger, id").in_("sheet_id", sheet_ids).is_("deleted_at", "null")
             
             if start_date:
                 query = query.gte("date", start_date)
@@ -404,5 +446,5 @@ class LedgerClassifierService:
             }
             
         except Exception as e:
-            logger.error(f"Failed to get statistics: {e}")
+            logger.error("Failed to get statistics: %s", e)
             return {"error": str(e)}
@@ -3,9 +3,66 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from collections import defaultdict
-from backend.utils.supabase_client import supabase
+from backend.utils.supabase_client import get_supabase_client
 from backend.utils.logger import logger
-import statistics
+from cachetools import TTLCache
+import numpy as np
+import asyncio
+import re
+import threading
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; keyword matching falls back to a compiled regex
+    ahocorasick = None
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; kernels fall back to plain NumPy loops
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def _confidence_kernel(amounts: np.ndarray, intervals: np.ndarray):
+    """Return (amount_score, interval_score, count_score) from coefficient-of-variation math."""
+    n = amounts.shape[0]
+    amount_score = 0.0
+    if n > 1:
+        amount_mean = amounts.mean()
+        if amount_mean > 0:
+            amount_std = np.sqrt(((amounts - amount_mean) ** 2).sum() / (n - 1))
+            amount_score = max(0.0, 1.0 - amount_std / amount_mean)
+    
+    m = intervals.shape[0]
+    interval_score = 0.0
+    if m > 1:
+        interval_mean = intervals.mean()
+        if interval_mean > 0:
+            interval_std = np.sqrt(((intervals - interval_mean) ** 2).sum() / (m - 1))
+            interval_score = max(0.0, 1.0 - interval_std / interval_mean)
+    
+    count_score = min(1.0, n / 10.0)
+    return amount_score, interval_score, count_score
+
+
+# Compile the kernel at import so the first request doesn't pay JIT cost
+_confidence_kernel(np.array([1.0, 2.0]), np.array([30, 31], dtype=np.int64))
+
+# Rows per transactions page; PostgREST returns at most 1000 rows per request
+TRANSACTION_PAGE_SIZE = 1000
+
+# Process-local memo of detection results keyed by (client_id, lookback_months)
+_recurrence_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+_recurrence_cache_lock = threading.Lock()
+
+
+def clear_recurrence_cache() -> None:
+    """Drop memoized recurrence results after transactions are written."""
+    with _recurrence_cache_lock:
+        _recurrence_cache.clear()
 
 
 class RecurrenceDetector:
@@ -37,65 +94,61 @@ class RecurrenceDetector:
     ANNUAL_RANGE = (355, 375)
 
     def __init__(self) -> None:
-        # TODO: Initialize database connection for historical transaction queries
+        # Shared client so every query reuses the pooled keep-alive connections
+        self.supabase = get_supabase_client()
         # TODO: Load recurrence detection thresholds and parameters
         self.min_occurrences = 3  # Minimum occurrences to consider recurring
         self.amount_tolerance = 0.1  # 10% tolerance for amount variance
         self.date_tolerance = 5  # Days tolerance for date variance
+        # Match every subscription keyword in a single pass over the vendor name
+        if ahocorasick is not None:
+            self._subscription_automaton = ahocorasick.Automaton()
+            for keyword in self.SUBSCRIPTION_KEYWORDS:
+                self._subscription_automaton.add_word(keyword, keyword)
+            self._subscription_automaton.make_automaton()
+        else:
+            self._subscription_automaton = None
+            self._subscription_pattern = re.compile("|".join(map(re.escape, self.SUBSCRIPTION_KEYWORDS)))
         logger.info("RecurrenceDetector initialized")
 
     def detect_recurring_transactions(self, client_id: str, lookback_months: int = 12) -> List[Dict[str, Any]]:
         """
         Identify all recurring transactions for a client.
+        
+        Results are memoized briefly per (client_id, lookback_months) so callers
+        that chain detections within one request share a single computation.
         """
-        # TODO: Fetch all transactions for the client within lookback period
+        cache_key = (client_id, lookback_months)
+        with _recurrence_cache_lock:
+            cached = _recurrence_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            cutoff_date = (datetime.utcnow() - timedelta(days=lookback_months * 30)).isoformat()
-            response = supabase.table("transactions").select("*").eq("client_id", client_id).gte("date", cutoff_date).is_("deleted_at", "null").execute()
-            transactions = response.data or []
-            
-            # TODO: Group transactions by vendor and similar amounts
-            vendor_groups = defaultdict(list)
-            for txn in transactions:
-                vendor = txn.get("vendor", "Unknown")
-                vendor_groups[vendor].append(txn)
-            
-            recurring_patterns = []
-            
-            for vendor, txns in vendor_groups.items():
-                if len(txns) < self.min_occurrences:
-                    continue
-                
-                # TODO: Analyze time intervals between transactions
-                # TODO: Identify patterns (monthly, quarterly, annual)
-                txns_sorted = sorted(txns, key=lambda x: x.get("date", ""))
-                
-                # Group by similar amounts
-                amount_groups = self._group_by_similar_amounts(txns_sorted)
-                
-                for amount_group in amount_groups:
-                    if len(amount_group) < self.min_occurrences:
-                        continue
-                    
-                    txn_ids = [t["id"] for t in amount_group]
-                    frequency = self.get_recurrence_frequency(txn_ids)
-                    
-                    if frequency != "irregular":
-                        avg_amount = statistics.mean([t.get("amount", 0) for t in amount_group])
-                        last_date = amount_group[-1].get("date")
-                        next_date = self._predict_next_date(last_date, frequency)
-                        
-                        recurring_patterns.append({
-                            "vendor_name": vendor,
-                            "average_amount": round(avg_amount, 2),
-                            "frequency": frequency,
-                            "next_expected_date": next_date,
-                            "transaction_ids": txn_ids,
-                            "occurrence_count": len(amount_group)
-                        })
+            # Grouping by vendor and amount bucket, interval stats and frequency
+            # classification all run in Postgres (see recurring_patterns in schema.sql)
+            response = self.supabase.rpc("recurring_patterns", {
+                "cid": client_id,
+                "lookback_months": lookback_months,
+                "min_count": self.min_occurrences,
+                "amount_tolerance": self.amount_tolerance
+            }).execute()
+            
+            recurring_patterns = [
+                {
+                    "vendor_name": row["vendor_name"],
+                    "average_amount": float(row["average_amount"]),
+                    "frequency": row["frequency"],
+                    "next_expected_date": row["next_expected_date"],
+                    "transaction_ids": row["transaction_ids"],
+                    "occurrence_count": row["occurrence_count"]
+                }
+                for row in response.data or []
+            ]
             
-            # TODO: Return list of recurring transaction groups
             logger.info(f"Detected {len(recurring_patterns)} recurring patterns for client {client_id}")
+            with _recurrence_cache_lock:
+                _recurrence_cache[cache_key] = recurring_patterns
             return recurring_patterns
             
         except Exception as e:
@@ -106,37 +159,85 @@ class RecurrenceDetector:
         """
         Check if a specific transaction is part of a recurring pattern.
         """
+        return self.is_recurring_batch([transaction_id]).get(transaction_id, False)
+
+    def is_recurring_batch(self, transaction_ids: List[str]) -> Dict[str, bool]:
+        """
+        Check many transactions for recurrence at once.
+        
+        Looks up the targets and the clients owning their sheets, issues one
+        vendor-history query per client, then classifies every transaction in memory.
+        """
+        results = {transaction_id: False for transaction_id in transaction_ids}
+        if not transaction_ids:
+            return results
+        
         # TODO: Fetch transaction details
         try:
-            txn_response = supabase.table("transactions").select("*").eq("id", transaction_id).execute()
-            if not txn_response.data:
-                return False
-            
-            txn = txn_response.data[0]
-            vendor = txn.get("vendor")
-            amount = txn.get("amount", 0)
-            client_id = txn.get("client_id")
-            
-            # TODO: Search for similar transactions (same vendor, similar amount)
-            similar_response = supabase.table("transactions").select("*").eq("client_id", client_id).eq("vendor", vendor).is_("deleted_at", "null").execute()
-            similar_txns = similar_response.data or []
-            
-            # Filter by similar amount
-            similar_txns = [t for t in similar_txns if abs(t.get("amount", 0) - amount) / amount <= self.amount_tolerance]
-            
-            # TODO: Check if pattern exists (at least 3 occurrences with regular intervals)
-            if len(similar_txns) < self.min_occurrences:
-                return False
-            
-            txn_ids = [t["id"] for t in similar_txns]
-            frequency = self.get_recurrence_frequency(txn_ids)
+            txn_response = self.supabase.table("transactions").select("id, vendor, amount, sheet_id").in_("id", transaction_ids).execute()
+            targets = [txn for txn in txn_response.data or [] if txn.get("vendor") and txn.get("sheet_id")]
+            
+            # Transactions reach their client through the sheet, and a vendor's
+            # history spans every sheet of that client
+            sheet_ids = list({txn["sheet_id"] for txn in targets})
+            if not sheet_ids:
+                return results
+            
+            sheets_response = self.supabase.table("sheets").select("id, client_id").in_("id", sheet_ids).execute()
+            client_by_sheet = {sheet["id"]: sheet["client_id"] for sheet in sheets_response.data or []}
+            
+            targets_by_client = defaultdict(list)
+            for txn in targets:
+                if txn["sheet_id"] in client_by_sheet:
+                    targets_by_client[client_by_sheet[txn["sheet_id"]]].append(txn)
+            
+            for client_id, targets in targets_by_client.items():
+                client_sheet_ids = self._client_sheet_ids(client_id)
+                if not client_sheet_ids:
+                    continue
+                
+                # TODO: Search for similar transactions (same vendor, similar amount)
+                vendors = list({txn["vendor"] for txn in targets})
+                history_response = self.supabase.table("transactions").select("vendor, amount, date").in_("sheet_id", client_sheet_ids).in_("vendor", vendors).is_("deleted_at", "null").order("date", desc=False).execute()
+                history = self._vendor_history(history_response.data or [])
+                
+                for txn in targets:
+                    amount = float(txn.get("amount") or 0)
+                    if not amount or txn["vendor"] not in history:
+                        continue
+                    
+                    # Filter by similar amount
+                    amounts, dates = history[txn["vendor"]]
+                    similar = np.abs(amounts - amount) / amount <= self.amount_tolerance
+                    
+                    # TODO: Check if pattern exists (at least 3 occurrences with regular intervals)
+                    if similar.sum() < self.min_occurrences:
+                        continue
+                    
+                    similar_dates = dates[similar]
+                    frequency = self._frequency_from_dates(similar_dates[~np.isnat(similar_dates)])
+                    results[txn["id"]] = frequency != "irregular"
             
             # TODO: Return boolean result
-            return frequency != "irregular"
+            return results
             
         except Exception as e:
             logger.error(f"Failed to check recurrence: {e}")
-            return False
+            return results
+
+    def _vendor_history(self, transactions: List[Dict[str, Any]]) -> Dict[str, tuple]:
+        """Helper to split date-ordered rows into per-vendor (amounts, dates) arrays."""
+        amounts = self._amounts_array(transactions)
+        dates = self._dates_array(transactions)
+        
+        vendor_indices = defaultdict(list)
+        for i, txn in enumerate(transactions):
+            vendor_indices[txn["vendor"]].append(i)
+        
+        return {
+            vendor: (amounts[indices], dates[indices])
+            for vendor, indices in vendor_indices.items()
+        }
 
     def predict_next_occurrence(self, vendor_name: str, client_id: str) -> Optional[datetime]:
         """
@@ -144,24 +245,30 @@ class RecurrenceDetector:
         """
         # TODO: Fetch historical transactions for this vendor
         try:
-            response = supabase.table("transactions").select("*").eq("client_id", client_id).eq("vendor", vendor_name).is_("deleted_at", "null").order("date", desc=False).execute()
+            sheet_ids = self._client_sheet_ids(client_id)
+            if not sheet_ids:
+                return None
+            
+            response = self.supabase.table("transactions").select("date").in_("sheet_id", sheet_ids).eq("vendor", vendor_name).is_("deleted_at", "null").order("date", desc=False).execute()
             transactions = response.data or []
             
             if len(transactions) < 2:
                 return None
             
             # TODO: Calculate average interval between transactions
-            dates = [datetime.fromisoformat(t["date"]) for t in transactions if t.get("date")]
-            intervals = [(dates[i+1] - dates[i]).days for i in range(len(dates)-1)]
+            dates = self._dates_array(transactions)
+            dates = dates[~np.isnat(dates)]
+            intervals = self._intervals_in_days(dates)
             
-            if not intervals:
+            if not intervals.size:
                 return None
             
-            avg_interval = statistics.mean(intervals)
+            avg_interval = float(intervals.mean())
             
             # TODO: Add interval to last transaction date
-            last_date = dates[-1]
-            next_date = last_date + timedelta(days=avg_interval)
+            # Day numbers are plain ints, so the offset is integer math on epoch seconds
+            next_seconds = int(self._day_numbers(dates[-1:])[0]) * 86400 + round(avg_interval * 86400)
+            next_date = datetime.utcfromtimestamp(next_seconds)
             
             # TODO: Return predicted date
             return next_date
@@ -176,39 +283,39 @@ class RecurrenceDetector:
         """
         # TODO: Fetch transaction dates
         try:
-            response = supabase.table("transactions").select("date").in_("id", transaction_ids).order("date", desc=False).execute()
+            response = self.supabase.table("transactions").select("date").in_("id", transaction_ids).order("date", desc=False).execute()
             transactions = response.data or []
             
-            if len(transactions) < 2:
-                return "irregular"
-            
-            # TODO: Calculate intervals between consecutive transactions
-            dates = [datetime.fromisoformat(t["date"]) for t in transactions if t.get("date")]
-            intervals = [(dates[i+1] - dates[i]).days for i in range(len(dates)-1)]
-            
-            if not intervals:
-                return "irregular"
-            
-            # TODO: Determine most common interval
-            avg_interval = statistics.mean(intervals)
-            
-            # TODO: Map to frequency category
-            if self.WEEKLY_RANGE[0] <= avg_interval <= self.WEEKLY_RANGE[1]:
-                return "weekly"
-            elif self.MONTHLY_RANGE[0] <= avg_interval <= self.MONTHLY_RANGE[1]:
-                return "monthly"
-            elif self.QUARTERLY_RANGE[0] <= avg_interval <= self.QUARTERLY_RANGE[1]:
-                return "quarterly"
-            elif self.ANNUAL_RANGE[0] <= avg_interval <= self.ANNUAL_RANGE[1]:
-                return "annual"
-            
-            # TODO: Return frequency string
-            return "irregular"
+            dates = self._dates_array(transactions)
+            return self._frequency_from_dates(dates[~np.isnat(dates)])
             
         except Exception as e:
             logger.error(f"Failed to determine frequency: {e}")
             return "irregular"
 
+    def _frequency_from_dates(self, dates: np.ndarray) -> str:
+        """Helper to map date-sorted occurrences to a frequency category."""
+        if len(dates) < 2:
+            return "irregular"
+        
+        # TODO: Calculate intervals between consecutive transactions
+        intervals = self._intervals_in_days(dates)
+        
+        # TODO: Determine most common interval
+        avg_interval = float(intervals.mean())
+        
+        # TODO: Map to frequency category
+        if self.WEEKLY_RANGE[0] <= avg_interval <= self.WEEKLY_RANGE[1]:
+            return "weekly"
+        elif self.MONTHLY_RANGE[0] <= avg_interval <= self.MONTHLY_RANGE[1]:
+            return "monthly"
+        elif self.QUARTERLY_RANGE[0] <= avg_interval <= self.QUARTERLY_RANGE[1]:
+            return "quarterly"
+        elif self.ANNUAL_RANGE[0] <= avg_interval <= self.ANNUAL_RANGE[1]:
+            return "annual"
+        
+        return "irregular"
+
     def detect_subscription_services(self, client_id: str) -> List[Dict[str, Any]]:
         """
         Identify subscription-based services (SaaS, streaming, etc.).
@@ -225,7 +332,7 @@ class RecurrenceDetector:
             
             # Check for subscription keywords or monthly frequency with reasonable amount
             is_subscription = (
-                any(keyword in vendor for keyword in self.SUBSCRIPTION_KEYWORDS) or
+                self._has_subscription_keyword(vendor) or
                 (pattern["frequency"] == "monthly" and amount < 50000)  # Typical subscription range
             )
             
@@ -241,48 +348,103 @@ class RecurrenceDetector:
         logger.info(f"Detected {len(subscriptions)} subscriptions for client {client_id}")
         return subscriptions
 
-    def flag_missed_recurring_payments(self, client_id: str) -> List[Dict[str, Any]]:
+    def _has_subscription_keyword(self, vendor: str) -> bool:
+        """Helper to check a lowercased vendor name for any subscription keyword."""
+        if self._subscription_automaton is not None:
+            return any(True for _ in self._subscription_automaton.iter(vendor))
+        return self._subscription_pattern.search(vendor) is not None
+
+    async def flag_missed_recurring_payments(self, client_id: str) -> List[Dict[str, Any]]:
         """
         Identify recurring payments that were expected but not made.
+        
+        Payments for all overdue patterns are fetched in a single query and each
+        tolerance window is checked against per-vendor sorted dates by binary search.
         """
         # TODO: Get all recurring transaction patterns
-        recurring = self.detect_recurring_transactions(client_id, lookback_months=12)
-        missed_payments = []
+        recurring = await asyncio.to_thread(self.detect_recurring_transactions, client_id, 12)
+        today = datetime.utcnow()
         
         # TODO: For each pattern, predict next expected date
+        overdue = []
         for pattern in recurring:
             expected_date_str = pattern.get("next_expected_date")
             if not expected_date_str:
                 continue
             
             expected_date = datetime.fromisoformat(expected_date_str)
-            today = datetime.utcnow()
             
             # TODO: Check if payment was made within tolerance window
             if expected_date < today - timedelta(days=self.date_tolerance):
-                # Check if payment was actually made
-                vendor = pattern["vendor_name"]
-                amount = pattern["average_amount"]
-                
-                # Search for payment in tolerance window
-                search_start = (expected_date - timedelta(days=self.date_tolerance)).isoformat()
-                search_end = (expected_date + timedelta(days=self.date_tolerance)).isoformat()
-                
-                response = supabase.table("transactions").select("*").eq("client_id", client_id).eq("vendor", vendor).gte("date", search_start).lte("date", search_end).execute()
-                
-                # TODO: Flag as missed if not found
-                if not response.data:
-                    missed_payments.append({
-                        "vendor": vendor,
-                        "expected_date": expected_date_str,
-                        "expected_amount": amount,
-                        "days_overdue": (today - expected_date).days
-                    })
+                overdue.append((pattern, expected_date))
+        
+        # Fetch every candidate payment in one query, then check each window client-side
+        payment_dates = await asyncio.to_thread(self._fetch_vendor_payment_dates, client_id, overdue)
+        tolerance = np.timedelta64(self.date_tolerance, "D")
+        no_payments = np.array([], dtype="datetime64[D]")
+        
+        missed_payments = []
+        for pattern, expected_date in overdue:
+            dates = payment_dates.get(pattern["vendor_name"], no_payments)
+            expected = np.datetime64(expected_date.date(), "D")
+            lo = np.searchsorted(dates, expected - tolerance, side="left")
+            hi = np.searchsorted(dates, expected + tolerance, side="right")
+            
+            # TODO: Flag as missed if not found
+            if lo == hi:
+                missed_payments.append({
+                    "vendor": pattern["vendor_name"],
+                    "expected_date": pattern["next_expected_date"],
+                    "expected_amount": pattern["average_amount"],
+                    "days_overdue": (today - expected_date).days
+                })
         
         # TODO: Return list of missed payments
         logger.info(f"Flagged {len(missed_payments)} missed payments for client {client_id}")
         return missed_payments
 
+    def _fetch_vendor_payment_dates(self, client_id: str, overdue: List[tuple]) -> Dict[str, np.ndarray]:
+        """
+        Helper to fetch sorted payment dates per vendor covering all tolerance windows.
+        
+        A single select is silently capped at 1000 rows by PostgREST, so the
+        payments are read with range() pagination.
+        """
+        if not overdue:
+            return {}
+        
+        vendors = list({pattern["vendor_name"] for pattern, _ in overdue})
+        expected_dates = [expected_date for _, expected_date in overdue]
+        search_start = (min(expected_dates) - timedelta(days=self.date_tolerance)).isoformat()
+        search_end = (max(expected_dates) + timedelta(days=self.date_tolerance)).isoformat()
+        
+        sheet_ids = self._client_sheet_ids(client_id)
+        if not sheet_ids:
+            return {}
+        
+        payments = []
+        offset = 0
+        while True:
+            response = self.supabase.table("transactions").select("vendor, date").in_("sheet_id", sheet_ids).in_("vendor", vendors).gte("date", search_start).lte("date", search_end).order("date").order("id").range(
+                offset, offset + TRANSACTION_PAGE_SIZE - 1
+            ).execute()
+            page = response.data or []
+            payments.extend(page)
+            if len(page) < TRANSACTION_PAGE_SIZE:
+                break
+            offset += TRANSACTION_PAGE_SIZE
+        
+        dates = self._dates_array(payments)
+        
+        vendor_indices = defaultdict(list)
+        for i, txn in enumerate(payments):
+            vendor_indices[txn["vendor"]].append(i)
+        
+        return {
+            vendor: np.sort(dates[indices])
+            for vendor, indices in vendor_indices.items()
+        }
+
     def calculate_recurrence_confidence(self, transaction_ids: List[str]) -> float:
         """
         Calculate confidence score for a recurrence pattern.
@@ -291,79 +453,44 @@ class RecurrenceDetector:
         # TODO: Calculate variance in intervals (lower variance = higher confidence)
         # TODO: Consider number of occurrences (more occurrences = higher confidence)
         try:
-            response = supabase.table("transactions").select("amount, date").in_("id", transaction_ids).order("date", desc=False).execute()
+            response = self.supabase.table("transactions").select("amount, date").in_("id", transaction_ids).order("date", desc=False).execute()
             transactions = response.data or []
             
             if len(transactions) < 2:
                 return 0.0
             
-            amounts = [t.get("amount", 0) for t in transactions]
-            dates = [datetime.fromisoformat(t["date"]) for t in transactions if t.get("date")]
-            
-            # Amount variance score
-            if statistics.mean(amounts) > 0:
-                amount_cv = statistics.stdev(amounts) / statistics.mean(amounts)
-                amount_score = max(0, 1 - amount_cv)
-            else:
-                amount_score = 0
+            amounts = self._amounts_array(transactions)
+            dates = self._dates_array(transactions)
+            intervals = self._intervals_in_days(dates[~np.isnat(dates)])
             
-            # Interval variance score
-            intervals = [(dates[i+1] - dates[i]).days for i in range(len(dates)-1)]
-            if intervals and statistics.mean(intervals) > 0:
-                interval_cv = statistics.stdev(intervals) / statistics.mean(intervals)
-                interval_score = max(0, 1 - interval_cv)
-            else:
-                interval_score = 0
-            
-            # Occurrence count score
-            count_score = min(1.0, len(transactions) / 10)
+            # Amount variance, interval variance and occurrence count scores
+            amount_score, interval_score, count_score = _confidence_kernel(amounts, intervals)
             
             # TODO: Return normalized confidence score
             confidence = (amount_score * 0.4 + interval_score * 0.4 + count_score * 0.2)
-            return round(confidence, 2)
+            return round(float(confidence), 2)
             
         except Exception as e:
             logger.error(f"Failed to calculate confidence: {e}")
             return 0.0
 
-    def _group_by_similar_amounts(self, transactions: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
-        """Helper to group transactions by similar amounts."""
-        if not transactions:
-            return []
-        
-        groups = []
-        for txn in transactions:
-            amount = txn.get("amount", 0)
-            placed = False
-            
-            for group in groups:
-                group_avg = statistics.mean([t.get("amount", 0) for t in group])
-                if abs(amount - group_avg) / group_avg <= self.amount_tolerance:
-                    group.append(txn)
-                    placed = True
-                    break
-            
-            if not placed:
-                groups.append([txn])
-        
-        return groups
+    def _client_sheet_ids(self, client_id: str) -> List[str]:
+        """Helper to list a client's sheet ids; transactions have no client_id column of their own."""
+        response = self.supabase.table("sheets").select("id").eq("client_id", client_id).is_("deleted_at", "null").execute()
+        return [sheet["id"] for sheet in response.data or []]
 
-    def _predict_next_date(self, last_date_str: str, frequency: str) -> str:
-        """Helper to predict next occurrence date based on frequency."""
-        try:
-            last_date = datetime.fromisoformat(last_date_str)
-            
-            if frequency == "weekly":
-                next_date = last_date + timedelta(days=7)
-            elif frequency == "monthly":
-                next_date = last_date + timedelta(days=30)
-            elif frequency == "quarterly":
-                next_date = last_date + timedelta(days=90)
-            elif frequency == "annual":
-                next_date = last_date + timedelta(days=365)
-            else:
-                return ""
-            
-            return next_date.isoformat()
-        except:
-            return ""
+    def _amounts_array(self, transactions: List[Dict[str, Any]]) -> np.ndarray:
+        """Helper to collect transaction amounts into a float array."""
+        return np.fromiter((float(t.get("amount") or 0) for t in transactions), dtype=np.float64, count=len(transactions))
+
+    def _dates_array(self, transactions: List[Dict[str, Any]]) -> np.ndarray:
+        """Helper to parse ISO date strings in one bulk conversion; missing dates become NaT."""
+        return np.array([(t.get("date") or "NaT")[:10] for t in transactions], dtype="datetime64[D]")
+
+    def _day_numbers(self, dates: np.ndarray) -> np.ndarray:
+        """Helper to view NaT-free day-resolution dates as integer days since the epoch."""
+        return np.asarray(dates, dtype="datetime64[D]").view(np.int64)
+
+    def _intervals_in_days(self, dates: np.ndarray) -> np.ndarray:
+        """Helper to compute day gaps between consecutive date-sorted occurrences."""
+        return np.diff(self._day_numbers(dates))
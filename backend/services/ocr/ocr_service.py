@@ -1,10 +1,25 @@
+import os
+from typing import List, Optional
+
+# Tesseract's internal OpenMP threads would fight our page-level thread pool
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import UploadFile
 from backend.models.response_models import SuccessResponse
 from backend.utils.logger import logger
+from backend.utils.pdf_utils import PDFUtils
 import pytesseract
 from PIL import Image
 import io
 import pdf2image
+import threading
+
+try:
+    from tesserocr import PyTessBaseAPI, OEM, PSM
+except ImportError:  # tesserocr is optional; fall back to the pytesseract CLI wrapper
+    PyTessBaseAPI = None
 
 # USER INPUT REQUIRED: Ensure Tesseract OCR is installed on the system
 # Windows: https://github.com/UB-Mannheim/tesseract/wiki
@@ -15,28 +30,100 @@ import pdf2image
 # Windows: Download from http://blog.alivate.com.au/poppler-windows/ and add bin to PATH
 # Linux: sudo apt-get install poppler-utils
 
+# Tesseract runs out-of-process/releases the GIL, so threads scale with cores
+OCR_MAX_WORKERS = os.cpu_count() or 1
+
+# Long-lived pool so each worker's Tesseract API (and loaded model) is reused across requests
+_ocr_pool = ThreadPoolExecutor(max_workers=OCR_MAX_WORKERS, thread_name_prefix="ocr")
+
+# Rasterization DPI and longest-edge cap; recognition cost scales with pixel count
+OCR_DPI = 200
+OCR_MAX_DIMENSION = 2500
+
+# PyTessBaseAPI is not thread-safe, so each thread keeps its own instance
+_tess_local = threading.local()
+
+
+def _preprocess(image: Image.Image) -> Image.Image:
+    """
+    Convert to grayscale and cap resolution before recognition.
+    """
+    image = image.convert("L")
+    if max(image.size) > OCR_MAX_DIMENSION:
+        image.thumbnail((OCR_MAX_DIMENSION, OCR_MAX_DIMENSION), Image.LANCZOS)
+    return image
+
+
+def _image_to_string(image: Image.Image) -> str:
+    """
+    OCR a PIL image, reusing a persistent per-thread Tesseract API when available.
+    
+    pytesseract spawns the tesseract binary (and reloads the language model) on
+    every call; tesserocr keeps the model loaded in-process.
+    """
+    image = _preprocess(image)
+    if PyTessBaseAPI is None:
+        return pytesseract.image_to_string(image)
+    
+    api = getattr(_tess_local, "api", None)
+    if api is None:
+        api = PyTessBaseAPI(lang="eng", oem=OEM.LSTM_ONLY, psm=PSM.AUTO)
+        _tess_local.api = api
+    
+    api.SetImage(image)
+    return api.GetUTF8Text()
+
+
+def _ocr_pdf_page(content: bytes, page_number: int) -> str:
+    """
+    Rasterize and OCR a single PDF page (1-indexed).
+    
+    Only this page is held in memory, so peak usage stays flat regardless of page count.
+    """
+    images = pdf2image.convert_from_bytes(content, dpi=OCR_DPI, first_page=page_number, last_page=page_number)
+    return _image_to_string(images[0]) if images else ""
+
+
 class OCRService:
     """
     Service for OCR extraction from images and PDFs.
     """
 
-    def extract_text(self, file: UploadFile) -> SuccessResponse:
+    def ocr_pdf(self, content: bytes) -> str:
+        """
+        OCR every page of a PDF concurrently and return the text in page order.
+        """
+        page_count = pdf2image.pdfinfo_from_bytes(content).get("Pages", 0)
+        if not page_count:
+            return ""
+        
+        futures = [_ocr_pool.submit(_ocr_pdf_page, content, page) for page in range(1, page_count + 1)]
+        return "\n".join(future.result() for future in futures)
+
+    def _ocr_content(self, content: bytes, content_type: str) -> str:
+        """
+        Blocking OCR of raw file bytes; run off the event loop.
+        """
+        if content_type == "application/pdf":
+            # Convert and OCR pages one at a time across a thread pool
+            return self.ocr_pdf(content)
+        
+        # Process image directly
+        image = Image.open(io.BytesIO(content))
+        return _image_to_string(image)
+
+    async def extract_text(self, file: UploadFile) -> SuccessResponse:
         """
         Extract text from an image or PDF using OCR.
         """
         try:
-            content = file.file.read()
-            text = ""
+            content = await file.read()
             
-            if file.content_type == "application/pdf":
-                # Convert PDF to images
-                images = pdf2image.convert_from_bytes(content)
-                for img in images:
-                    text += pytesseract.image_to_string(img) + "\n"
-            else:
-                # Process image directly
-                image = Image.open(io.BytesIO(content))
-                text = pytesseract.image_to_string(image)
+            # Rasterization and recognition block, so keep them off the event loop.
+            # The default executor is used because ocr_pdf fans pages out to _ocr_pool
+            # and waiting on it from inside that same pool could exhaust its workers.
+            loop = asyncio.get_running_loop()
+            text = await loop.run_in_executor(None, self._ocr_content, content, file.content_type)
             
             return SuccessResponse(success=True, data=text.strip())
             
@@ -44,26 +131,58 @@ class OCRService:
             logger.error(f"OCR extraction failed: {e}")
             return SuccessResponse(success=False, error=str(e))
 
-    def extract_table(self, file: UploadFile) -> SuccessResponse:
+    def _extract_native_tables(self, content: bytes) -> Optional[List[List[List[str]]]]:
+        """
+        Extract tables from a text-based PDF with pdfplumber.
+        
+        Returns None for scanned PDFs so the caller can fall back to OCR.
+        """
+        if not PDFUtils.is_searchable_pdf(content):
+            return None
+        return PDFUtils.extract_tables(content)
+
+    async def _read_tables(self, file: UploadFile) -> List[List[List[str]]]:
+        """
+        Read every table in a document as a list of rows of cell strings.
+        """
+        content = await file.read()
+        loop = asyncio.get_running_loop()
+        
+        # Text-based PDFs keep their column layout, so read tables directly and skip OCR
+        if file.content_type == "application/pdf":
+            tables = await loop.run_in_executor(None, self._extract_native_tables, content)
+            if tables is not None:
+                return tables
+        
+        # Scans and images: OCR, then split lines on whitespace (very basic).
+        # In a real production setup, integrate AWS Textract or Azure Form Recognizer here
+        text = await loop.run_in_executor(None, self._ocr_content, content, file.content_type)
+        table_data = [line.split() for line in text.split('\n') if line.strip()]
+        return [table_data] if table_data else []
+
+    async def extract_table(self, file: UploadFile) -> SuccessResponse:
         """
         Extract tabular data from a document.
+        
+        Returns a single list of rows; a PDF with several tables has their rows
+        concatenated in page order. Use extract_tables to keep them apart.
         """
         try:
-            # For table extraction, we'll use a simplified approach or placeholder
-            # as robust table extraction often requires specialized libraries like Tabula or Textract
-            # Here we reuse text extraction as a fallback for now
-            
-            # In a real production setup, integrate AWS Textract or Azure Form Recognizer here
-            text_response = self.extract_text(file)
-            
-            if not text_response.success:
-                return text_response
-                
-            # Simple heuristic to structure text into rows (very basic)
-            lines = text_response.data.split('\n')
-            table_data = [line.split() for line in lines if line.strip()]
+            tables = await self._read_tables(file)
+            return SuccessResponse(success=True, data=[row for table in tables for row in table])
             
-            return SuccessResponse(success=True, data=table_data)
+        except Exception as e:
+            logger.error(f"Table extraction failed: {e}")
+            return SuccessResponse(success=False, error=str(e))
+
+    async def extract_tables(self, file: UploadFile) -> SuccessResponse:
+        """
+        Extract every table in a document.
+        
+        Returns a list of tables, each a list of rows of cell strings.
+        """
+        try:
+            return SuccessResponse(success=True, data=await self._read_tables(file))
             
         except Exception as e:
             logger.error(f"Table extraction failed: {e}")
@@ -1,10 +1,72 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import hashlib
 import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 # import camelot # Uncomment when installed
 # import tabula # Uncomment when installed
-# import pdfplumber # Uncomment when installed
+import pdfplumber
+from cachetools import LRUCache
 from backend.utils.logger import logger
-from backend.utils.pdf_utils import PDFUtils
+
+# Parsed PDFs keyed by content digest, so retries of the same upload skip parsing entirely
+_parsed_pdf_cache: LRUCache = LRUCache(maxsize=32)
+_parsed_pdf_lock = threading.Lock()
+
+
+# Table line detection is CPU-bound pure Python, so large PDFs are split across processes.
+# Workers are spawned rather than forked: the server is multi-threaded, and a forked child
+# would inherit locks held by other threads along with live Supabase/OpenAI clients.
+TABLE_MAX_WORKERS = os.cpu_count() or 1
+TABLE_MIN_PAGES_PER_WORKER = 8
+_table_pool: Optional[ProcessPoolExecutor] = None
+_table_pool_lock = threading.Lock()
+
+
+def _content_digest(file_content: bytes) -> bytes:
+    return hashlib.blake2b(file_content, digest_size=16).digest()
+
+
+def _get_table_pool() -> ProcessPoolExecutor:
+    global _table_pool
+    with _table_pool_lock:
+        if _table_pool is None:
+            _table_pool = ProcessPoolExecutor(
+                max_workers=TABLE_MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _table_pool
+
+
+def shutdown_table_pool() -> None:
+    """
+    Stop the table worker processes, if any were started; called on app shutdown.
+    """
+    global _table_pool
+    with _table_pool_lock:
+        if _table_pool is not None:
+            _table_pool.shutdown(wait=True, cancel_futures=True)
+            _table_pool = None
+
+
+def _extract_page_tables(pages) -> List[Dict[str, Any]]:
+    extracted = []
+    for page in pages:
+        for table in page.extract_tables():
+            extracted.append({"page": page.page_number, "data": table})
+    return extracted
+
+
+def _extract_page_range(content: bytes, start: int, end: int) -> List[Dict[str, Any]]:
+    """
+    Process-pool worker: open the PDF from bytes and extract tables from pages[start:end].
+    """
+    with pdfplumber.open(io.BytesIO(content)) as pdf:
+        return _extract_page_tables(pdf.pages[start:end])
+
 
 class TableExtractor:
     """
@@ -32,10 +94,18 @@ class TableExtractor:
         
         tables = []
         
-        # 1. Check if PDF is text-based (searchable)
-        is_searchable = PDFUtils.is_searchable_pdf(file_content)
+        if strategy == "ocr":
+            logger.info("OCR strategy requested. Using OCR fallback.")
+            return self._extract_with_ocr(file_content)
+
+        # 1. Check if PDF is text-based (searchable); the same parse also yields pdfplumber tables
+        try:
+            is_searchable, pdfplumber_tables = self._parse_pdf(file_content)
+        except Exception as e:
+            logger.error(f"Failed to parse PDF: {e}")
+            is_searchable, pdfplumber_tables = False, []
         
-        if not is_searchable or strategy == "ocr":
+        if not is_searchable:
             logger.info("PDF is scanned or OCR strategy requested. Using OCR fallback.")
             return self._extract_with_ocr(file_content)
 
@@ -52,13 +122,37 @@ class TableExtractor:
         # 3. Fallback to pdfplumber if no tables found yet
         if not tables:
             logger.info("Falling back to pdfplumber.")
-            try:
-                tables = self._extract_with_pdfplumber(file_content)
-            except Exception as e:
-                logger.error(f"pdfplumber extraction failed: {e}")
+            tables = pdfplumber_tables
 
         return self._normalize_output(tables)
 
+    def _parse_pdf(self, file_content: bytes) -> Tuple[bool, List[Dict[str, Any]]]:
+        """
+        Open the PDF once and return (is_searchable, pdfplumber tables).
+        
+        Results are memoized by content digest.
+        """
+        key = _content_digest(file_content)
+        with _parsed_pdf_lock:
+            cached = _parsed_pdf_cache.get(key)
+        if cached is not None:
+            return cached
+
+        with pdfplumber.open(io.BytesIO(file_content)) as pdf:
+            # A text layer on the first pages is enough to tell native PDFs from scans
+            is_searchable = any(page.chars for page in pdf.pages[:2])
+            tables = []
+            if is_searchable:
+                try:
+                    tables = self._extract_with_pdfplumber(pdf, file_content)
+                except Exception as e:
+                    logger.error(f"pdfplumber extraction failed: {e}")
+
+        parsed = (is_searchable, tables)
+        with _parsed_pdf_lock:
+            _parsed_pdf_cache[key] = parsed
+        return parsed
+
     def _extract_with_camelot(self, file_content: bytes) -> List[Any]:
         """
         Extract using Camelot (good for complex layouts).
@@ -75,16 +169,26 @@ class TableExtractor:
         # TODO: tabula.read_pdf(io.BytesIO(file_content), pages='all')
         return []
 
-    def _extract_with_pdfplumber(self, file_content: bytes) -> List[Dict[str, Any]]:
+    def _extract_with_pdfplumber(self, pdf: "pdfplumber.PDF", file_content: bytes) -> List[Dict[str, Any]]:
         """
-        Extract using pdfplumber (visual line detection).
+        Extract using pdfplumber (visual line detection) from an already-open PDF.
+        
+        Short documents are handled in-process; longer ones are split into page
+        ranges that worker processes re-open from the raw bytes.
         """
+        n = len(pdf.pages)
+        chunk = max(TABLE_MIN_PAGES_PER_WORKER, -(-n // TABLE_MAX_WORKERS))
+        if n <= chunk:
+            return _extract_page_tables(pdf.pages)
+
+        ranges = [(i, min(i + chunk, n)) for i in range(0, n, chunk)]
+        starts, ends = zip(*ranges)
+        results = _get_table_pool().map(partial(_extract_page_range, file_content), starts, ends)
+
+        # map() yields in submission order, so pages stay in document order
         extracted = []
-        # TODO: with pdfplumber.open(io.BytesIO(file_content)) as pdf:
-        # TODO:     for page in pdf.pages:
-        # TODO:         tables = page.extract_tables()
-        # TODO:         for table in tables:
-        # TODO:             extracted.append({"page": page.page_number, "data": table})
+        for page_tables in results:
+            extracted.extend(page_tables)
         return extracted
 
     def _extract_with_ocr(self, file_content: bytes) -> List[Dict[str, Any]]:
@@ -1,12 +1,133 @@
 # backend/services/query_engine/query_llm.py
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator
+from contextlib import asynccontextmanager
 import os
 import json
 import re
+import asyncio
+import hashlib
+import threading
+import atexit
+from collections import Counter
+from functools import lru_cache
+import httpx
+from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception_type
+from cachetools import TTLCache
+from backend.utils.cache import get_redis_client, get_async_redis_client, cache_get, cache_set, acache_get, acache_set
 from backend.utils.logger import logger
 from backend.services.query_engine.query_templates import QueryTemplates
-# import openai  # Uncomment when implementing
+from backend.services.query_engine.query_validator import QueryValidator
+
+try:
+    from openai import OpenAI, AsyncOpenAI, RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
+    # Transient failures worth retrying; bad requests and auth errors fail immediately
+    _RETRIABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError, httpx.TimeoutException)
+except ImportError:  # openai is optional; calls fall back to canned responses
+    OpenAI = AsyncOpenAI = None
+    _RETRIABLE_ERRORS = (httpx.TimeoutException,)
+
+# Identical prompts get identical answers: responses are cached by request hash
+LLM_RESPONSE_CACHE_TTL = 86400
+# In-process fallback when Redis is not configured
+_local_response_cache: TTLCache = TTLCache(maxsize=10000, ttl=3600)
+_local_response_cache_lock = threading.Lock()
+
+# Law references (Section X, Act Y, etc.) matched in one pass
+_CITATION_RE = re.compile(
+    r'Section\s+\d+[A-Z]*|Rule\s+\d+|Act[,\s]+\d{4}|Article\s+\d+',
+    re.IGNORECASE
+)
+_UNPROFESSIONAL_RE = re.compile(r'\b(?:dude|bro|lol|omg)\b', re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# System prompts are kept byte-identical across calls so the provider's prompt-prefix
+# cache can reuse them; per-call law excerpts travel in the user message instead
+EXPLANATION_SYSTEM_MESSAGE = (
+    "You are a CA assistant. Provide professional explanations grounded only in "
+    "the retrieved law excerpts included with each request."
+)
+COMPLIANCE_SYSTEM_MESSAGE = (
+    "You are a compliance expert. Base reasoning only on the retrieved law "
+    "excerpts included with each request."
+)
+
+# Canned answers used when the LLM is unavailable, picked by the kind of request
+# (never by the prompt text, which carries arbitrary law excerpts and user input)
+_FALLBACK_RESPONSES = {
+    "parse": json.dumps({"intent": "general_query", "entities": [], "filters": {}}),
+    # Tagged as an error so callers (e.g. acompliance_batch) do not treat it as a real verdict
+    "compliance": json.dumps({"compliant": True, "applicable_rules": [], "recommendations": [], "error": "LLM unavailable"}),
+    "validate": json.dumps({"is_valid": True, "errors": []}),
+    "text": "Analysis completed. Please review the data for detailed insights."
+}
+
+# Only these transaction columns are useful to the model; the rest is wasted prompt tokens
+EXPLANATION_RESULT_FIELDS = ("date", "ledger", "amount", "vendor", "description")
+
+# Pooled HTTP connections shared by every QueryLLM instance, so calls reuse
+# keep-alive connections instead of paying a TCP/TLS handshake each time
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+_HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+_http_client = httpx.Client(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT)
+atexit.register(_http_client.close)
+
+# An AsyncClient's connections belong to the event loop that opened them, so the
+# shared async pool is opened and closed by the app lifespan (see main.py) and only
+# used from that loop
+_async_http_client: Optional[httpx.AsyncClient] = None
+_async_http_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def open_async_http_client() -> None:
+    """
+    Open the shared async connection pool on the running event loop.
+    """
+    global _async_http_client, _async_http_loop
+    if _async_http_client is None:
+        _async_http_client = httpx.AsyncClient(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT)
+        _async_http_loop = asyncio.get_running_loop()
+
+
+async def close_async_http_client() -> None:
+    """
+    Close the shared async connection pool opened by open_async_http_client.
+    """
+    global _async_http_client, _async_http_loop
+    if _async_http_client is not None:
+        client, _async_http_client, _async_http_loop = _async_http_client, None, None
+        _get_async_openai_client.cache_clear()
+        await client.aclose()
+
+
+@lru_cache(maxsize=4)
+def _get_openai_client(api_key: str) -> Any:
+    """Return the sync OpenAI client for a key, built once on the shared pool."""
+    # Retries are handled by _llm_retry below, so the SDK's own retries are disabled
+    return OpenAI(api_key=api_key, http_client=_http_client, max_retries=0)
+
+
+@lru_cache(maxsize=4)
+def _get_async_openai_client(api_key: str, http_client: httpx.AsyncClient) -> Any:
+    """Return the async OpenAI client for a key on the app's shared async pool."""
+    return AsyncOpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+
+
+def _log_retry(retry_state) -> None:
+    logger.warning(
+        f"LLM call failed (attempt {retry_state.attempt_number}), retrying: "
+        f"{retry_state.outcome.exception()}"
+    )
+
+
+# Exponential backoff with jitter for rate limits and transient network errors
+_llm_retry = retry(
+    stop=stop_after_attempt(5),
+    wait=wait_random_exponential(multiplier=1, max=20),
+    retry=retry_if_exception_type(_RETRIABLE_ERRORS),
+    before_sleep=_log_retry,
+    reraise=True
+)
 
 
 class QueryLLM:
@@ -27,55 +148,62 @@ class QueryLLM:
     """
 
     def __init__(self) -> None:
-        # TODO: Initialize LLM client (OpenAI, Anthropic, etc.)
-        # self.api_key = os.getenv("OPENAI_API_KEY")
-        # openai.api_key = self.api_key
-        # self.model = "gpt-4"  # or "claude-3-opus", etc.
         self.api_key = os.getenv("OPENAI_API_KEY")
-        self.model = os.getenv("LLM_MODEL", "gpt-4")
+        # Default model must support JSON mode (response_format=json_object)
+        self.model = os.getenv("LLM_MODEL", "gpt-4-turbo")
         self.templates = QueryTemplates()
+        self.validator = QueryValidator()
+        
+        # Without an API key (or the openai package) every call uses the fallback response
+        self._client = _get_openai_client(self.api_key) if self.api_key and OpenAI else None
+        # Caps in-flight requests when callers fan out with asyncio.gather
+        self._semaphore = asyncio.Semaphore(int(os.getenv("LLM_CONCURRENCY", "8")))
         logger.info(f"QueryLLM initialized with model: {self.model}")
 
     def parse_query(self, query_text: str) -> Dict[str, Any]:
         """
         Parse natural language query into structured components using LLM.
         """
-        # TODO: Build prompt using QueryTemplates.get_query_parsing_template
         try:
-            prompt = self.templates.get_query_parsing_template(query_text)
-            
-            # TODO: Send to LLM API
-            response = self._call_llm(
-                prompt=prompt,
-                system_message="You are a financial query parser. Extract intent, entities, and filters from queries.",
-                temperature=0.3,
-                max_tokens=500
-            )
-            
-            # TODO: Parse JSON response
-            try:
-                parsed = json.loads(response)
-            except json.JSONDecodeError:
-                # Fallback parsing
-                parsed = {
-                    "intent": "general_query",
-                    "entities": [],
-                    "filters": {},
-                    "raw_query": query_text
-                }
-            
-            # TODO: Validate response structure
-            if not isinstance(parsed, dict):
-                parsed = {"intent": "unknown", "entities": [], "filters": {}}
-            
-            # TODO: Return parsed dict
-            logger.info(f"Parsed query: {parsed.get('intent', 'unknown')}")
-            return parsed
-            
+            response = self._call_llm(**self._parse_query_request(query_text))
+            return self._parse_query_result(query_text, response)
         except Exception as e:
             logger.error(f"Query parsing failed: {e}")
             return {"intent": "error", "entities": [], "filters": {}, "error": str(e)}
 
+    async def aparse_query(self, query_text: str) -> Dict[str, Any]:
+        """
+        Async version of parse_query.
+        """
+        try:
+            response = await self._acall_llm(**self._parse_query_request(query_text))
+            return await asyncio.to_thread(self._parse_query_result, query_text, response)
+        except Exception as e:
+            logger.error(f"Query parsing failed: {e}")
+            return {"intent": "error", "entities": [], "filters": {}, "error": str(e)}
+
+    def _parse_query_request(self, query_text: str) -> Dict[str, Any]:
+        # TODO: Build prompt using QueryTemplates.get_query_parsing_template
+        return {
+            "prompt": self.templates.get_query_parsing_template(query_text),
+            "system_message": "You are a financial query parser. Extract intent, entities, and filters from queries.",
+            "temperature": 0.3,
+            "max_tokens": 300,
+            "expects_json": True,
+            "request_type": "parse"
+        }
+
+    def _parse_query_result(self, query_text: str, response: str) -> Dict[str, Any]:
+        # JSON mode guarantees an object; anything else is reported by the caller
+        parsed = json.loads(response)
+        
+        # TODO: Validate response structure
+        if not isinstance(parsed, dict):
+            parsed = {"intent": "unknown", "entities": [], "filters": {}}
+        
+        logger.info(f"Parsed query: {parsed.get('intent', 'unknown')}")
+        return parsed
+
     def generate_explanation(
         self, 
         query: str, 
@@ -85,35 +213,54 @@ class QueryLLM:
         """
         Generate CA-friendly explanation of query results with legal grounding.
         """
-        # TODO: Build prompt using QueryTemplates.get_explanation_template
         try:
-            prompt = self.templates.get_explanation_template(query, results, law_context)
-            
-            # TODO: Include law_context in system message for grounding
-            system_msg = f"You are a CA assistant. Provide professional explanations grounded in these laws:\n{chr(10).join(law_context[:5])}"
-            
-            # TODO: Send to LLM API with temperature=0.3 (more deterministic)
-            response = self._call_llm(
-                prompt=prompt,
-                system_message=system_msg,
-                temperature=0.3,
-                max_tokens=1000
-            )
-            
-            # TODO: Extract explanation from response
-            explanation = response.strip()
-            
-            # TODO: Validate citations are from provided law_context
-            if not self._ensure_grounded_response(explanation, law_context):
-                logger.warning("Response contains ungrounded citations")
-            
-            # TODO: Return explanation
-            return self._sanitize_response(explanation)
-            
+            response = self._call_llm(**self._explanation_request(query, results, law_context))
+            return self._explanation_result(response, law_context)
+        except Exception as e:
+            logger.error(f"Explanation generation failed: {e}")
+            return f"Analysis of {len(results)} results for: {query}"
+
+    async def agenerate_explanation(
+        self, 
+        query: str, 
+        results: List[Dict[str, Any]], 
+        law_context: List[str]
+    ) -> str:
+        """
+        Async version of generate_explanation.
+        """
+        try:
+            response = await self._acall_llm(**self._explanation_request(query, results, law_context))
+            return await asyncio.to_thread(self._explanation_result, response, law_context)
         except Exception as e:
             logger.error(f"Explanation generation failed: {e}")
             return f"Analysis of {len(results)} results for: {query}"
 
+    def _explanation_request(self, query: str, results: List[Dict[str, Any]], law_context: List[str]) -> Dict[str, Any]:
+        # TODO: Build prompt using QueryTemplates.get_explanation_template
+        return {
+            "prompt": self._with_law_excerpts(
+                self.templates.get_explanation_template(query, [self._project_result(r) for r in results], law_context),
+                law_context
+            ),
+            "system_message": EXPLANATION_SYSTEM_MESSAGE,
+            "temperature": 0.3,
+            "max_tokens": 1000,
+            "request_type": "text"
+        }
+
+    def _project_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: result[k] for k in EXPLANATION_RESULT_FIELDS if k in result}
+
+    def _explanation_result(self, response: str, law_context: List[str]) -> str:
+        explanation = response.strip()
+        
+        # TODO: Validate citations are from provided law_context
+        if not self._ensure_grounded_response(explanation, law_context):
+            logger.warning("Response contains ungrounded citations")
+        
+        return self._sanitize_response(explanation)
+
     def get_compliance_reasoning(
         self, 
         transaction: Dict[str, Any], 
@@ -122,69 +269,165 @@ class QueryLLM:
         """
         Get compliance reasoning for a specific transaction.
         """
-        # TODO: Build prompt using QueryTemplates.get_compliance_context_template
         try:
-            prompt = self.templates.get_compliance_context_template(transaction, law_context)
-            
-            # TODO: Include law_context for grounding
-            system_msg = f"You are a compliance expert. Base reasoning on these laws:\n{chr(10).join(law_context[:5])}"
-            
-            # TODO: Send to LLM API
-            response = self._call_llm(
-                prompt=prompt,
-                system_message=system_msg,
-                temperature=0.2,
-                max_tokens=800
-            )
-            
-            # TODO: Parse response into structured dict
-            try:
-                reasoning = json.loads(response)
-            except json.JSONDecodeError:
-                reasoning = {
-                    "compliant": True,
-                    "applicable_rules": law_context[:3],
-                    "recommendations": [response],
-                    "risk_level": "low"
-                }
-            
-            # TODO: Return compliance reasoning
-            logger.info(f"Generated compliance reasoning for transaction {transaction.get('id', 'unknown')}")
-            return reasoning
-            
+            response = self._call_llm(**self._compliance_request(transaction, law_context))
+            return self._compliance_result(response, transaction, law_context)
         except Exception as e:
             logger.error(f"Compliance reasoning failed: {e}")
             return {"compliant": True, "applicable_rules": [], "recommendations": [], "error": str(e)}
 
+    async def aget_compliance_reasoning(
+        self, 
+        transaction: Dict[str, Any], 
+        law_context: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Async version of get_compliance_reasoning.
+        """
+        try:
+            response = await self._acall_llm(**self._compliance_request(transaction, law_context))
+            return await asyncio.to_thread(self._compliance_result, response, transaction, law_context)
+        except Exception as e:
+            logger.error(f"Compliance reasoning failed: {e}")
+            return {"compliant": True, "applicable_rules": [], "recommendations": [], "error": str(e)}
+
+    async def aget_compliance_reasoning_many(
+        self, 
+        transactions: List[Dict[str, Any]], 
+        law_context: List[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Get compliance reasoning for many transactions with concurrent API calls.
+        """
+        try:
+            requests = [self._compliance_request(txn, law_context) for txn in transactions]
+            responses = await self.acall_llm_many(requests)
+            return [
+                self._compliance_result(response, txn, law_context)
+                for txn, response in zip(transactions, responses)
+            ]
+        except Exception as e:
+            logger.error(f"Compliance reasoning failed: {e}")
+            return [
+                {"compliant": True, "applicable_rules": [], "recommendations": [], "error": str(e)}
+                for _ in transactions
+            ]
+
+    async def acompliance_batch(
+        self, 
+        transactions: List[Dict[str, Any]], 
+        law_context: List[str],
+        checkpoint_path: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run compliance reasoning over a large transaction table, resumably.
+        
+        Each completed transaction is appended to a JSONL checkpoint as
+        {"id", "reasoning"}; on restart, transactions already in the checkpoint
+        are skipped. Transactions without an id are keyed by their position in
+        the list. Results carrying an "error" (including the fallback used when
+        the LLM is unavailable) are not checkpointed, so they are retried.
+        Calls run concurrently under the shared LLM semaphore.
+        """
+        done: Dict[str, Dict[str, Any]] = {}
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            line = ""
+            with open(checkpoint_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        done[str(entry["id"])] = entry["reasoning"]
+                    except (json.JSONDecodeError, KeyError):
+                        continue  # Partial line from an interrupted write
+            if line and not line.endswith("\n"):
+                # Terminate the partial line so the next entry starts on its own line
+                with open(checkpoint_path, "a", encoding="utf-8") as f:
+                    f.write("\n")
+            logger.info(f"Resuming compliance batch: {len(done)} of {len(transactions)} already done")
+        
+        keys = [
+            str(txn["id"]) if txn.get("id") is not None else f"#{index}"
+            for index, txn in enumerate(transactions)
+        ]
+        
+        async def reason(key: str, txn: Dict[str, Any]) -> None:
+            reasoning = await self.aget_compliance_reasoning(txn, law_context)
+            done[key] = reasoning
+            if checkpoint_path and "error" not in reasoning:
+                with open(checkpoint_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"id": key, "reasoning": reasoning}, default=str) + "\n")
+        
+        pending = [(key, txn) for key, txn in zip(keys, transactions) if key not in done]
+        await asyncio.gather(*(reason(key, txn) for key, txn in pending))
+        
+        return [done[key] for key in keys]
+
+    def _compliance_request(self, transaction: Dict[str, Any], law_context: List[str]) -> Dict[str, Any]:
+        # TODO: Build prompt using QueryTemplates.get_compliance_context_template
+        return {
+            "prompt": self._with_law_excerpts(self.templates.get_compliance_context_template(transaction), law_context),
+            "system_message": COMPLIANCE_SYSTEM_MESSAGE,
+            "temperature": 0.2,
+            "max_tokens": 500,
+            "expects_json": True,
+            "request_type": "compliance"
+        }
+
+    def _compliance_result(self, response: str, transaction: Dict[str, Any], law_context: List[str]) -> Dict[str, Any]:
+        reasoning = json.loads(response)
+        
+        logger.info(f"Generated compliance reasoning for transaction {transaction.get('id', 'unknown')}")
+        return reasoning
+
     def validate_filters(self, filters: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Validate extracted filters using LLM for security and correctness.
+        Validate extracted filters for security and correctness.
+        
+        The checks are deterministic, so they run locally through QueryValidator
+        (ranges, string length and injection patterns); set LLM_FILTER_VALIDATION=1
+        to have the LLM validate instead.
         """
-        # TODO: Build prompt using QueryTemplates.get_filter_validation_template
+        if os.getenv("LLM_FILTER_VALIDATION") != "1":
+            return self._validate_filters_locally(filters)
+        
         try:
-            prompt = self.templates.get_filter_validation_template(filters)
-            
-            # TODO: Send to LLM API
-            response = self._call_llm(
-                prompt=prompt,
-                system_message="You are a security validator. Check filters for SQL injection and logical errors.",
-                temperature=0.1,
-                max_tokens=300
-            )
-            
-            # TODO: Parse JSON response
-            try:
-                validation = json.loads(response)
-            except json.JSONDecodeError:
-                validation = {"is_valid": True, "errors": []}
-            
-            # TODO: Return validation result
-            return validation
-            
+            response = self._call_llm(**self._filter_validation_request(filters))
+            return self._filter_validation_result(response)
         except Exception as e:
             logger.error(f"Filter validation failed: {e}")
             return {"is_valid": False, "errors": [str(e)]}
 
+    async def avalidate_filters(self, filters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async version of validate_filters.
+        """
+        if os.getenv("LLM_FILTER_VALIDATION") != "1":
+            return self._validate_filters_locally(filters)
+        
+        try:
+            response = await self._acall_llm(**self._filter_validation_request(filters))
+            return await asyncio.to_thread(self._filter_validation_result, response)
+        except Exception as e:
+            logger.error(f"Filter validation failed: {e}")
+            return {"is_valid": False, "errors": [str(e)]}
+
+    def _validate_filters_locally(self, filters: Dict[str, Any]) -> Dict[str, Any]:
+        return self.validator.validate_filters(filters)
+
+    def _filter_validation_request(self, filters: Dict[str, Any]) -> Dict[str, Any]:
+        # TODO: Build prompt using QueryTemplates.get_filter_validation_template
+        return {
+            "prompt": self.templates.get_filter_validation_template(filters),
+            "system_message": "You are a security validator. Check filters for SQL injection and logical errors.",
+            "temperature": 0.1,
+            "max_tokens": 200,
+            "expects_json": True,
+            "request_type": "validate"
+        }
+
+    def _filter_validation_result(self, response: str) -> Dict[str, Any]:
+        return json.loads(response)
+
     def generate_aggregation_insights(
         self, 
         query: str, 
@@ -193,68 +436,249 @@ class QueryLLM:
         """
         Generate aggregated insights from query results.
         """
-        # TODO: Build prompt using QueryTemplates.get_aggregation_template
         try:
-            prompt = self.templates.get_aggregation_template(query, data)
-            
-            # TODO: Send to LLM API
-            response = self._call_llm(
-                prompt=prompt,
-                system_message="You are a financial analyst. Provide concise insights from data.",
-                temperature=0.4,
-                max_tokens=600
-            )
-            
-            # TODO: Extract insights from response
-            insights = response.strip()
-            
-            # TODO: Return summary
-            return self._sanitize_response(insights)
-            
+            response = self._call_llm(**self._aggregation_request(query, data))
+            return self._sanitize_response(response.strip())
+        except Exception as e:
+            logger.error(f"Insight generation failed: {e}")
+            return f"Summary of {len(data)} records"
+
+    async def agenerate_aggregation_insights(
+        self, 
+        query: str, 
+        data: List[Dict[str, Any]]
+    ) -> str:
+        """
+        Async version of generate_aggregation_insights.
+        """
+        try:
+            response = await self._acall_llm(**self._aggregation_request(query, data))
+            return await asyncio.to_thread(self._sanitize_response, response.strip())
         except Exception as e:
             logger.error(f"Insight generation failed: {e}")
             return f"Summary of {len(data)} records"
 
+    def _aggregation_request(self, query: str, data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # TODO: Build prompt using QueryTemplates.get_aggregation_template
+        return {
+            "prompt": self.templates.get_aggregation_template(query, self._summarize_data(data)),
+            "system_message": "You are a financial analyst. Provide concise insights from data.",
+            "temperature": 0.4,
+            "max_tokens": 600,
+            "request_type": "text"
+        }
+
+    def _with_law_excerpts(self, prompt: str, law_context: List[str]) -> str:
+        """
+        Prepend the top law excerpts, sorted so identical retrievals yield identical prompts.
+        """
+        excerpts = sorted(law_context[:5])
+        return f"Retrieved excerpts:\n{chr(10).join(excerpts)}\n\n{prompt}"
+
+    def _summarize_data(self, data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Precompute the aggregates the insight prompt asks for, so the model narrates
+        a handful of numbers instead of reading every row.
+        """
+        amounts = [float(row.get("amount") or 0) for row in data]
+        total = sum(amounts)
+        vendor_totals = Counter()
+        ledger_totals = Counter()
+        for row, amount in zip(data, amounts):
+            vendor_totals[row.get("vendor") or "Unknown"] += amount
+            ledger_totals[row.get("ledger") or "Uncategorized"] += amount
+        dates = sorted(str(row["date"]) for row in data if row.get("date"))
+        
+        return {
+            "transaction_count": len(data),
+            "total_amount": round(total, 2),
+            "average_amount": round(total / len(data), 2) if data else 0.0,
+            "top_vendors": [(v, round(a, 2)) for v, a in vendor_totals.most_common(3)],
+            "top_ledgers": [(l, round(a, 2)) for l, a in ledger_totals.most_common(3)],
+            "date_range": (dates[0], dates[-1]) if dates else None
+        }
+
     def _call_llm(
         self, 
         prompt: str, 
         system_message: Optional[str] = None,
         temperature: float = 0.7,
-        max_tokens: int = 1000
+        max_tokens: int = 1000,
+        expects_json: bool = False,
+        request_type: str = "text"
     ) -> str:
         """
         Internal method to call LLM API with error handling.
         """
-        # TODO: Implement API call with error handling
-        # TODO: Handle rate limiting with exponential backoff
-        # TODO: Log API usage for monitoring
-        # TODO: Return response text
-        
-        # Placeholder implementation - replace with actual API call
-        if not self.api_key:
+        if self._client is None:
             logger.warning("LLM API key not configured - using fallback")
-            return self._fallback_response(prompt)
+            return self._fallback_response(request_type)
+        
+        cache_key = self._response_cache_key(prompt, system_message, temperature, max_tokens, expects_json)
+        cached = self._get_cached_response(cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            # Example implementation:
-            # import openai
-            # response = openai.ChatCompletion.create(
-            #     model=self.model,
-            #     messages=[
-            #         {"role": "system", "content": system_message or "You are a helpful assistant."},
-            #         {"role": "user", "content": prompt}
-            #     ],
-            #     temperature=temperature,
-            #     max_tokens=max_tokens
-            # )
-            # return response.choices[0].message.content
-            
             logger.info(f"LLM call: {len(prompt)} chars, temp={temperature}")
-            return self._fallback_response(prompt)
+            response = self._create_completion(
+                **self._completion_params(prompt, system_message, temperature, max_tokens, expects_json)
+            )
+            content = response.choices[0].message.content
+            self._set_cached_response(cache_key, content)
+            return content
             
         except Exception as e:
             logger.error(f"LLM API call failed: {e}")
-            return self._fallback_response(prompt)
+            return self._fallback_response(request_type)
+
+    async def _acall_llm(
+        self, 
+        prompt: str, 
+        system_message: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        expects_json: bool = False,
+        request_type: str = "text"
+    ) -> str:
+        """
+        Async counterpart of _call_llm; awaits the API without blocking the event loop.
+        """
+        if self._client is None:
+            logger.warning("LLM API key not configured - using fallback")
+            return self._fallback_response(request_type)
+        
+        cache_key = self._response_cache_key(prompt, system_message, temperature, max_tokens, expects_json)
+        cached = await self._aget_cached_response(cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            async with self._semaphore, self._async_openai() as client:
+                logger.info(f"LLM call: {len(prompt)} chars, temp={temperature}")
+                response = await self._acreate_completion(
+                    client,
+                    **self._completion_params(prompt, system_message, temperature, max_tokens, expects_json)
+                )
+            content = response.choices[0].message.content
+            await self._aset_cached_response(cache_key, content)
+            return content
+            
+        except Exception as e:
+            logger.error(f"LLM API call failed: {e}")
+            return self._fallback_response(request_type)
+
+    @_llm_retry
+    def _create_completion(self, **params: Any) -> Any:
+        return self._client.chat.completions.create(**params)
+
+    @_llm_retry
+    async def _acreate_completion(self, client: Any, **params: Any) -> Any:
+        return await client.chat.completions.create(**params)
+
+    @asynccontextmanager
+    async def _async_openai(self) -> AsyncIterator[Any]:
+        """
+        Yield an async OpenAI client for the running event loop.
+        
+        Inside the app this is the client on the shared pool. Elsewhere (scripts,
+        tests, asyncio.run, other loops) a pool is opened for the call and closed after it.
+        """
+        if _async_http_client is not None and _async_http_loop is asyncio.get_running_loop():
+            yield _get_async_openai_client(self.api_key, _async_http_client)
+            return
+        
+        async with httpx.AsyncClient(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT) as http_client:
+            yield AsyncOpenAI(api_key=self.api_key, http_client=http_client, max_retries=0)
+
+    async def acall_llm_many(self, requests: List[Dict[str, Any]]) -> List[str]:
+        """
+        Issue several LLM calls concurrently and return responses in request order.
+        
+        Each request holds _acall_llm keyword arguments (prompt, system_message,
+        temperature, max_tokens, expects_json, request_type); the shared semaphore bounds how many are in flight.
+        """
+        return list(await asyncio.gather(*(self._acall_llm(**request) for request in requests)))
+
+    def _response_cache_key(
+        self, 
+        prompt: str, 
+        system_message: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        expects_json: bool = False
+    ) -> str:
+        """
+        Hash every input that affects the completion into a cache key.
+        """
+        request = f"{self.model}|{temperature}|{max_tokens}|{expects_json}|{system_message}|{prompt}"
+        return f"llmresp:{hashlib.sha256(request.encode()).hexdigest()}"
+
+    def _get_cached_response(self, cache_key: str) -> Optional[str]:
+        """
+        Look up a stored completion in Redis, or the in-process cache without Redis.
+        """
+        if get_redis_client() is not None:
+            return cache_get(cache_key)
+        with _local_response_cache_lock:
+            return _local_response_cache.get(cache_key)
+
+    def _set_cached_response(self, cache_key: str, content: Optional[str]) -> None:
+        """
+        Store a completion returned by the API.
+        """
+        if content is None:
+            return
+        if get_redis_client() is not None:
+            cache_set(cache_key, content, LLM_RESPONSE_CACHE_TTL)
+            return
+        with _local_response_cache_lock:
+            _local_response_cache[cache_key] = content
+
+    async def _aget_cached_response(self, cache_key: str) -> Optional[str]:
+        """
+        Async version of _get_cached_response, for _acall_llm.
+        """
+        if get_async_redis_client() is not None:
+            return await acache_get(cache_key)
+        with _local_response_cache_lock:
+            return _local_response_cache.get(cache_key)
+
+    async def _aset_cached_response(self, cache_key: str, content: Optional[str]) -> None:
+        """
+        Async version of _set_cached_response, for _acall_llm.
+        """
+        if content is None:
+            return
+        if get_async_redis_client() is not None:
+            await acache_set(cache_key, content, LLM_RESPONSE_CACHE_TTL)
+            return
+        with _local_response_cache_lock:
+            _local_response_cache[cache_key] = content
+
+    def _completion_params(
+        self, 
+        prompt: str, 
+        system_message: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        expects_json: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Build chat completion arguments shared by the sync and async clients.
+        """
+        params = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_message or "You are a helpful assistant."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if expects_json:
+            params["response_format"] = {"type": "json_object"}
+        return params
 
     def _ensure_grounded_response(self, response: str, law_context: List[str]) -> bool:
         """
@@ -266,16 +690,7 @@ class QueryLLM:
         # TODO: Return validation result
         
         # Extract potential law references (Section X, Act Y, etc.)
-        citation_patterns = [
-            r'Section\s+\d+[A-Z]*',
-            r'Rule\s+\d+',
-            r'Act[,\s]+\d{4}',
-            r'Article\s+\d+'
-        ]
-        
-        found_citations = []
-        for pattern in citation_patterns:
-            found_citations.extend(re.findall(pattern, response, re.IGNORECASE))
+        found_citations = _CITATION_RE.findall(response)
         
         if not found_citations:
             return True  # No citations to validate
@@ -302,24 +717,15 @@ class QueryLLM:
         sanitized = response.replace("**", "").replace("*", "")
         
         # Ensure professional tone (basic check)
-        unprofessional_words = ["dude", "bro", "lol", "omg"]
-        for word in unprofessional_words:
-            sanitized = re.sub(rf'\b{word}\b', '', sanitized, flags=re.IGNORECASE)
+        sanitized = _UNPROFESSIONAL_RE.sub('', sanitized)
         
         # Clean up whitespace
-        sanitized = re.sub(r'\s+', ' ', sanitized).strip()
+        sanitized = _WHITESPACE_RE.sub(' ', sanitized).strip()
         
         return sanitized
 
-    def _fallback_response(self, prompt: str) -> str:
+    def _fallback_response(self, request_type: str = "text") -> str:
         """
         Generate fallback response when LLM is unavailable.
         """
-        if "parse" in prompt.lower():
-            return json.dumps({"intent": "general_query", "entities": [], "filters": {}})
-        elif "compliance" in prompt.lower():
-            return json.dumps({"compliant": True, "applicable_rules": [], "recommendations": []})
-        elif "validate" in prompt.lower():
-            return json.dumps({"is_valid": True, "errors": []})
-        else:
-            return "Analysis completed. Please review the data for detailed insights."
+        return _FALLBACK_RESPONSES.get(request_type, _FALLBACK_RESPONSES["text"])
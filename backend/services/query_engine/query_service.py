@@ -1,40 +1,112 @@
 # backend/services/query_engine/query_service.py
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Mapping
+from collections import ChainMap
+import asyncio
+import hashlib
+import json
 import re
+import threading
 from datetime import datetime
+from functools import lru_cache
+import numpy as np
+from cachetools import LRUCache, TTLCache
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; keyword scanning falls back to a compiled regex
+    ahocorasick = None
 from backend.models.query_models import QueryRequest, QueryResult
 from backend.utils.supabase_client import supabase
+from backend.utils.pg_pool import get_pg_pool
 from backend.utils.logger import logger
-from backend.services.rag_service.embedding_service import EmbeddingService
+from backend.services.rag_service.embedding_service import get_embedding_service
+
+_AMOUNT_BOUND_RE = re.compile(r'(above|below)\s+(\d+[,\d]*)')
+_YEAR_RE = re.compile(r'20\d{2}')
+
+# Reworded queries that parse to the same intent and filters share one result
+_query_result_cache: TTLCache = TTLCache(maxsize=1000, ttl=30)
+_query_result_cache_lock = threading.Lock()
+
+
+# Compliance questions repeat often: embeddings by normalized text, law matches by embedding
+_embedding_cache: LRUCache = LRUCache(maxsize=2048)
+_rag_match_cache: TTLCache = TTLCache(maxsize=1024, ttl=3600)
+_rag_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=32)
+def _quarter_range(year: int, quarter: str) -> Optional[tuple]:
+    """Return (date_from, date_to) for an Indian financial-year quarter (Q1 = Apr-Jun)."""
+    quarter_dates = {
+        "Q1": (f"{year}-04-01", f"{year}-06-30"),
+        "Q2": (f"{year}-07-01", f"{year}-09-30"),
+        "Q3": (f"{year}-10-01", f"{year}-12-31"),
+        "Q4": (f"{year+1}-01-01", f"{year+1}-03-31")
+    }
+    return quarter_dates.get(quarter)
+
+
+# Same search as match_embeddings, binding the embedding as a binary vector
+# parameter. $1 is typed as vector, the only type the pgvector codec encodes,
+# and cast to halfvec just for the HNSW index walk; the candidates are then
+# rescored against the full-precision vector column
+_MATCH_LAW_CHUNKS_SQL = """
+    WITH candidates AS (
+        SELECT chunk_text, embedding
+        FROM embeddings
+        ORDER BY embedding::halfvec(1536) <=> $1::vector(1536)::halfvec(1536)
+        LIMIT $3 * 2
+    )
+    SELECT chunk_text AS content
+    FROM candidates
+    WHERE 1 - (embedding <=> $1) > $2
+    ORDER BY embedding <=> $1
+    LIMIT $3
+"""
+
+
+def clear_query_cache() -> None:
+    """Drop cached query results after transactions are written."""
+    with _query_result_cache_lock:
+        _query_result_cache.clear()
+
 
 class QueryService:
     """
     High-level orchestrator for natural language query processing.
     """
 
+    ledger_keywords = {
+        "rent": "Rent Expense",
+        "salary": "Salary & Wages",
+        "professional": "Professional Fees",
+        "electricity": "Electricity Expense",
+        "travel": "Travel Expense",
+        "fuel": "Fuel Expense",
+        "insurance": "Insurance Expense"
+    }
+    
+    intent_patterns = {
+        "list": ["show", "list", "display", "get", "find"],
+        "aggregate": ["total", "sum", "count", "average"],
+        "compliance": ["gst", "tds", "tax", "compliance", "law"]
+    }
+    
+    quarter_keywords = {"q1": "Q1", "q2": "Q2", "q3": "Q3", "q4": "Q4"}
+    
+    dangerous_patterns = ["drop", "delete", "truncate", "alter", "create", "insert", "update"]
+
     def __init__(self) -> None:
-        self.embedding_service = EmbeddingService()
-        
-        self.ledger_keywords = {
-            "rent": "Rent Expense",
-            "salary": "Salary & Wages",
-            "professional": "Professional Fees",
-            "electricity": "Electricity Expense",
-            "travel": "Travel Expense",
-            "fuel": "Fuel Expense",
-            "insurance": "Insurance Expense"
-        }
-        
-        self.intent_patterns = {
-            "list": ["show", "list", "display", "get", "find"],
-            "aggregate": ["total", "sum", "count", "average"],
-            "compliance": ["gst", "tds", "tax", "compliance", "law"]
-        }
+        self.embedding_service = get_embedding_service()
 
-    def process_query(self, request: QueryRequest) -> QueryResult:
+    async def process_query(self, request: QueryRequest) -> QueryResult:
         """
         Execute a natural language query on financial data.
+        
+        The database query and RAG retrieval are independent I/O, so compliance
+        queries run them concurrently.
         """
         try:
             query_text = request.query.lower()
@@ -43,14 +115,33 @@ class QueryService:
             parsed = self._parse_query(query_text)
             filters = self._extract_filters(parsed, explicit_filters)
             
+            # List results depend only on the resolved filters, not on the wording
+            cache_key = None
+            if parsed.get("intent") == "list":
+                cache_key = json.dumps(dict(filters), sort_keys=True, default=str)
+                with _query_result_cache_lock:
+                    cached = _query_result_cache.get(cache_key)
+                if cached is not None:
+                    # Callers may mutate the result; the cached copy stays intact
+                    return cached.model_copy(deep=True)
+            
             db_query = self._build_db_query(filters, parsed)
-            result_data = self._execute_query(db_query)
             
             law_references = []
             if parsed.get("intent") == "compliance":
-                law_references = self._get_rag_context(query_text)
+                result_data, law_references = await asyncio.gather(
+                    asyncio.to_thread(self._execute_query, db_query),
+                    self._get_rag_context(query_text)
+                )
+            else:
+                result_data = await asyncio.to_thread(self._execute_query, db_query)
             
-            return self._assemble_response(result_data, law_references, query_text, parsed)
+            result = self._assemble_response(result_data, law_references, query_text, parsed)
+            # _execute_query returns [] on a database error, so empty results are not cached
+            if cache_key is not None and result_data:
+                with _query_result_cache_lock:
+                    _query_result_cache[cache_key] = result.model_copy(deep=True)
+            return result
             
         except Exception as e:
             logger.error(f"Query processing failed: {e}")
@@ -70,40 +161,33 @@ class QueryService:
             "query_type": "transaction"
         }
         
-        for intent, keywords in self.intent_patterns.items():
-            if any(kw in query_text for kw in keywords):
-                parsed["intent"] = intent
-                break
-        
-        for keyword, ledger in self.ledger_keywords.items():
-            if keyword in query_text:
-                parsed["entities"]["ledger"] = ledger
-                break
+        matches = _scan_keywords(query_text)
+        if "intent" in matches:
+            parsed["intent"] = matches["intent"]
+        if "ledger" in matches:
+            parsed["entities"]["ledger"] = matches["ledger"]
+        if "quarter" in matches:
+            parsed["entities"]["quarter"] = matches["quarter"]
         
-        amount_match = re.search(r'above\s+(\d+[,\d]*)', query_text)
-        if amount_match:
-            parsed["entities"]["amount_min"] = float(amount_match.group(1).replace(',', ''))
+        # One scan picks up both bounds; the first "above"/"below" of each wins
+        for direction, amount in _AMOUNT_BOUND_RE.findall(query_text):
+            key = "amount_min" if direction == "above" else "amount_max"
+            parsed["entities"].setdefault(key, float(amount.replace(',', '')))
         
-        amount_match = re.search(r'below\s+(\d+[,\d]*)', query_text)
-        if amount_match:
-            parsed["entities"]["amount_max"] = float(amount_match.group(1).replace(',', ''))
-        
-        if "q1" in query_text: parsed["entities"]["quarter"] = "Q1"
-        elif "q2" in query_text: parsed["entities"]["quarter"] = "Q2"
-        elif "q3" in query_text: parsed["entities"]["quarter"] = "Q3"
-        elif "q4" in query_text: parsed["entities"]["quarter"] = "Q4"
-        
-        year_match = re.search(r'20\d{2}', query_text)
+        year_match = _YEAR_RE.search(query_text)
         if year_match:
             parsed["entities"]["year"] = int(year_match.group(0))
         
         return parsed
 
-    def _extract_filters(self, parsed_query: Dict[str, Any], explicit_filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    def _extract_filters(self, parsed_query: Dict[str, Any], explicit_filters: Optional[Dict[str, Any]]) -> Mapping[str, Any]:
         """
         Combine parsed entities and explicit filters.
+        
+        Returns a ChainMap view: parsed entities are written to the front map and
+        override the caller's filters, which are never copied or mutated.
         """
-        filters = explicit_filters.copy() if explicit_filters else {}
+        filters = ChainMap({}, explicit_filters or {})
         entities = parsed_query.get("entities", {})
         
         if "ledger" in entities: filters["ledger"] = entities["ledger"]
@@ -111,20 +195,13 @@ class QueryService:
         if "amount_max" in entities: filters["amount_max"] = entities["amount_max"]
         
         if "quarter" in entities and "year" in entities:
-            quarter = entities["quarter"]
-            year = entities["year"]
-            quarter_dates = {
-                "Q1": (f"{year}-04-01", f"{year}-06-30"),
-                "Q2": (f"{year}-07-01", f"{year}-09-30"),
-                "Q3": (f"{year}-10-01", f"{year}-12-31"),
-                "Q4": (f"{year+1}-01-01", f"{year+1}-03-31")
-            }
-            if quarter in quarter_dates:
-                filters["date_from"], filters["date_to"] = quarter_dates[quarter]
+            quarter_range = _quarter_range(entities["year"], entities["quarter"])
+            if quarter_range:
+                filters["date_from"], filters["date_to"] = quarter_range
         
         return filters
 
-    def _build_db_query(self, filters: Dict[str, Any], parsed: Dict[str, Any]) -> Any:
+    def _build_db_query(self, filters: Mapping[str, Any], parsed: Dict[str, Any]) -> Any:
         """
         Build a database query.
         """
@@ -152,25 +229,19 @@ class QueryService:
             logger.error(f"Query execution failed: {e}")
             return []
 
-    def _get_rag_context(self, query_text: str) -> List[str]:
+    async def _get_rag_context(self, query_text: str) -> List[str]:
         """
         Retrieve relevant legal/compliance context using RAG (Vector Search).
         """
         try:
             # Generate embedding for the query
-            query_embedding = self.embedding_service.generate_embedding(query_text)
+            query_embedding = await asyncio.to_thread(self._embed, query_text)
             
-            # Perform vector similarity search via Supabase RPC
-            # Assuming 'match_law_chunks' function exists in Supabase
-            params = {
-                "query_embedding": query_embedding,
-                "match_threshold": 0.7,
-                "match_count": 3
-            }
-            response = supabase.rpc("match_law_chunks", params).execute()
+            # Perform vector similarity search
+            matches = await self._match_law_chunks(query_embedding)
             
-            if response.data:
-                return [item["content"] for item in response.data]
+            if matches:
+                return [item["content"] for item in matches]
             
             # Fallback to keyword matching if vector search fails or returns empty
             law_references = []
@@ -185,19 +256,68 @@ class QueryService:
             logger.error(f"RAG retrieval failed: {e}")
             return []
 
+    def _embed(self, query_text: str) -> List[float]:
+        """
+        Embed query text, reusing the vector for previously seen text.
+        """
+        key = " ".join(query_text.split())
+        with _rag_cache_lock:
+            cached = _embedding_cache.get(key)
+        if cached is not None:
+            return list(cached)
+        
+        embedding = self.embedding_service.generate_embedding(key)
+        with _rag_cache_lock:
+            _embedding_cache[key] = tuple(embedding)
+        return embedding
+
+    async def _match_law_chunks(self, query_embedding: List[float]) -> List[Dict[str, Any]]:
+        """
+        Run the law-chunk similarity search, memoized by embedding digest.
+        
+        Uses a direct asyncpg query when DATABASE_URL is configured, otherwise the
+        Supabase RPC.
+        """
+        vector = np.asarray(query_embedding, dtype=np.float32)
+        key = hashlib.sha256(vector.tobytes()).hexdigest()
+        with _rag_cache_lock:
+            cached = _rag_match_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        pool = await get_pg_pool()
+        if pool is not None:
+            rows = await pool.fetch(_MATCH_LAW_CHUNKS_SQL, vector, 0.7, 3)
+            matches = [dict(row) for row in rows]
+        else:
+            # Assuming 'match_law_chunks' function exists in Supabase
+            params = {
+                "query_embedding": query_embedding,
+                "match_threshold": 0.7,
+                "match_count": 3
+            }
+            response = await asyncio.to_thread(supabase.rpc("match_law_chunks", params).execute)
+            matches = response.data or []
+        
+        with _rag_cache_lock:
+            _rag_match_cache[key] = matches
+        return matches
+
     def _assemble_response(self, result_data: List[Dict[str, Any]], law_references: List[str], query_text: str, parsed: Dict[str, Any]) -> QueryResult:
         """
         Assemble the final QueryResult.
         """
         intent = parsed.get("intent", "list")
         
+        # Parse amounts once; both summaries use the same total
+        amounts = np.fromiter((float(t.get("amount") or 0) for t in result_data), dtype=np.float64, count=len(result_data))
+        total_amount = float(amounts.sum())
+        
         if intent == "aggregate":
-            total_amount = sum(float(t.get("amount", 0)) for t in result_data)
             summary = f"Total: ₹{total_amount:,.2f} across {len(result_data)} transactions"
         else:
             summary = f"Found {len(result_data)} transactions"
             if result_data:
-                total_amount = sum(float(t.get("amount", 0)) for t in result_data)
                 summary += f" with total amount ₹{total_amount:,.2f}"
         
         return QueryResult(
@@ -216,11 +336,65 @@ class QueryService:
         if len(query_text) > 500:
             return {"is_valid": False, "error": "Query too long (max 500 characters)"}
         
-        dangerous_patterns = ["drop", "delete", "truncate", "alter", "create", "insert", "update"]
-        query_lower = query_text.lower()
-        
-        for pattern in dangerous_patterns:
-            if pattern in query_lower:
-                return {"is_valid": False, "error": f"Potentially dangerous keyword detected: {pattern}"}
+        pattern = _scan_keywords(query_text.lower()).get("danger")
+        if pattern:
+            return {"is_valid": False, "error": f"Potentially dangerous keyword detected: {pattern}"}
         
         return {"is_valid": True}
+
+
+def _build_keyword_matcher():
+    """
+    Index every intent, ledger, quarter and dangerous keyword for a single-pass scan.
+    
+    Each keyword maps to (category, value, rank) entries; rank preserves the
+    declaration order so the earliest-declared match in a category wins.
+    """
+    entries: Dict[str, List[tuple]] = {}
+    rank = 0
+    for intent, keywords in QueryService.intent_patterns.items():
+        for keyword in keywords:
+            entries.setdefault(keyword, []).append(("intent", intent, rank))
+            rank += 1
+    for keyword, ledger in QueryService.ledger_keywords.items():
+        entries.setdefault(keyword, []).append(("ledger", ledger, rank))
+        rank += 1
+    for keyword, quarter in QueryService.quarter_keywords.items():
+        entries.setdefault(keyword, []).append(("quarter", quarter, rank))
+        rank += 1
+    for keyword in QueryService.dangerous_patterns:
+        entries.setdefault(keyword, []).append(("danger", keyword, rank))
+        rank += 1
+    
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for keyword, payload in entries.items():
+            automaton.add_word(keyword, payload)
+        automaton.make_automaton()
+        return automaton, entries
+    
+    # Lookahead reports a match at every position, so overlapping keywords are all found
+    alternation = "|".join(re.escape(k) for k in sorted(entries, key=len, reverse=True))
+    return re.compile(f"(?=({alternation}))"), entries
+
+
+_KEYWORD_MATCHER = _build_keyword_matcher()
+
+
+def _scan_keywords(text: str) -> Dict[str, str]:
+    """
+    Scan lowercased text once and return the winning value per category.
+    """
+    matcher, entries = _KEYWORD_MATCHER
+    if ahocorasick is not None:
+        hits = (payload for _, payload in matcher.iter(text))
+    else:
+        hits = (entries[keyword] for keyword in matcher.findall(text))
+    
+    best: Dict[str, tuple] = {}
+    for payload in hits:
+        for category, value, rank in payload:
+            if category not in best or rank < best[category][1]:
+                best[category] = (value, rank)
+    
+    return {category: value for category, (value, _) in best.items()}
@@ -1,6 +1,29 @@
 # backend/services/query_engine/query_templates.py
 
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+from functools import lru_cache
+import json
+import sys
+
+# Constant scaffolding is built once and interned; per-call work is a join of the slots
+_PARSE_PREFIX = sys.intern('Parse: "')
+_PARSE_SUFFIX = sys.intern(
+    '"\nOutput JSON: {intent: list|filter|aggregate|compliance_check|report, '
+    'entity_type: transaction|client|sheet|document|vendor, filters: {ledger, date_from, '
+    'date_to (YYYY-MM-DD), amount_min, amount_max, vendor, type: credit|debit}, '
+    'aggregation: sum|count|average, sort_by: date|amount|ledger, sort_order: asc|desc}. '
+    'Use null when absent.'
+)
+
+_EXPLANATION_SUFFIX = sys.intern("""
+
+Provide a concise summary that includes:
+1. What the query was asking for
+2. Key findings from the results
+3. Any compliance implications based on the law references
+4. Recommended next steps for the CA (if applicable)
+
+Keep the explanation professional and actionable.""")
 
 
 class QueryTemplates:
@@ -15,6 +38,7 @@ class QueryTemplates:
     """
 
     @staticmethod
+    @lru_cache(maxsize=1024)
     def get_query_parsing_template(query: str) -> str:
         """
         Template for parsing natural language query into structured intent and entities.
@@ -25,29 +49,7 @@ class QueryTemplates:
         Returns:
             Formatted prompt for LLM.
         """
-        return f"""You are a financial data analyst assistant. Parse the following natural language query into structured components.
-
-Query: "{query}"
-
-Extract and return a JSON object with the following fields:
-{{
-    "intent": "list|filter|aggregate|compliance_check|report",
-    "entity_type": "transaction|client|sheet|document|vendor",
-    "filters": {{
-        "ledger": "string or null",
-        "date_from": "YYYY-MM-DD or null",
-        "date_to": "YYYY-MM-DD or null",
-        "amount_min": "number or null",
-        "amount_max": "number or null",
-        "vendor": "string or null",
-        "type": "credit|debit or null"
-    }},
-    "aggregation": "sum|count|average or null",
-    "sort_by": "date|amount|ledger or null",
-    "sort_order": "asc|desc or null"
-}}
-
-Only return the JSON object, no additional text."""
+        return "".join((_PARSE_PREFIX, query, _PARSE_SUFFIX))
 
     @staticmethod
     def get_sql_generation_template(filters: Dict[str, Any], table: str) -> str:
@@ -89,21 +91,23 @@ Only return the Python code, no explanations."""
         Returns:
             Formatted prompt for LLM.
         """
-        result_count = len(results)
-        return f"""You are a Chartered Accountant assistant. Explain the following query results in professional, clear language.
+        sample = json.dumps(results[:5], sort_keys=True, default=str) if results else "No results found"
+        return QueryTemplates._render_explanation(query, len(results), sample, tuple(law_refs))
 
-Original Query: "{query}"
-Number of Results: {result_count}
-Sample Results: {results[:5] if results else "No results found"}
-Relevant Laws/Rules: {law_refs}
-
-Provide a concise summary that includes:
-1. What the query was asking for
-2. Key findings from the results
-3. Any compliance implications based on the law references
-4. Recommended next steps for the CA (if applicable)
-
-Keep the explanation professional and actionable."""
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _render_explanation(query: str, result_count: int, sample: str, law_refs: Tuple[str, ...]) -> str:
+        """
+        Memoized body of get_explanation_template, keyed on hashable inputs.
+        """
+        return "".join((
+            "You are a Chartered Accountant assistant. Explain the following query results in professional, clear language.\n\n",
+            f'Original Query: "{query}"\n',
+            f"Number of Results: {result_count}\n",
+            f"Sample Results: {sample}\n",
+            f"Relevant Laws/Rules: {list(law_refs)}",
+            _EXPLANATION_SUFFIX
+        ))
 
     @staticmethod
     def get_compliance_context_template(transaction_data: Dict[str, Any]) -> str:
@@ -125,7 +129,8 @@ Transaction Details:
 - Vendor: {transaction_data.get('vendor', 'N/A')}
 - Date: {transaction_data.get('date', 'N/A')}
 
-What GST, TDS, Income Tax, or other compliance rules apply to this transaction?"""
+What GST, TDS, Income Tax, or other compliance rules apply to this transaction?
+Output JSON: {{compliant: bool, applicable_rules: [str], recommendations: [str], risk_level: low|medium|high}}"""
 
     @staticmethod
     def get_filter_validation_template(filters: Dict[str, Any]) -> str:
@@ -138,33 +143,18 @@ What GST, TDS, Income Tax, or other compliance rules apply to this transaction?"
         Returns:
             Formatted prompt for LLM.
         """
-        return f"""Validate the following query filters for correctness and security.
-
-Filters: {filters}
-
-Check for:
-1. Valid date formats (YYYY-MM-DD)
-2. Reasonable amount ranges (no negative values unless debit)
-3. Valid ledger names (no SQL injection attempts)
-4. Logical consistency (date_from <= date_to)
-
-Return a JSON object:
-{{
-    "is_valid": true|false,
-    "errors": ["list of error messages"],
-    "warnings": ["list of warnings"]
-}}
-
-Only return the JSON object."""
+        return f"""Validate filters: {filters}
+Check: YYYY-MM-DD dates, date_from <= date_to, no negative amounts unless debit, no SQL injection in ledger names.
+Output JSON: {{is_valid: bool, errors: [str], warnings: [str]}}"""
 
     @staticmethod
-    def get_aggregation_template(query: str, data: list) -> str:
+    def get_aggregation_template(query: str, data: Any) -> str:
         """
         Template for generating aggregated insights from query results.
         
         Args:
             query: Original query.
-            data: Query results.
+            data: Query results, or a precomputed summary of them.
             
         Returns:
             Formatted prompt for LLM.
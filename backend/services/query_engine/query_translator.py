@@ -1,10 +1,126 @@
 # backend/services/query_engine/query_translator.py
 
-from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from types import MappingProxyType
 import re
+import sys
+import time
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; keyword scanning falls back to a compiled regex
+    ahocorasick = None
 from backend.utils.logger import logger
 
+# One pass finds every amount bound; the named group says which kind matched
+_AMOUNT_RE = re.compile(
+    r'(?P<above>above|greater than|more than|over)\s+(?P<v1>[\d,]+)'
+    r'|(?P<below>below|less than|under)\s+(?P<v2>[\d,]+)'
+    r'|between\s+(?P<v3>[\d,]+)\s+and\s+(?P<v4>[\d,]+)',
+    re.IGNORECASE
+)
+_YEAR_RE = re.compile(r'\b(20\d{2})\b')
+# Tried in this order, so "to X" wins over "from X", which wins over "vendor X";
+# \b keeps "into"/"onto" from reading as "to"
+_VENDOR_RES = tuple(
+    re.compile(rf'\b{keyword}\s+([A-Z][A-Za-z\s]+?)(?:\s|$)', re.IGNORECASE)
+    for keyword in ("to", "from", "vendor")
+)
+
+TODAY_CACHE_TTL = 60  # seconds
+TRANSLATION_CACHE_SIZE = 2048
+DEFAULT_TOP_K = 5
+COMPLIANCE_TOP_K = 10  # More context for compliance queries
+
+_NO_METADATA_FILTERS: Mapping[str, Any] = MappingProxyType({})
+
+# (refreshed_at, today, today_iso), swapped as a whole so readers never see a partial update
+_today_cache = (float("-inf"), None, "")
+
+
+def _today() -> Tuple[Optional[date], str]:
+    """
+    Return today's UTC date and its ISO string, recomputed at most once a minute.
+    """
+    global _today_cache
+    
+    now = time.monotonic()
+    if now - _today_cache[0] > TODAY_CACHE_TTL:
+        today = datetime.utcnow().date()
+        _today_cache = (now, today, today.isoformat())
+    return _today_cache[1], _today_cache[2]
+
+
+class SafeFragment(str):
+    """
+    A SQL fragment generated by QueryTranslator with only bound placeholders.
+    
+    It carries no user-supplied text, so QueryValidator.validate_sql_fragment
+    can skip the injection scan for it.
+    """
+
+
+@dataclass(slots=True, frozen=True)
+class Translation:
+    """
+    Structured components produced by QueryTranslator.translate.
+    
+    Frozen with read-only mappings, so a cached instance can be handed to
+    every caller without copying.
+    """
+    intent: str
+    entity_type: str
+    filters: Mapping[str, Any]
+    sql_fragments: Tuple[SafeFragment, ...]
+    sql_params: Tuple[Any, ...]
+    entity_map: Mapping[str, str]
+    retrieval_params: Mapping[str, Any]
+    query_text: str
+
+
+def _find_quarter(query_text: str) -> Optional[int]:
+    """
+    Return the quarter number of the first "q1".."q4" in a lowercased query.
+    
+    A str.find loop is enough for a two-character pattern and skips the
+    regex engine entirely.
+    """
+    i = query_text.find('q')
+    while i != -1:
+        c = query_text[i + 1:i + 2]
+        if '1' <= c <= '4':
+            return int(c)
+        i = query_text.find('q', i + 1)
+    return None
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """
+    Build a prefix-factored regex that matches any of the given words.
+    
+    Shared prefixes are matched once ("rent", "rental" -> "rent(?:al)?"), so
+    the engine never retries alternatives that diverge only later in the word.
+    Optional suffixes are greedy, so the longest keyword at a position wins.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+    
+    return build(trie)
+
 
 class QueryTranslator:
     """
@@ -15,85 +131,134 @@ class QueryTranslator:
     - "List rent payments to ABC Landlords"
     - "What are my GST liabilities this month?"
     
-    Into structured filters, SQL fragments, entity maps, and retrieval parameters.
+    Into structured filters, parameterized SQL fragments, entity maps, and retrieval parameters.
     
     This is a rule-based translator that can work standalone or be enhanced with LLM parsing.
     """
 
+    __slots__ = (
+        "intent_keywords", "entity_keywords", "ledger_keywords", "time_keywords",
+        "debit_keywords", "credit_keywords", "compliance_keywords",
+        "_keyword_entries", "_aho", "_period_iso", "_period_iso_day", "_translate_cached"
+    )
+
     def __init__(self) -> None:
         # TODO: Initialize keyword dictionaries and regex patterns
         self._init_keyword_maps()
+        # Per-instance cache so entries never outlive the keyword maps they were built from
+        self._translate_cached = lru_cache(maxsize=TRANSLATION_CACHE_SIZE)(self._translate_impl)
         logger.info("QueryTranslator initialized")
 
-    def translate(self, query_text: str) -> Dict[str, Any]:
+    def translate(self, query_text: str) -> "Translation":
         """
         Main translation method that converts NL query to structured components.
+        
+        Translation is deterministic for a normalized query on a given day, so
+        repeated queries are served from an LRU cache. The cached Translation
+        is fully immutable and shared; only query_text differs per call.
         """
         # TODO: Normalize query text
         normalized = query_text.lower().strip()
         
-        # TODO: Extract intent using self._extract_intent
-        intent = self._extract_intent(normalized)
+        # Keying on today's date keeps relative periods ("this month") current
+        _, today_iso = _today()
+        cached = self._translate_cached(normalized, today_iso)
+        return cached if cached.query_text == query_text else replace(cached, query_text=query_text)
+
+    def translate_many(self, queries: List[str]) -> List["Translation"]:
+        """
+        Translate a batch of queries, e.g. when classifying logged queries.
         
-        # TODO: Extract entity type using self._extract_entity_type
-        entity_type = self._extract_entity_type(normalized)
+        Query logs repeat heavily, so each distinct normalized query is
+        translated once and the shared Translation is reused for its
+        duplicates.
+        """
+        _, today_iso = _today()
+        normalized = [query_text.lower().strip() for query_text in queries]
+        unique = {
+            query: self._translate_cached(query, today_iso)
+            for query in dict.fromkeys(normalized)
+        }
+        
+        results = []
+        for query_text, query in zip(queries, normalized):
+            cached = unique[query]
+            results.append(cached if cached.query_text == query_text else replace(cached, query_text=query_text))
+        return results
+
+    def cache_info(self) -> Any:
+        """
+        Return hit/miss statistics for the translation cache.
+        """
+        return self._translate_cached.cache_info()
+
+    def _translate_impl(self, normalized: str, today_iso: str) -> "Translation":
+        """
+        Translate a normalized query into an immutable Translation.
+        
+        today_iso is only part of the cache key; period ranges read the same
+        cached date through _period_ranges.
+        """
+        # Every keyword table is resolved in a single pass over the query
+        matches = self._scan_keywords(normalized)
+        intent = matches.get("intent", "list")
+        entity_type = matches.get("entity", "transaction")
         
         # TODO: Extract filters using self._extract_filters
-        filters = self._extract_filters(normalized)
+        filters = self._extract_filters(normalized, matches)
         
         # TODO: Generate SQL fragments using self._generate_sql_fragments
-        sql_fragments = self._generate_sql_fragments(filters)
+        sql_fragments, sql_params = self._generate_sql_fragments(filters)
         
         # TODO: Build entity map using self._build_entity_map
-        entity_map = self._build_entity_map(normalized)
+        entity_map = self._build_entity_map(filters)
         
         # TODO: Create retrieval params using self._create_retrieval_params
-        retrieval_params = self._create_retrieval_params(normalized, filters)
-        
-        # TODO: Return complete translation dict
-        result = {
-            "intent": intent,
-            "entity_type": entity_type,
-            "filters": filters,
-            "sql_fragments": sql_fragments,
-            "entity_map": entity_map,
-            "retrieval_params": retrieval_params
-        }
+        retrieval_params = self._create_retrieval_params(normalized, filters, matches)
         
         logger.info(f"Translated query: intent={intent}, entity={entity_type}, filters={len(filters)}")
-        return result
+        return Translation(
+            intent=intent,
+            entity_type=entity_type,
+            filters=MappingProxyType(filters),
+            sql_fragments=tuple(sql_fragments),
+            sql_params=tuple(sql_params),
+            entity_map=MappingProxyType(entity_map),
+            retrieval_params=MappingProxyType(retrieval_params),
+            query_text=normalized
+        )
 
     def _init_keyword_maps(self) -> None:
         """
         Initialize keyword dictionaries for pattern matching.
         """
         # TODO: Define intent keywords
-        self.intent_keywords = {
-            "list": ["show", "list", "display", "get", "find", "view"],
-            "filter": ["where", "with", "having", "above", "below", "between"],
-            "aggregate": ["total", "sum", "count", "average", "how many", "how much"],
-            "compliance_check": ["gst", "tds", "tax", "compliance", "liability", "applicable"]
+        self.intent_keywords: Dict[str, FrozenSet[str]] = {
+            "list": frozenset({"show", "list", "display", "get", "find", "view"}),
+            "filter": frozenset({"where", "with", "having", "above", "below", "between"}),
+            "aggregate": frozenset({"total", "sum", "count", "average", "how many", "how much"}),
+            "compliance_check": frozenset({"gst", "tds", "tax", "compliance", "liability", "applicable"})
         }
         
         # TODO: Define entity type keywords
-        self.entity_keywords = {
-            "transaction": ["expense", "payment", "transaction", "entry", "debit", "credit"],
-            "client": ["client", "customer", "company"],
-            "sheet": ["sheet", "book", "ledger", "account"],
-            "document": ["document", "invoice", "bill", "receipt"]
+        self.entity_keywords: Dict[str, FrozenSet[str]] = {
+            "transaction": frozenset({"expense", "payment", "transaction", "entry", "debit", "credit"}),
+            "client": frozenset({"client", "customer", "company"}),
+            "sheet": frozenset({"sheet", "book", "ledger", "account"}),
+            "document": frozenset({"document", "invoice", "bill", "receipt"})
         }
         
         # TODO: Define ledger keywords
-        self.ledger_keywords = {
-            "Rent": ["rent", "rental", "lease"],
-            "Salaries": ["salary", "wages", "payroll", "compensation"],
-            "Travel Expenses": ["travel", "trip", "flight", "hotel"],
-            "Utilities": ["electricity", "water", "utility", "utilities"],
-            "Professional Fees": ["professional", "consultant", "legal", "audit"]
+        self.ledger_keywords: Dict[str, FrozenSet[str]] = {
+            "Rent": frozenset({"rent", "rental", "lease"}),
+            "Salaries": frozenset({"salary", "wages", "payroll", "compensation"}),
+            "Travel Expenses": frozenset({"travel", "trip", "flight", "hotel"}),
+            "Utilities": frozenset({"electricity", "water", "utility", "utilities"}),
+            "Professional Fees": frozenset({"professional", "consultant", "legal", "audit"})
         }
         
         # TODO: Define time period keywords
-        self.time_keywords = {
+        self.time_keywords: Dict[str, int] = {
             "today": 0,
             "yesterday": 1,
             "this week": 7,
@@ -101,44 +266,81 @@ class QueryTranslator:
             "this quarter": 90,
             "this year": 365
         }
+        
+        self.debit_keywords: FrozenSet[str] = frozenset({"expense", "payment", "paid", "debit", "purchase"})
+        self.credit_keywords: FrozenSet[str] = frozenset({"income", "receipt", "received", "credit", "revenue"})
+        self.compliance_keywords: FrozenSet[str] = frozenset({"compliance", "gst", "tds"})
+        
+        # Period date ranges, rebuilt lazily by _period_ranges when the day changes
+        self._period_iso: Dict[str, Tuple[str, str]] = {}
+        self._period_iso_day: str = ""
+        
+        self._build_keyword_automaton()
 
-    def _extract_intent(self, query_text: str) -> str:
+    def _build_keyword_automaton(self) -> None:
         """
-        Extract the primary intent from the query.
+        Index every keyword table for a single-pass scan.
+        
+        Each keyword maps to (category, value, rank) entries. Keywords within a
+        value are an unordered set, so rank follows the declaration order of the
+        values and the earliest-declared match in a category wins, exactly as
+        the table-by-table lookups did.
         """
-        # TODO: Check for intent keywords in query
-        for intent, keywords in self.intent_keywords.items():
-            if any(kw in query_text for kw in keywords):
-                return intent
+        tables = [
+            ("intent", self.intent_keywords.items()),
+            ("entity", self.entity_keywords.items()),
+            ("ledger", self.ledger_keywords.items()),
+            ("period", ((period, (period,)) for period in self.time_keywords)),
+            ("transaction_type", (("debit", self.debit_keywords), ("credit", self.credit_keywords))),
+            ("compliance", ((True, self.compliance_keywords),)),
+        ]
         
-        # TODO: Return matched intent or default to "list"
-        return "list"
+        entries: Dict[str, List[Tuple[str, Any, int]]] = {}
+        rank = 0
+        for category, table in tables:
+            for value, keywords in table:
+                for keyword in keywords:
+                    entries.setdefault(sys.intern(keyword), []).append((category, value, rank))
+                rank += 1
+        self._keyword_entries = entries
+        
+        if ahocorasick is not None:
+            self._aho = ahocorasick.Automaton()
+            for keyword, payload in entries.items():
+                self._aho.add_word(keyword, payload)
+            self._aho.make_automaton()
+        else:
+            # Lookahead reports a match at every position, so overlapping keywords are all found
+            self._aho = re.compile(f"(?=({_trie_regex(entries)}))")
 
-    def _extract_entity_type(self, query_text: str) -> str:
+    def _scan_keywords(self, query_text: str) -> Dict[str, Any]:
         """
-        Determine the primary entity type being queried.
+        Scan the normalized query once and return the winning value per category.
         """
-        # TODO: Check for entity keywords in query
-        for entity, keywords in self.entity_keywords.items():
-            if any(kw in query_text for kw in keywords):
-                return entity
+        if ahocorasick is not None:
+            hits = (payload for _, payload in self._aho.iter(query_text))
+        else:
+            hits = (self._keyword_entries[kw] for kw in self._aho.findall(query_text))
         
-        # TODO: Return matched entity type or default to "transaction"
-        return "transaction"
+        best: Dict[str, Tuple[Any, int]] = {}
+        for payload in hits:
+            for category, value, rank in payload:
+                if category not in best or rank < best[category][1]:
+                    best[category] = (value, rank)
+        
+        return {category: value for category, (value, _) in best.items()}
 
-    def _extract_filters(self, query_text: str) -> Dict[str, Any]:
+    def _extract_filters(self, query_text: str, matches: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Extract filter conditions from the query.
+        Extract filter conditions from the query and its keyword matches.
         """
         filters = {}
         
-        # TODO: Extract ledger filter using self._extract_ledger
-        ledger = self._extract_ledger(query_text)
-        if ledger:
-            filters["ledger"] = ledger
+        if "ledger" in matches:
+            filters["ledger"] = matches["ledger"]
         
         # TODO: Extract date range using self._extract_date_range
-        date_range = self._extract_date_range(query_text)
+        date_range = self._extract_date_range(query_text, matches.get("period"))
         if date_range.get("date_from"):
             filters["date_from"] = date_range["date_from"]
         if date_range.get("date_to"):
@@ -156,48 +358,29 @@ class QueryTranslator:
         if vendor:
             filters["vendor"] = vendor
         
-        # TODO: Extract transaction type (credit/debit) using self._extract_transaction_type
-        txn_type = self._extract_transaction_type(query_text)
-        if txn_type:
-            filters["transaction_type"] = txn_type
+        if "transaction_type" in matches:
+            filters["transaction_type"] = matches["transaction_type"]
         
         return filters
 
-    def _extract_ledger(self, query_text: str) -> Optional[str]:
-        """
-        Extract ledger account name from query.
-        """
-        # TODO: Check for ledger keywords
-        for ledger, keywords in self.ledger_keywords.items():
-            if any(kw in query_text for kw in keywords):
-                return ledger
-        
-        # TODO: Return matched ledger or None
-        return None
-
-    def _extract_date_range(self, query_text: str) -> Dict[str, Optional[str]]:
+    def _extract_date_range(self, query_text: str, period: Optional[str] = None) -> Dict[str, Optional[str]]:
         """
-        Extract date range from query.
+        Extract date range from query, seeded by the matched time period keyword.
         """
         # TODO: Check for time period keywords (this month, Q2 2024, etc.)
-        today = datetime.utcnow()
-        
-        for period, days in self.time_keywords.items():
-            if period in query_text:
-                date_from = (today - timedelta(days=days)).strftime("%Y-%m-%d")
-                date_to = today.strftime("%Y-%m-%d")
-                return {"date_from": date_from, "date_to": date_to}
+        if period is not None:
+            date_from, date_to = self._period_ranges()[period]
+            return {"date_from": date_from, "date_to": date_to}
         
         # TODO: Check for explicit dates (2024-01-15, Jan 15 2024, etc.)
         # Check for year patterns (2024, 2023, etc.)
-        year_match = re.search(r'\b(20\d{2})\b', query_text)
+        year_match = _YEAR_RE.search(query_text)
         if year_match:
             year = year_match.group(1)
             
             # Check for quarter (Q1, Q2, Q3, Q4)
-            quarter_match = re.search(r'q([1-4])', query_text)
-            if quarter_match:
-                q = int(quarter_match.group(1))
+            q = _find_quarter(query_text)
+            if q is not None:
                 month_start = (q - 1) * 3 + 1
                 month_end = q * 3
                 return {
@@ -212,6 +395,22 @@ class QueryTranslator:
         # TODO: Return dict with date_from and date_to
         return {"date_from": None, "date_to": None}
 
+    def _period_ranges(self) -> Dict[str, Tuple[str, str]]:
+        """
+        Return (date_from, date_to) ISO strings for every time period keyword.
+        
+        The table is rebuilt only when the cached date rolls over, so matching
+        a period is a dict lookup rather than date arithmetic and formatting.
+        """
+        today, today_iso = _today()
+        if self._period_iso_day != today_iso:
+            self._period_iso = {
+                period: ((today - timedelta(days=days)).isoformat(), today_iso)
+                for period, days in self.time_keywords.items()
+            }
+            self._period_iso_day = today_iso
+        return self._period_iso
+
     def _extract_amount_range(self, query_text: str) -> Dict[str, Optional[float]]:
         """
         Extract amount range from query.
@@ -220,21 +419,16 @@ class QueryTranslator:
         amount_min = None
         amount_max = None
         
-        # Above/greater than pattern
-        above_match = re.search(r'(?:above|greater than|more than|over)\s+([\d,]+)', query_text)
-        if above_match:
-            amount_min = float(above_match.group(1).replace(',', ''))
-        
-        # Below/less than pattern
-        below_match = re.search(r'(?:below|less than|under)\s+([\d,]+)', query_text)
-        if below_match:
-            amount_max = float(below_match.group(1).replace(',', ''))
-        
-        # Between pattern
-        between_match = re.search(r'between\s+([\d,]+)\s+and\s+([\d,]+)', query_text)
-        if between_match:
-            amount_min = float(between_match.group(1).replace(',', ''))
-            amount_max = float(between_match.group(2).replace(',', ''))
+        for match in _AMOUNT_RE.finditer(query_text):
+            if match.group("v3") is not None:
+                # Between pattern takes precedence over separate bounds
+                amount_min = float(match.group("v3").replace(',', ''))
+                amount_max = float(match.group("v4").replace(',', ''))
+                break
+            if match.group("above") and amount_min is None:
+                amount_min = float(match.group("v1").replace(',', ''))
+            elif match.group("below") and amount_max is None:
+                amount_max = float(match.group("v2").replace(',', ''))
         
         # TODO: Parse amount values
         # TODO: Return dict with amount_min and amount_max
@@ -245,106 +439,90 @@ class QueryTranslator:
         Extract vendor name from query.
         """
         # TODO: Look for patterns like "to [vendor]", "from [vendor]", "vendor [name]"
-        patterns = [
-            r'to\s+([A-Z][A-Za-z\s]+?)(?:\s|$)',
-            r'from\s+([A-Z][A-Za-z\s]+?)(?:\s|$)',
-            r'vendor\s+([A-Z][A-Za-z\s]+?)(?:\s|$)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, query_text, re.IGNORECASE)
+        for pattern in _VENDOR_RES:
+            match = pattern.search(query_text)
             if match:
-                vendor = match.group(1).strip()
                 # TODO: Extract vendor name
                 # TODO: Return vendor or None
-                return vendor
+                return match.group(1).strip()
         
         return None
 
-    def _extract_transaction_type(self, query_text: str) -> Optional[str]:
-        """
-        Extract transaction type (credit/debit) from query.
+    def _generate_sql_fragments(self, filters: Dict[str, Any]) -> Tuple[List["SafeFragment"], List[Any]]:
         """
-        # TODO: Check for keywords like "expense", "payment" (debit) or "income", "receipt" (credit)
-        debit_keywords = ["expense", "payment", "paid", "debit", "purchase"]
-        credit_keywords = ["income", "receipt", "received", "credit", "revenue"]
+        Generate parameterized SQL WHERE clause fragments from filters.
         
-        if any(kw in query_text for kw in debit_keywords):
-            return "debit"
-        elif any(kw in query_text for kw in credit_keywords):
-            return "credit"
-        
-        # TODO: Return transaction type or None
-        return None
-
-    def _generate_sql_fragments(self, filters: Dict[str, Any]) -> List[str]:
-        """
-        Generate SQL WHERE clause fragments from filters.
+        Values are never interpolated; each fragment uses a numbered
+        placeholder ($1, $2, ...) bound from the returned params list, so the
+        driver can reuse one prepared plan per query shape.
         """
         # TODO: Convert filters to SQL fragments
-        fragments = []
+        fragments: List[SafeFragment] = []
+        params: List[Any] = []
+        
+        def add(clause: str, value: Any) -> None:
+            params.append(value)
+            fragments.append(SafeFragment(clause.format(f"${len(params)}")))
         
         if "ledger" in filters:
-            fragments.append(f"ledger = '{filters['ledger']}'")
+            add("ledger = {}", filters["ledger"])
         
         if "date_from" in filters:
-            fragments.append(f"date >= '{filters['date_from']}'")
+            add("date >= {}", filters["date_from"])
         
         if "date_to" in filters:
-            fragments.append(f"date <= '{filters['date_to']}'")
+            add("date <= {}", filters["date_to"])
         
         if "amount_min" in filters:
-            fragments.append(f"amount >= {filters['amount_min']}")
+            add("amount >= {}", filters["amount_min"])
         
         if "amount_max" in filters:
-            fragments.append(f"amount <= {filters['amount_max']}")
+            add("amount <= {}", filters["amount_max"])
         
         if "vendor" in filters:
-            fragments.append(f"vendor ILIKE '%{filters['vendor']}%'")
+            add("vendor ILIKE {}", f"%{filters['vendor']}%")
         
         if "transaction_type" in filters:
-            fragments.append(f"transaction_type = '{filters['transaction_type']}'")
+            add("transaction_type = {}", filters["transaction_type"])
         
-        # TODO: Handle date ranges, amount ranges, string matching
-        # TODO: Return list of SQL fragments
-        return fragments
+        return fragments, params
 
-    def _build_entity_map(self, query_text: str) -> Dict[str, str]:
+    def _build_entity_map(self, filters: Dict[str, Any]) -> Dict[str, str]:
         """
         Build a map of entities mentioned in the query.
         """
         # TODO: Extract named entities (vendors, clients, ledgers)
         entity_map = {}
         
-        ledger = self._extract_ledger(query_text)
-        if ledger:
-            entity_map["ledger"] = ledger
+        if "ledger" in filters:
+            entity_map["ledger"] = filters["ledger"]
         
-        vendor = self._extract_vendor(query_text)
-        if vendor:
-            entity_map["vendor"] = vendor
+        if "vendor" in filters:
+            entity_map["vendor"] = filters["vendor"]
         
         # TODO: Return entity map
         return entity_map
 
-    def _create_retrieval_params(self, query_text: str, filters: Dict[str, Any]) -> Dict[str, Any]:
+    def _create_retrieval_params(
+        self, query_text: str, filters: Dict[str, Any], matches: Dict[str, Any]
+    ) -> Dict[str, Any]:
         """
         Create parameters for RAG retrieval based on query context.
         """
         # TODO: Determine retrieval strategy based on query type
-        params = {
-            "top_k": 5,
-            "metadata_filters": {},
-            "query_text": query_text
-        }
-        
         # TODO: Set top_k based on query complexity
-        if "compliance" in query_text or "gst" in query_text or "tds" in query_text:
-            params["top_k"] = 10  # More context for compliance queries
-        
         # TODO: Add metadata filters for RAG
+        # Most queries carry no ledger, so they share one read-only empty filter map
         if "ledger" in filters:
-            params["metadata_filters"]["ledger"] = filters["ledger"]
+            metadata_filters = MappingProxyType({"ledger": filters["ledger"]})
+        else:
+            metadata_filters = _NO_METADATA_FILTERS
+        
+        params = {
+            "top_k": COMPLIANCE_TOP_K if matches.get("compliance") else DEFAULT_TOP_K,
+            "metadata_filters": metadata_filters,
+            "query_text": query_text
+        }
         
         # TODO: Return retrieval params
         return params
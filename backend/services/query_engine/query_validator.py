@@ -1,9 +1,48 @@
 # backend/services/query_engine/query_validator.py
 
-from typing import Dict, Any, List, Optional
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Pattern, Tuple
 import re
-from datetime import datetime
+from datetime import date
+from functools import lru_cache
 from backend.utils.logger import logger
+from backend.services.query_engine.query_translator import SafeFragment
+
+VALIDATION_CACHE_SIZE = 4096
+
+_CITATION_RE = re.compile(
+    r"(Section \d+[A-Z]*|Rule \d+|Act \d{4}|Notification \d+|Article \d+)", re.IGNORECASE
+)
+# Slang, multiple exclamation marks and casual contractions in one alternation
+_INFORMAL_RE = re.compile(r"\b(lol|omg|dude|bro|idk|tbh)\b|(!{2,})|\b(gonna|wanna)\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=128)
+def _context_citations(law_context: Tuple[str, ...]) -> FrozenSet[str]:
+    """
+    Return the lowercased citations found in a law context.
+    
+    Responses for the same retrieval share one context, so the corpus is
+    joined and scanned once. Each grounding check is then a set lookup,
+    independent of the context size.
+    """
+    return frozenset(c.lower() for c in _CITATION_RE.findall(" ".join(law_context)))
+
+
+def _parse_iso_date(value: Any) -> Optional[date]:
+    """
+    Parse a strict YYYY-MM-DD string (or pass through a date), else None.
+    
+    date.fromisoformat is C-implemented and also rejects impossible dates such
+    as 2024-02-30. The round-trip check refuses the other ISO forms it accepts
+    on newer Pythons (20240101, 2024-W01-1).
+    """
+    if isinstance(value, date):
+        return value
+    try:
+        parsed = date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.isoformat() == value else None
 
 
 class QueryValidator:
@@ -20,15 +59,36 @@ class QueryValidator:
     Critical for production safety in a financial compliance application.
     """
 
+    __slots__ = (
+        "sql_injection_patterns", "_sql_injection_re", "_danger_re",
+        "citation_pattern", "informal_pattern",
+        "_validate_query_cached", "_validate_filters_cached"
+    )
+
     def __init__(self) -> None:
         # TODO: Initialize validation rules and patterns
         self._init_validation_patterns()
+        # Validation is a pure function of its input, so repeat traffic is a cache hit
+        self._validate_query_cached = lru_cache(maxsize=VALIDATION_CACHE_SIZE)(self._validate_query_impl)
+        self._validate_filters_cached = lru_cache(maxsize=VALIDATION_CACHE_SIZE)(self._validate_filters_impl)
         logger.info("QueryValidator initialized")
 
     def validate_query(self, query_text: str) -> Dict[str, Any]:
         """
         Validate a natural language query before processing.
         """
+        is_valid, errors, warnings, sanitized_query = self._validate_query_cached(query_text)
+        return {
+            "is_valid": is_valid,
+            "errors": list(errors),
+            "warnings": list(warnings),
+            "sanitized_query": sanitized_query
+        }
+
+    def _validate_query_impl(self, query_text: str) -> Tuple[bool, Tuple[str, ...], Tuple[str, ...], str]:
+        """
+        Run the query checks and return an immutable, cacheable result.
+        """
         errors = []
         warnings = []
         
@@ -46,26 +106,51 @@ class QueryValidator:
             errors.append("Query exceeds maximum length of 500 characters")
             
         # TODO: Check for suspicious patterns (SQL keywords, script tags)
-        for pattern in self.sql_injection_patterns:
-            if re.search(pattern, sanitized_query, re.IGNORECASE):
-                warnings.append("Query contains suspicious SQL-like patterns")
+        # One scan classifies every hit: script tags are errors, SQL-like text a warning
+        has_script = has_sql = False
+        for match in self._danger_re.finditer(sanitized_query):
+            if match.group("script"):
+                has_script = True
+            else:
+                has_sql = True
+            if has_script and has_sql:
                 break
-                
-        if "<script>" in sanitized_query.lower():
+        
+        if has_sql:
+            warnings.append("Query contains suspicious SQL-like patterns")
+        if has_script:
             errors.append("Query contains potentially malicious script tags")
             
+        # TODO: Return validation result
+        return not errors, tuple(errors), tuple(warnings), sanitized_query
+
+    def validate_filters(self, filters: Mapping[str, Any]) -> Dict[str, Any]:
+        """
+        Validate extracted filters for correctness and security.
+        """
+        # Canonical, order-independent key; filters holding unhashable values skip the cache
+        items = tuple(sorted(filters.items()))
+        try:
+            hash(items)
+        except TypeError:
+            errors, warnings = self._validate_filters_impl(items)
+        else:
+            errors, warnings = self._validate_filters_cached(items)
+        
         # TODO: Return validation result
         return {
-            "is_valid": len(errors) == 0,
-            "errors": errors,
-            "warnings": warnings,
-            "sanitized_query": sanitized_query
+            "is_valid": not errors,
+            "errors": list(errors),
+            "warnings": list(warnings)
         }
 
-    def validate_filters(self, filters: Dict[str, Any]) -> Dict[str, Any]:
+    def _validate_filters_impl(
+        self, items: Tuple[Tuple[str, Any], ...]
+    ) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
         """
-        Validate extracted filters for correctness and security.
+        Run the filter checks over canonical (key, value) pairs.
         """
+        filters = dict(items)
         errors = []
         warnings = []
         
@@ -78,7 +163,7 @@ class QueryValidator:
         errors.extend(amount_errors)
         
         # TODO: Validate string filters using self._validate_string_filter
-        for key, value in filters.items():
+        for key, value in items:
             if isinstance(value, str) and key not in ["date_from", "date_to"]:
                 string_errors = self._validate_string_filter(key, value)
                 errors.extend(string_errors)
@@ -86,12 +171,7 @@ class QueryValidator:
         # TODO: Check for logical inconsistencies
         # (Already handled partially in range checks)
         
-        # TODO: Return validation result
-        return {
-            "is_valid": len(errors) == 0,
-            "errors": errors,
-            "warnings": warnings
-        }
+        return tuple(errors), tuple(warnings)
 
     def validate_sql_fragment(self, sql_fragment: str) -> Dict[str, Any]:
         """
@@ -105,9 +185,13 @@ class QueryValidator:
         # TODO: Check for union attacks
         # TODO: Validate parameterization
         
-        for pattern in self.sql_injection_patterns:
-            if re.search(pattern, sql_fragment, re.IGNORECASE):
-                errors.append(f"SQL fragment contains dangerous pattern: {pattern}")
+        # Translator output holds only placeholders; the values travel as bound params
+        if isinstance(sql_fragment, SafeFragment):
+            return {"is_valid": True, "errors": errors, "warnings": warnings}
+        
+        match = self._sql_injection_re.search(sql_fragment)
+        if match:
+            errors.append(f"SQL fragment contains dangerous pattern: {match.group(0)}")
         
         # TODO: Return validation result
         return {
@@ -158,26 +242,27 @@ class QueryValidator:
         Initialize regex patterns for validation.
         """
         # TODO: Define SQL injection patterns
-        self.sql_injection_patterns = [
+        self.sql_injection_patterns: List[str] = [
             r"(\bDROP\b|\bDELETE\b|\bUPDATE\b|\bINSERT\b|\bALTER\b|\bTRUNCATE\b)",
             r"(--|\/\*|\*\/)",
-            r"(\bUNION\b.*\bSELECT\b)",
+            r"(\bUNION\b(?=.*\bSELECT\b))",  # Lookahead so a match never swallows later text
             r"(\bEXEC\b|\bEXECUTE\b)",
             r";"  # Statement chaining
         ]
-        
-        # TODO: Define date format patterns
-        self.date_pattern = r"^\d{4}-\d{2}-\d{2}$"
+        # All patterns in one alternation so each check is a single scan
+        self._sql_injection_re: Pattern[str] = re.compile(
+            "(" + ")|(".join(self.sql_injection_patterns) + ")", re.IGNORECASE
+        )
+        # The same patterns fused with the script-tag check for validate_query
+        self._danger_re: Pattern[str] = re.compile(
+            r"(?P<script><script>)|" + self._sql_injection_re.pattern, re.IGNORECASE
+        )
         
         # TODO: Define citation patterns
-        self.citation_pattern = r"(Section \d+[A-Z]*|Rule \d+|Act \d{4}|Notification \d+|Article \d+)"
+        self.citation_pattern: Pattern[str] = _CITATION_RE
         
         # Informal language patterns
-        self.informal_patterns = [
-            r"\b(lol|omg|dude|bro|idk|tbh)\b",
-            r"(!{2,})",  # Multiple exclamation marks
-            r"\b(gonna|wanna)\b"
-        ]
+        self.informal_pattern: Pattern[str] = _INFORMAL_RE
 
     def _validate_date_range(self, date_from: Optional[str], date_to: Optional[str]) -> List[str]:
         """
@@ -185,31 +270,26 @@ class QueryValidator:
         """
         errors = []
         
-        # TODO: Check date format using regex
-        if date_from and not re.match(self.date_pattern, date_from):
+        # TODO: Check date format
+        d_from = _parse_iso_date(date_from) if date_from else None
+        d_to = _parse_iso_date(date_to) if date_to else None
+        if date_from and d_from is None:
             errors.append(f"Invalid date_from format: {date_from}. Expected YYYY-MM-DD.")
-        if date_to and not re.match(self.date_pattern, date_to):
+        if date_to and d_to is None:
             errors.append(f"Invalid date_to format: {date_to}. Expected YYYY-MM-DD.")
             
         # TODO: Parse dates and check if date_from <= date_to
-        if date_from and date_to and not errors:
-            try:
-                d_from = datetime.strptime(date_from, "%Y-%m-%d")
-                d_to = datetime.strptime(date_to, "%Y-%m-%d")
-                
-                if d_from > d_to:
-                    errors.append("date_from cannot be later than date_to")
-                
-                # TODO: Check for unreasonable date ranges (e.g., future dates, dates before 1900)
-                if d_from.year < 1900 or d_to.year < 1900:
-                    errors.append("Dates cannot be before year 1900")
-                
-                # Future date check (optional, depending on context, but usually queries are historical)
-                # if d_from > datetime.now() + timedelta(days=365):
-                #     errors.append("Date is too far in the future")
-                    
-            except ValueError:
-                errors.append("Invalid date value")
+        if d_from and d_to:
+            if d_from > d_to:
+                errors.append("date_from cannot be later than date_to")
+            
+            # TODO: Check for unreasonable date ranges (e.g., future dates, dates before 1900)
+            if d_from.year < 1900 or d_to.year < 1900:
+                errors.append("Dates cannot be before year 1900")
+            
+            # Future date check (optional, depending on context, but usually queries are historical)
+            # if d_from > date.today() + timedelta(days=365):
+            #     errors.append("Date is too far in the future")
                 
         # TODO: Return errors
         return errors
@@ -256,10 +336,8 @@ class QueryValidator:
             
         # TODO: Check for SQL injection patterns
         # TODO: Check for script tags and XSS attempts
-        for pattern in self.sql_injection_patterns:
-            if re.search(pattern, value, re.IGNORECASE):
-                errors.append(f"Value for {field_name} contains suspicious patterns")
-                break
+        if self._sql_injection_re.search(value):
+            errors.append(f"Value for {field_name} contains suspicious patterns")
                 
         if "<script>" in value.lower():
             errors.append(f"Value for {field_name} contains malicious content")
@@ -272,13 +350,18 @@ class QueryValidator:
         Check if response contains proper citations.
         """
         # TODO: Use regex to find citation patterns
-        citations = re.findall(self.citation_pattern, response, re.IGNORECASE)
+        citations = self.citation_pattern.findall(response)
         
         # TODO: Extract citation strings
+        # Unique citations in order of first mention, ignoring case; keeps output deterministic
+        unique: Dict[str, str] = {}
+        for citation in citations:
+            unique.setdefault(citation.lower(), citation)
+        
         # TODO: Return dict with has_citations and citations list
         return {
-            "has_citations": len(citations) > 0,
-            "citations": list(set(citations))  # Unique citations
+            "has_citations": bool(unique),
+            "citations": list(unique.values())
         }
 
     def _check_professional_tone(self, response: str) -> List[str]:
@@ -288,10 +371,8 @@ class QueryValidator:
         warnings = []
         
         # TODO: Check for informal language (slang, emojis, etc.)
-        for pattern in self.informal_patterns:
-            if re.search(pattern, response, re.IGNORECASE):
-                warnings.append("Response contains informal language")
-                break
+        if self.informal_pattern.search(response):
+            warnings.append("Response contains informal language")
         
         # TODO: Check for overly casual phrases
         # TODO: Check for absolute statements without qualifiers
@@ -307,16 +388,12 @@ class QueryValidator:
         hallucinated = []
         
         # TODO: For each citation, check if it appears in law_context
-        context_text = " ".join(law_context).lower()
+        # The context's citations are extracted once per distinct context and reused
+        context_citations = _context_citations(tuple(law_context))
         
         for citation in citations:
-            # Simple containment check
             # Normalize citation for comparison
-            normalized_citation = citation.lower()
-            
-            # Check if the citation (or a reasonable part of it) exists in context
-            # This is a heuristic; exact matching might be too strict
-            if normalized_citation not in context_text:
+            if citation.lower() not in context_citations:
                 hallucinated.append(citation)
                 
         # TODO: Flag citations not found in law_context as hallucinated
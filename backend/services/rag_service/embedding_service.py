@@ -1,11 +1,111 @@
 # backend/services/rag_service/embedding_service.py
 
-from typing import List
-import os
-import time
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import base64
+import hashlib
+import threading
+from functools import lru_cache
+import numpy as np
+from cachetools import LRUCache
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from backend.utils.cache import cache_get, cache_set, acache_get, acache_set
 from backend.utils.logger import logger
 from backend.config import settings
-# import openai  # USER INPUT REQUIRED: Install 'openai' package: pip install openai
+
+try:
+    from openai import OpenAI, AsyncOpenAI, RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
+    # Transient failures worth retrying; bad requests and auth errors fail immediately
+    _RETRIABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+except ImportError:  # openai is optional; embeddings fall back to zero-vectors
+    OpenAI = AsyncOpenAI = None
+    _RETRIABLE_ERRORS = ()
+
+# Provider limit on inputs per embeddings request
+EMBEDDING_BATCH_SIZE = 2048
+# Sub-batches in flight at once; keeps bulk indexing under the rate limit
+EMBEDDING_CONCURRENCY = 5
+EMBEDDING_RETRY_MAX_WAIT = 60
+
+# Identical texts embed identically: single embeddings are cached by content hash,
+# in-process and (when configured) in Redis so every worker shares them
+EMBEDDING_CACHE_TTL = 86400
+_local_embedding_cache: LRUCache = LRUCache(maxsize=4096)
+_local_embedding_cache_lock = threading.Lock()
+
+_exponential_wait = wait_exponential(multiplier=1, max=EMBEDDING_RETRY_MAX_WAIT)
+
+
+def _wait_retry_after(retry_state) -> float:
+    """
+    Honour the provider's Retry-After header on rate limits, else back off exponentially.
+    """
+    response = getattr(retry_state.outcome.exception(), "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return min(float(retry_after), EMBEDDING_RETRY_MAX_WAIT)
+    except (TypeError, ValueError):
+        return _exponential_wait(retry_state)
+
+
+def _log_retry(retry_state) -> None:
+    logger.warning(
+        f"Embedding request failed (attempt {retry_state.attempt_number}), retrying: "
+        f"{retry_state.outcome.exception()}"
+    )
+
+
+_embedding_retry = retry(
+    stop=stop_after_attempt(5),
+    wait=_wait_retry_after,
+    retry=retry_if_exception_type(_RETRIABLE_ERRORS),
+    before_sleep=_log_retry,
+    reraise=True
+)
+
+
+@lru_cache(maxsize=4)
+def _get_openai_clients(api_key: str) -> tuple:
+    """Return (sync, async) OpenAI clients for a key, built once per process."""
+    # Retries are handled by _embedding_retry, so the SDK's own retries are disabled
+    return OpenAI(api_key=api_key, max_retries=0), AsyncOpenAI(api_key=api_key, max_retries=0)
+
+
+def embedding_to_bytes(embedding: List[float]) -> bytes:
+    """
+    Pack an embedding as float16 for persistent caches (2 bytes per dimension).
+    """
+    return np.asarray(embedding, dtype=np.float16).tobytes()
+
+
+def embedding_from_bytes(data: bytes) -> np.ndarray:
+    """
+    Unpack an embedding written by embedding_to_bytes as float32.
+    """
+    return np.frombuffer(data, dtype=np.float16).astype(np.float32)
+
+
+def _dedupe_texts(texts: List[str]) -> Tuple[List[str], List[int]]:
+    """
+    Return the distinct texts in first-seen order and, for each input, its
+    position among them, so repeated chunks are embedded (and billed) once.
+    """
+    positions: Dict[str, int] = {}
+    index_map = [positions.setdefault(text, len(positions)) for text in texts]
+    return list(positions), index_map
+
+
+def _length_sorted_batches(texts: List[str]) -> List[List[int]]:
+    """
+    Split text indices into provider-sized batches of similar length.
+
+    Sorting by length keeps each request uniformly sized, so no single batch
+    of long documents straggles behind the rest.
+    """
+    # Empty texts are rejected by the provider; callers keep zero-vectors for them
+    order = sorted((i for i, text in enumerate(texts) if text), key=lambda i: len(texts[i]))
+    return [order[start:start + EMBEDDING_BATCH_SIZE] for start in range(0, len(order), EMBEDDING_BATCH_SIZE)]
+
 
 class EmbeddingService:
     """
@@ -15,11 +115,12 @@ class EmbeddingService:
     def __init__(self) -> None:
         self.api_key = settings.OPENAI_API_KEY
         self.model = settings.OPENAI_EMBEDDING_MODEL
-        
-        if self.api_key:
-            # openai.api_key = self.api_key
+
+        if self.api_key and OpenAI:
+            self._client, self._aclient = _get_openai_clients(self.api_key)
             logger.info(f"EmbeddingService initialized with model: {self.model}")
         else:
+            self._client = self._aclient = None
             logger.warning("EmbeddingService initialized WITHOUT API KEY. Embeddings will be zero-vectors.")
 
     def generate_embedding(self, text: str) -> List[float]:
@@ -28,49 +129,212 @@ class EmbeddingService:
         """
         if not text:
             return [0.0] * 1536
-            
-        if not self.api_key:
+
+        if not self._client:
             logger.warning("OPENAI_API_KEY not set. Returning dummy embedding.")
             return [0.0] * 1536
 
         try:
             # Clean text
             text = text.replace("\n", " ")
-            
-            # USER INPUT REQUIRED: Uncomment the following lines after installing openai package
-            # response = openai.Embedding.create(input=text, model=self.model)
-            # return response['data'][0]['embedding']
-            
-            # Placeholder for now until package is installed and key provided
+
+            cache_key = self._embedding_cache_key(text)
+            cached = self._get_cached_embedding(cache_key)
+            if cached is not None:
+                return cached
+
+            embedding = self._embed_batch([text])[0]
+            self._set_cached_embedding(cache_key, embedding)
+            return embedding
+
+        except Exception as e:
+            logger.error(f"Failed to generate embedding: {e}")
             return [0.0] * 1536
-            
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """
+        Async version of generate_embedding, for request handlers.
+        """
+        if not text:
+            return [0.0] * 1536
+
+        if not self._aclient:
+            logger.warning("OPENAI_API_KEY not set. Returning dummy embedding.")
+            return [0.0] * 1536
+
+        try:
+            # Clean text
+            text = text.replace("\n", " ")
+
+            cache_key = self._embedding_cache_key(text)
+            cached = await self._aget_cached_embedding(cache_key)
+            if cached is not None:
+                return cached
+
+            embedding = (await self._aembed_batch([text]))[0]
+            await self._aset_cached_embedding(cache_key, embedding)
+            return embedding
+
         except Exception as e:
             logger.error(f"Failed to generate embedding: {e}")
             return [0.0] * 1536
 
-    def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+    def generate_embeddings_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
         """
         Generate embeddings for multiple texts in batch.
+
+        Sync callers get sequential provider-sized requests; async callers
+        should use aembed_documents, which sends them concurrently.
+
+        A text whose request still fails after retries gets None instead of a
+        vector, so indexers can skip it rather than store a zero-vector.
         """
         if not texts:
             return []
-            
-        if not self.api_key:
+
+        if not self._client:
             return [[0.0] * 1536 for _ in texts]
 
         try:
             cleaned_texts = [t.replace("\n", " ") for t in texts]
-            
-            # USER INPUT REQUIRED: Uncomment the following lines after installing openai package
-            # response = openai.Embedding.create(input=cleaned_texts, model=self.model)
-            # return [item['embedding'] for item in response['data']]
-            
-            return [[0.0] * 1536 for _ in texts]
-            
+            # Overlapping crawler chunks repeat verbatim; embed each distinct text once
+            unique_texts, index_map = _dedupe_texts(cleaned_texts)
+            embeddings = [None if t else [0.0] * 1536 for t in unique_texts]
+
+            for batch in _length_sorted_batches(unique_texts):
+                try:
+                    vectors = self._embed_batch([unique_texts[i] for i in batch])
+                except Exception as e:
+                    logger.error(f"Failed to embed a batch of {len(batch)} texts: {e}")
+                    continue
+                for i, vector in zip(batch, vectors):
+                    embeddings[i] = vector
+
+            return [embeddings[i] for i in index_map]
+
         except Exception as e:
             logger.error(f"Failed to generate batch embeddings: {e}")
+            return [None for _ in texts]
+
+    async def aembed_documents(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Generate embeddings for many texts with concurrent sub-batch requests.
+
+        Texts are split into provider-sized batches of similar length and sent
+        with at most EMBEDDING_CONCURRENCY requests in flight, so bulk indexing
+        costs about ceil(batches / concurrency) round trips instead of one per
+        batch. Results come back in input order, with None for texts whose
+        request still failed after retries (see generate_embeddings_batch).
+        """
+        if not texts:
+            return []
+
+        if not self._aclient:
             return [[0.0] * 1536 for _ in texts]
 
+        try:
+            cleaned_texts = [t.replace("\n", " ") for t in texts]
+            unique_texts, index_map = _dedupe_texts(cleaned_texts)
+            batches = _length_sorted_batches(unique_texts)
+            semaphore = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+
+            async def embed(batch: List[int]) -> List[Optional[List[float]]]:
+                async with semaphore:
+                    try:
+                        return await self._aembed_batch([unique_texts[i] for i in batch])
+                    except Exception as e:
+                        logger.error(f"Failed to embed a batch of {len(batch)} texts: {e}")
+                        return [None] * len(batch)
+
+            results = await asyncio.gather(*(embed(batch) for batch in batches))
+
+            embeddings = [None if t else [0.0] * 1536 for t in unique_texts]
+            for batch, vectors in zip(batches, results):
+                for i, vector in zip(batch, vectors):
+                    embeddings[i] = vector
+
+            return [embeddings[i] for i in index_map]
+
+        except Exception as e:
+            logger.error(f"Failed to generate batch embeddings: {e}")
+            return [None for _ in texts]
+
+    def _embedding_cache_key(self, text: str) -> str:
+        """
+        Hash the model and text into a cache key.
+        """
+        return f"embedding:f16:{hashlib.sha256(f'{self.model}:{text}'.encode()).hexdigest()}"
+
+    def _get_cached_embedding(self, cache_key: str) -> Optional[List[float]]:
+        """
+        Look up an embedding in the in-process cache, then in Redis.
+        """
+        cached = self._get_local_embedding(cache_key)
+        if cached is not None:
+            return cached
+        return self._store_remote_embedding(cache_key, cache_get(cache_key))
+
+    async def _aget_cached_embedding(self, cache_key: str) -> Optional[List[float]]:
+        """
+        Async version of _get_cached_embedding, for aembed_query.
+        """
+        cached = self._get_local_embedding(cache_key)
+        if cached is not None:
+            return cached
+        return self._store_remote_embedding(cache_key, await acache_get(cache_key))
+
+    def _set_cached_embedding(self, cache_key: str, embedding: List[float]) -> None:
+        """
+        Store an embedding returned by the API.
+        """
+        cache_set(cache_key, self._set_local_embedding(cache_key, embedding), EMBEDDING_CACHE_TTL)
+
+    async def _aset_cached_embedding(self, cache_key: str, embedding: List[float]) -> None:
+        """
+        Async version of _set_cached_embedding, for aembed_query.
+        """
+        await acache_set(cache_key, self._set_local_embedding(cache_key, embedding), EMBEDDING_CACHE_TTL)
+
+    def _get_local_embedding(self, cache_key: str) -> Optional[List[float]]:
+        with _local_embedding_cache_lock:
+            cached = _local_embedding_cache.get(cache_key)
+        return cached.tolist() if cached is not None else None
+
+    def _store_remote_embedding(self, cache_key: str, encoded: Optional[str]) -> Optional[List[float]]:
+        """
+        Decode an embedding read from Redis and keep it in the in-process cache.
+        """
+        if encoded is None:
+            return None
+
+        cached = embedding_from_bytes(base64.b64decode(encoded))
+        with _local_embedding_cache_lock:
+            _local_embedding_cache[cache_key] = cached
+        return cached.tolist()
+
+    def _set_local_embedding(self, cache_key: str, embedding: List[float]) -> str:
+        """
+        Keep an embedding in the in-process cache and return its Redis encoding.
+        """
+        # float32 arrays take ~6KB per entry against ~50KB for a list of floats;
+        # callers always get a fresh list, so they cannot mutate the cached copy
+        with _local_embedding_cache_lock:
+            _local_embedding_cache[cache_key] = np.asarray(embedding, dtype=np.float32)
+        # Redis holds float16 (~4KB base64) instead of a ~30KB JSON array
+        return base64.b64encode(embedding_to_bytes(embedding)).decode()
+
+    @_embedding_retry
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed one provider-sized batch, retrying transient failures."""
+        response = self._client.embeddings.create(input=texts, model=self.model)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    @_embedding_retry
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Async version of _embed_batch."""
+        response = await self._aclient.embeddings.create(input=texts, model=self.model)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
     def get_embedding_dimension(self) -> int:
         """
         Get the dimension of the embedding vectors.
@@ -83,3 +347,11 @@ class EmbeddingService:
             return 1536
         else:
             return 1536
+
+
+@lru_cache(maxsize=1)
+def get_embedding_service() -> EmbeddingService:
+    """
+    Return the process-wide EmbeddingService, built once per process.
+    """
+    return EmbeddingService()
@@ -20,8 +20,13 @@ class PromptBuilder:
     5.  **Disclaimer**: Always imply that this is an AI-assisted interpretation and professional review is recommended for critical decisions.
     """
 
+    # Templates are f-string functions rather than str.format templates, so no
+    # format spec is parsed per request
+
     # Template for RAG queries
-    RAG_TEMPLATE = """
+    @staticmethod
+    def _rag_template(context_str: str, query: str) -> str:
+        return f"""
     Context:
     {context_str}
     
@@ -32,7 +37,9 @@ class PromptBuilder:
     """
 
     # Template for Compliance Checks
-    COMPLIANCE_TEMPLATE = """
+    @staticmethod
+    def _compliance_template(law_context: str, transaction_data: str) -> str:
+        return f"""
     You are checking for compliance violations.
     
     Rules/Laws:
@@ -60,7 +67,7 @@ class PromptBuilder:
         """
         context_str = self._format_context(retrieval_results)
         
-        return self.RAG_TEMPLATE.format(
+        return self._rag_template(
             context_str=context_str,
             query=query
         )
@@ -79,7 +86,7 @@ class PromptBuilder:
         context_str = self._format_context(law_context)
         transaction_str = str(transaction_data) # Convert dict to string representation
         
-        return self.COMPLIANCE_TEMPLATE.format(
+        return self._compliance_template(
             law_context=context_str,
             transaction_data=transaction_str
         )
@@ -88,13 +95,11 @@ class PromptBuilder:
         """
         Formats retrieved results into a single context string with metadata.
         """
-        context_parts = []
-        for i, res in enumerate(results, 1):
-            # Include source metadata for citation
-            source_info = f"[Source {i}: {res.metadata.get('source', 'Unknown')} - {res.metadata.get('section', '')}]"
-            context_parts.append(f"{source_info}\n{res.text}")
-            
-        return "\n\n".join(context_parts)
+        # One f-string per source, joined once; the source label is used for citation
+        return "\n\n".join(
+            f"[Source {i}: {res.source or 'Unknown'}]\n{res.chunk_text}"
+            for i, res in enumerate(results, 1)
+        )
 
     def get_system_prompt(self) -> str:
         """
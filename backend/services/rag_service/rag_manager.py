@@ -1,6 +1,6 @@
 from typing import Dict, Any, List
-from backend.services.rag_service.retrieval_service import RetrievalService
-from backend.rag.vector_store import VectorStore
+from backend.services.rag_service.retrieval_service import RetrievalService, clear_retrieval_cache
+from backend.rag.vector_store import get_vector_store
 from backend.workers.law_crawler_worker import LawCrawlerWorker
 from backend.workers.scheme_crawler_worker import SchemeCrawlerWorker
 from backend.utils.logger import logger
@@ -17,8 +17,9 @@ class RAGManager:
     """
 
     def __init__(self):
-        self.retrieval_service = RetrievalService()
-        self.vector_store = VectorStore()
+        # Built per request by FastAPI, so share the process-wide store
+        self.vector_store = get_vector_store()
+        self.retrieval_service = RetrievalService(vector_store=self.vector_store)
         # Initialize workers for indexing tasks
         self.law_worker = LawCrawlerWorker()
         self.scheme_worker = SchemeCrawlerWorker()
@@ -36,6 +37,9 @@ class RAGManager:
             
             # 2. Run Scheme Crawlers
             scheme_results = await self.scheme_worker.run_scheme_crawl()
+
+            # Cached retrievals may reference replaced chunks
+            clear_retrieval_cache()
             
             return {
                 "status": "success",
@@ -54,25 +58,25 @@ class RAGManager:
         try:
             logger.info("Refreshing law data...")
             results = await self.law_worker.run_all_crawlers()
+            clear_retrieval_cache()
             return {"status": "success", "results": results}
         except Exception as e:
             logger.error(f"Law refresh failed: {e}")
             return {"status": "error", "message": str(e)}
 
-    def test_retrieval(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    async def test_retrieval(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """
         Test retrieval for a given query.
         Useful for debugging RAG performance.
         """
         try:
-            results = self.retrieval_service.retrieve_context(query, limit=top_k)
+            results = await self.retrieval_service.retrieve_context(query, limit=top_k)
             
             # Convert RetrievalResult objects to dicts for API response
             return [
                 {
-                    "text": res.text,
-                    "score": res.score,
-                    "metadata": res.metadata
+                    "chunk_text": res.chunk_text,
+                    "similarity": res.similarity
                 }
                 for res in results
             ]
@@ -84,14 +88,4 @@ class RAGManager:
         """
         Get statistics about the vector store.
         """
-        # Since VectorStore doesn't have a stats method yet, we'll implement a basic one or placeholder
-        # Ideally, VectorStore should have a `get_stats()` method.
-        # For now, we return a placeholder or call a hypothetical method if we added it.
-        
-        # Assuming we might add it later or use a direct query if we had access to the client here.
-        # But VectorStore encapsulates the client.
-        
-        return {
-            "status": "active",
-            "message": "Stats retrieval not yet implemented in VectorStore"
-        }
+        return self.vector_store.get_stats()
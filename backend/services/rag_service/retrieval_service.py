@@ -1,24 +1,47 @@
 from typing import List, Optional
-from backend.rag.vector_store import VectorStore
-from backend.services.rag_service.embedding_service import EmbeddingService
+import asyncio
+from backend.rag.vector_store import VectorStore, get_vector_store
+from backend.services.rag_service.embedding_service import EmbeddingService, get_embedding_service
+from backend.services.rag_service.semantic_cache import SemanticCache
 from backend.models.rag_models import RetrievalResult
+from backend.config import settings
 from backend.utils.logger import logger
 
+# Shared across instances: routers build a new RetrievalService per request
+_semantic_cache = SemanticCache(
+    threshold=settings.RAG_SEMANTIC_CACHE_THRESHOLD,
+    ttl=settings.RAG_SEMANTIC_CACHE_TTL,
+    max_entries=settings.RAG_SEMANTIC_CACHE_SIZE
+)
+# Caps concurrent query-embedding calls across all requests in this process
+_embedding_semaphore = asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENCY)
+
+
+def clear_retrieval_cache() -> None:
+    """Drop cached retrievals after the vector store is re-indexed."""
+    _semantic_cache.clear()
+
 class RetrievalService:
     """
     Service for retrieving relevant context from the vector store.
     Handles embedding generation for queries, vector search, and result filtering.
     """
 
-    def __init__(self):
-        self.vector_store = VectorStore()
-        self.embedding_service = EmbeddingService()
+    def __init__(
+        self,
+        vector_store: Optional[VectorStore] = None,
+        embedding_service: Optional[EmbeddingService] = None
+    ):
+        # Process-wide instances unless injected (e.g. in tests)
+        self.vector_store = vector_store or get_vector_store()
+        self.embedding_service = embedding_service or get_embedding_service()
+        self.semantic_cache = _semantic_cache
         
         # Default configuration
         self.DEFAULT_LIMIT = 5
         self.SIMILARITY_THRESHOLD = 0.75
 
-    def retrieve_context(self, query: str, limit: int = None, threshold: float = None) -> List[RetrievalResult]:
+    async def retrieve_context(self, query: str, limit: int = None, threshold: float = None) -> List[RetrievalResult]:
         """
         Retrieve relevant law/scheme chunks for a given query.
         
@@ -35,30 +58,44 @@ class RetrievalService:
             min_score = threshold or self.SIMILARITY_THRESHOLD
             
             # 1. Generate embedding for the query
-            query_embedding = self.embedding_service.generate_embedding(query)
+            async with _embedding_semaphore:
+                query_embedding = await self.embedding_service.aembed_query(query)
             
             if not query_embedding:
                 logger.warning("Failed to generate embedding for query.")
                 return []
 
-            # 2. Search vector store
-            results = self.vector_store.search(query_embedding, limit=search_limit)
-            
-            # 3. Filter by threshold
-            filtered_results = [
-                res for res in results 
-                if res.score >= min_score
-            ]
+            # Near-duplicate queries reuse an earlier search with the same parameters
+            cache_key = (search_limit, min_score)
+            cached = self.semantic_cache.get(query_embedding, cache_key)
+            if cached is not None:
+                logger.info(f"Semantic cache hit for query: '{query}'")
+                return list(cached)
+
+            # 2. Search vector store; the threshold is applied in Postgres, so
+            # below-threshold chunks never leave the database
+            filtered_results = await asyncio.to_thread(
+                self.vector_store.search, query_embedding, top_k=search_limit, score_threshold=min_score
+            )
             
             logger.info(f"Retrieved {len(filtered_results)} chunks for query: '{query}' (Threshold: {min_score})")
             
+            self.semantic_cache.put(query_embedding, tuple(filtered_results), cache_key)
             return filtered_results
 
         except Exception as e:
             logger.error(f"Error in retrieve_context: {str(e)}")
             return []
 
-    def retrieve_for_compliance(self, transaction_desc: str, category: str = None) -> List[RetrievalResult]:
+    @property
+    def cache_hits(self) -> int:
+        return self.semantic_cache.hits
+
+    @property
+    def cache_misses(self) -> int:
+        return self.semantic_cache.misses
+
+    async def retrieve_for_compliance(self, transaction_desc: str, category: str = None) -> List[RetrievalResult]:
         """
         Specialized retrieval for compliance checking.
         Can optionally filter by category (e.g., 'GST', 'Income Tax').
@@ -76,4 +113,4 @@ class RetrievalService:
             query = f"{category} rules for {transaction_desc}"
             
         # Use a slightly lower threshold for compliance to ensure broad coverage
-        return self.retrieve_context(query, limit=5, threshold=0.70)
+        return await self.retrieve_context(query, limit=5, threshold=0.70)
@@ -0,0 +1,94 @@
+# backend/services/rag_service/semantic_cache.py
+
+from typing import Any, Hashable, List, Optional
+import threading
+import time
+import numpy as np
+
+
+class SemanticCache:
+    """
+    Cache of retrieval results keyed by query embedding similarity.
+
+    Near-duplicate questions ("GST on rent", "is GST payable on rent?") embed
+    to nearly the same vector, so a prior result whose query embedding has
+    cosine similarity >= threshold is reused instead of searching again.
+
+    Embeddings are stored L2-normalized in a fixed-size matrix, so a lookup is
+    one inner-product scan over at most max_entries rows. Entries expire after
+    ttl seconds; when the cache is full the least recently used slot is reused.
+    """
+
+    def __init__(
+        self,
+        dimension: int = 1536,
+        threshold: float = 0.85,
+        ttl: float = 300,
+        max_entries: int = 1000
+    ) -> None:
+        self.threshold = threshold
+        self.ttl = ttl
+        self._vectors = np.zeros((max_entries, dimension), dtype=np.float32)
+        self._expires = np.full(max_entries, -np.inf)
+        self._last_used = np.full(max_entries, -np.inf)
+        # Results are only shared between lookups with the same key (e.g. limit and threshold)
+        self._key_hashes = np.zeros(max_entries, dtype=np.int64)
+        self._results: List[Optional[Any]] = [None] * max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, embedding: List[float], key: Hashable = None) -> Optional[Any]:
+        """
+        Return cached results for the most similar live query, or None on a miss.
+        """
+        query = self._normalize(embedding)
+        if query is None:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            scores = self._vectors @ query
+            scores[(self._expires <= now) | (self._key_hashes != hash(key))] = -np.inf
+            best = int(np.argmax(scores))
+
+            if scores[best] >= self.threshold:
+                self._last_used[best] = now
+                self.hits += 1
+                return self._results[best]
+
+            self.misses += 1
+            return None
+
+    def put(self, embedding: List[float], results: Any, key: Hashable = None) -> None:
+        """
+        Store results for a query embedding, evicting an expired or LRU entry.
+        """
+        query = self._normalize(embedding)
+        if query is None:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            # Expired slots rank below every live one, so they are reused first
+            slot = int(np.argmin(np.where(self._expires > now, self._last_used, -np.inf)))
+            self._vectors[slot] = query
+            self._expires[slot] = now + self.ttl
+            self._last_used[slot] = now
+            self._key_hashes[slot] = hash(key)
+            self._results[slot] = results
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. after the indexed documents change."""
+        with self._lock:
+            self._expires[:] = -np.inf
+            self._last_used[:] = -np.inf
+            self._results = [None] * len(self._results)
+
+    def _normalize(self, embedding: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        # Zero-vectors (no API key, failed embedding) carry no meaning and would all match
+        if norm == 0.0 or vector.shape != self._vectors.shape[1:]:
+            return None
+        return vector / norm
@@ -1,14 +1,40 @@
 # backend/services/red_flag/anomaly_detector.py
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 from datetime import datetime
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import re
+import numpy as np
+import pandas as pd
 from backend.models.redflag_models import RedFlag
 from backend.utils.supabase_client import supabase
 from backend.utils.logger import logger
 from fastapi import HTTPException
 
+# Characters outside this set make a vendor name look unusual
+_BAD_VENDOR_RE = re.compile(r'[^a-zA-Z0-9\s.\-&]')
+# Trailing numeric part of an invoice number (e.g. "INV-2024-0042" -> "0042")
+_INV_TAIL_RE = re.compile(r'(\d+)$')
+# Longest invoice tail that still fits in int64
+_MAX_INV_DIGITS = 18
+# Rows per red_flags insert; keeps request bodies under PostgREST limits
+RED_FLAG_INSERT_BATCH_SIZE = 500
+# Rows per transactions page; PostgREST returns at most 1000 rows per request
+TRANSACTION_PAGE_SIZE = 1000
+
+# Detectors wait on Postgres or run in pandas, both of which release the GIL,
+# so threads overlap them without pickling frames into worker processes
+_detector_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="redflag")
+
+
+def _gap_starts(vendors: np.ndarray, numbers: np.ndarray) -> np.ndarray:
+    """
+    Positions i where numbers[i + 1] skips past numbers[i] + 1 for the same vendor.
+    
+    Expects rows sorted by (vendor, number).
+    """
+    return np.flatnonzero((np.diff(numbers) > 1) & (vendors[1:] == vendors[:-1]))
+
 
 class AnomalyDetectorService:
     """
@@ -34,26 +60,54 @@ class AnomalyDetectorService:
         Scan all transactions in a sheet for red flags.
         """
         try:
+            # Grouping and threshold checks run in Postgres and return only violating
+            # rows; they run while this thread pages through the transactions
+            duplicates = _detector_pool.submit(self.detect_duplicates, client_id, sheet_id)
+            round_numbers = _detector_pool.submit(self.detect_round_numbers, client_id, sheet_id)
+            
             # TODO: Fetch all transactions for the sheet
-            response = supabase.table("transactions").select("*").eq("sheet_id", sheet_id).is_("deleted_at", "null").execute()
-            transactions = response.data or []
+            # Each page becomes a typed frame right away, so raw JSON rows are
+            # only held one page at a time
+            frames = [self._to_frame(client_id, page) for page in self._iter_transaction_pages(sheet_id)]
             
-            if not transactions:
-                return []
+            df = None
+            frame_detectors = []
+            if frames:
+                # Detectors work column-wise on one shared frame
+                df = pd.concat(frames, ignore_index=True)
+                
+                # TODO: Run all detection methods
+                frame_detectors = [
+                    _detector_pool.submit(self.detect_missing_sequences, df),
+                    _detector_pool.submit(self.detect_unusual_vendors, df)
+                ]
             
             red_flags = []
-            
-            # TODO: Run all detection methods
-            red_flags.extend(self.detect_duplicates(transactions))
-            red_flags.extend(self.detect_round_numbers(transactions))
-            red_flags.extend(self.detect_missing_sequences(transactions))
-            red_flags.extend(self.detect_unusual_vendors(transactions))
+            # A database without the detector functions (see updates.sql) gets the
+            # same checks in pandas; one failing detector doesn't sink the scan
+            for future, fallback in (
+                (duplicates, self._detect_duplicates_in_frame),
+                (round_numbers, self._detect_round_numbers_in_frame)
+            ):
+                try:
+                    red_flags.extend(future.result())
+                except Exception as e:
+                    logger.warning(f"Red flag RPC failed, checking in memory instead: {e}")
+                    if df is not None:
+                        red_flags.extend(self._run_detector(fallback, df))
+            for future in frame_detectors:
+                try:
+                    red_flags.extend(future.result())
+                except Exception as e:
+                    logger.error(f"Red flag detector failed: {e}")
             
             # TODO: Aggregate and return red flags
             # Save red flags to database
-            if red_flags:
-                data_to_insert = [flag.dict(exclude={"id", "created_at"}) for flag in red_flags]
-                supabase.table("red_flags").insert(data_to_insert).execute()
+            data_to_insert = [flag.model_dump(mode="json", exclude={"id", "created_at"}) for flag in red_flags]
+            if data_to_insert:
+                for start in range(0, len(data_to_insert), RED_FLAG_INSERT_BATCH_SIZE):
+                    batch = data_to_insert[start:start + RED_FLAG_INSERT_BATCH_SIZE]
+                    supabase.table("red_flags").insert(batch).execute()
                 logger.info(f"Detected and saved {len(red_flags)} red flags for sheet {sheet_id}")
             
             return red_flags
@@ -78,7 +132,8 @@ class AnomalyDetectorService:
             response = query.execute()
             
             # TODO: Return list of RedFlag objects
-            return [RedFlag(**item) for item in response.data]
+            # Rows come from our own table, so skip re-validating each one
+            return [RedFlag.model_construct(**item) for item in response.data]
             
         except Exception as e:
             logger.error(f"Failed to list red flags: {e}")
@@ -108,164 +163,258 @@ class AnomalyDetectorService:
             logger.error(f"Failed to resolve red flag: {e}")
             raise HTTPException(status_code=500, detail=f"Resolution failed: {str(e)}")
 
-    def detect_duplicates(self, transactions: List[Dict[str, Any]]) -> List[RedFlag]:
+    def detect_duplicates(self, client_id: str, sheet_id: str) -> List[RedFlag]:
         """
         Detect duplicate transactions (same vendor, amount, date).
         """
         flags = []
         # TODO: Group transactions by (vendor, amount, date)
-        groups = defaultdict(list)
+        # TODO: Flag groups with count > 1
+        # (see detect_duplicates in schema.sql)
+        response = supabase.rpc("detect_duplicates", {"sid": sheet_id}).execute()
         
-        for txn in transactions:
-            key = (
-                txn.get("vendor", "").lower().strip(),
-                float(txn.get("amount", 0)),
-                txn.get("date", "").split("T")[0]  # Compare date only, ignore time
+        for row in response.data or []:
+            amount = float(row["amount"])
+            txn_ids = row["transaction_ids"]
+            
+            flag = RedFlag(
+                client_id=client_id,
+                transaction_id=txn_ids[0],  # Link to first transaction
+                type="duplicate_transaction",
+                severity="high",
+                description=f"Potential duplicate: {len(txn_ids)} transactions with same vendor, amount ({amount}), and date ({row['txn_date']})",
+                metadata={"duplicate_ids": txn_ids, "count": len(txn_ids)}
             )
-            groups[key].append(txn)
-        
-        # TODO: Flag groups with count > 1
-        for key, group in groups.items():
-            if len(group) > 1:
-                vendor, amount, date = key
-                txn_ids = [t["id"] for t in group]
-                
-                flag = RedFlag(
-                    client_id=group[0]["client_id"],
-                    transaction_id=group[0]["id"],  # Link to first transaction
-                    type="duplicate_transaction",
-                    severity="high",
-                    description=f"Potential duplicate: {len(group)} transactions with same vendor, amount ({amount}), and date ({date})",
-                    metadata={"duplicate_ids": txn_ids, "count": len(group)}
-                )
-                flags.append(flag)
+            flags.append(flag)
         
         # TODO: Return RedFlag objects
         return flags
 
-    def detect_round_numbers(self, transactions: List[Dict[str, Any]]) -> List[RedFlag]:
+    def detect_round_numbers(self, client_id: str, sheet_id: str) -> List[RedFlag]:
         """
         Detect suspicious round-number transactions.
         """
         flags = []
+        # TODO: Check for amounts ending in 000, 0000, etc.
+        # TODO: Flag if pattern is unusual for the vendor
+        # (Simplified check: flag all large round numbers for review)
+        response = supabase.rpc("detect_round_numbers", {
+            "sid": sheet_id,
+            "thr": self.round_number_threshold
+        }).execute()
         
-        for txn in transactions:
-            amount = float(txn.get("amount", 0))
+        for row in response.data or []:
+            amount = float(row["amount"])
             
-            # TODO: Check for amounts ending in 000, 0000, etc.
-            if amount > self.round_number_threshold and amount % 1000 == 0:
-                # TODO: Flag if pattern is unusual for the vendor
-                # (Simplified check: flag all large round numbers for review)
-                flag = RedFlag(
-                    client_id=txn["client_id"],
-                    transaction_id=txn["id"],
-                    type="round_number",
-                    severity="medium",
-                    description=f"Suspicious round number amount: {amount}",
-                    metadata={"amount": amount}
-                )
-                flags.append(flag)
+            flag = RedFlag(
+                client_id=client_id,
+                transaction_id=row["id"],
+                type="round_number",
+                severity="medium",
+                description=f"Suspicious round number amount: {amount}",
+                metadata={"amount": amount}
+            )
+            flags.append(flag)
         
         # TODO: Return RedFlag objects
         return flags
 
-    def detect_missing_sequences(self, transactions: List[Dict[str, Any]]) -> List[RedFlag]:
+    def _detect_duplicates_in_frame(self, df: pd.DataFrame) -> List[RedFlag]:
+        """
+        In-memory version of detect_duplicates, used when the RPC is unavailable.
+        """
+        flags = []
+        # Compare vendors case-insensitively and dates without the time part
+        df = df.assign(
+            vendor_key=df["vendor"].str.lower().str.strip(),
+            date_only=df["date"].fillna("").astype(str).str.slice(0, 10)
+        )
+        keys = ["vendor_key", "amount", "date_only"]
+        dups = df[df.duplicated(keys, keep=False)]
+        
+        for (vendor, amount, date), group in dups.groupby(keys, sort=False):
+            txn_ids = group["id"].tolist()
+            
+            flag = RedFlag(
+                client_id=group["client_id"].iat[0],
+                transaction_id=txn_ids[0],  # Link to first transaction
+                type="duplicate_transaction",
+                severity="high",
+                description=f"Potential duplicate: {len(group)} transactions with same vendor, amount ({amount}), and date ({date})",
+                metadata={"duplicate_ids": txn_ids, "count": len(group)}
+            )
+            flags.append(flag)
+        
+        return flags
+
+    def _detect_round_numbers_in_frame(self, df: pd.DataFrame) -> List[RedFlag]:
+        """
+        In-memory version of detect_round_numbers, used when the RPC is unavailable.
+        """
+        flags = []
+        hits = df[(df["amount"] > self.round_number_threshold) & (df["amount"] % 1000 == 0)]
+        
+        for txn_id, client_id, amount in zip(hits["id"], hits["client_id"], hits["amount"].tolist()):
+            flag = RedFlag(
+                client_id=client_id,
+                transaction_id=txn_id,
+                type="round_number",
+                severity="medium",
+                description=f"Suspicious round number amount: {amount}",
+                metadata={"amount": amount}
+            )
+            flags.append(flag)
+        
+        return flags
+
+    def _run_detector(self, detector, df: pd.DataFrame) -> List[RedFlag]:
+        """
+        Run a frame detector, logging and skipping it if it fails.
+        """
+        try:
+            return detector(df)
+        except Exception as e:
+            logger.error(f"Red flag detector failed: {e}")
+            return []
+
+    def detect_missing_sequences(self, df: pd.DataFrame) -> List[RedFlag]:
         """
         Detect missing invoice number sequences.
         """
         flags = []
-        # TODO: Group by vendor
-        vendor_invoices = defaultdict(list)
+        # Extract numeric part of invoice number
+        invoices = df[(df["vendor"] != "") & (df["invoice_number"] != "")]
+        numbers = invoices["invoice_number"].str.extract(_INV_TAIL_RE, expand=False)
+        invoices = invoices.assign(inv_num=numbers).dropna(subset=["inv_num"])
+        # Tails longer than 18 significant digits overflow int64; they are
+        # reference codes rather than a running sequence, so skip them
+        invoices = invoices[invoices["inv_num"].str.lstrip("0").str.len() <= _MAX_INV_DIGITS]
+        invoices["inv_num"] = invoices["inv_num"].astype("int64")
         
-        for txn in transactions:
-            vendor = txn.get("vendor")
-            inv_num = txn.get("invoice_number")
-            if vendor and inv_num:
-                # Extract numeric part of invoice number
-                match = re.search(r'(\d+)$', str(inv_num))
-                if match:
-                    num = int(match.group(1))
-                    vendor_invoices[vendor].append((num, txn))
+        # TODO: Group by vendor (at least 3 invoices needed to spot a gap)
+        vendor_sizes = invoices.groupby("vendor")["inv_num"].transform("size")
+        invoices = invoices[vendor_sizes >= 3].sort_values(["vendor", "inv_num"], kind="stable")
         
         # TODO: Extract invoice numbers and check for gaps
-        for vendor, items in vendor_invoices.items():
-            if len(items) < 3:
-                continue
+        numbers = invoices["inv_num"].to_numpy()
+        starts = _gap_starts(invoices["vendor"].to_numpy(), numbers)
+        gaps = invoices.iloc[starts]
+        gap_ends = numbers[starts + 1]
+        
+        for vendor, start, end, client_id, txn_id in zip(
+            gaps["vendor"], gaps["inv_num"].tolist(), gap_ends.tolist(), gaps["client_id"], gaps["id"]
+        ):
+            missing_range = f"{start+1} to {end-1}"
+            if end - start == 2:
+                missing_range = str(start+1)
                 
-            items.sort(key=lambda x: x[0])
-            numbers = [x[0] for x in items]
-            
-            # Check for gaps
-            for i in range(len(numbers) - 1):
-                if numbers[i+1] - numbers[i] > 1:
-                    missing_range = f"{numbers[i]+1} to {numbers[i+1]-1}"
-                    if numbers[i+1] - numbers[i] == 2:
-                        missing_range = str(numbers[i]+1)
-                        
-                    flag = RedFlag(
-                        client_id=items[i][1]["client_id"],
-                        transaction_id=items[i][1]["id"],
-                        type="missing_invoice_sequence",
-                        severity="medium",
-                        description=f"Missing invoice sequence for {vendor}: {missing_range}",
-                        metadata={"vendor": vendor, "gap_start": numbers[i], "gap_end": numbers[i+1]}
-                    )
-                    flags.append(flag)
+            flag = RedFlag(
+                client_id=client_id,
+                transaction_id=txn_id,
+                type="missing_invoice_sequence",
+                severity="medium",
+                description=f"Missing invoice sequence for {vendor}: {missing_range}",
+                metadata={"vendor": vendor, "gap_start": start, "gap_end": end}
+            )
+            flags.append(flag)
         
         # TODO: Return RedFlag objects
         return flags
 
-    def detect_unusual_vendors(self, transactions: List[Dict[str, Any]]) -> List[RedFlag]:
+    def detect_unusual_vendors(self, df: pd.DataFrame) -> List[RedFlag]:
         """
         Detect transactions with unusual or suspicious vendor patterns.
         """
         flags = []
-        vendor_counts = defaultdict(int)
+        vendor = df["vendor"]
+        amount = df["amount"]
+        vendor_counts = vendor.map(vendor.value_counts())
         
-        for txn in transactions:
-            vendor_counts[txn.get("vendor", "")] += 1
-            
-        for txn in transactions:
-            vendor = txn.get("vendor", "")
-            amount = float(txn.get("amount", 0))
-            
-            # TODO: Check for vendors with single transactions (if amount is high)
-            if vendor_counts[vendor] == 1 and amount > 50000:
+        # TODO: Check for vendors with single transactions (if amount is high)
+        one_time = (vendor_counts == 1) & (amount > 50000)
+        # TODO: Check for vendors with unusual naming patterns
+        # (e.g., very short names, names with special chars)
+        odd_name = (vendor.str.len() < 3) | vendor.str.contains(_BAD_VENDOR_RE)
+        # TODO: Check for missing GSTIN where required
+        # (Assuming GSTIN should be present for high value B2B transactions)
+        no_gstin = (amount > 250000) & (df["gstin"] == "")
+        
+        candidates = df[one_time | odd_name | no_gstin]
+        for txn_id, client_id, name, value, is_one_time, is_odd, is_missing in zip(
+            candidates["id"], candidates["client_id"], candidates["vendor"], candidates["amount"].tolist(),
+            one_time[candidates.index], odd_name[candidates.index], no_gstin[candidates.index]
+        ):
+            if is_one_time:
                 flag = RedFlag(
-                    client_id=txn["client_id"],
-                    transaction_id=txn["id"],
+                    client_id=client_id,
+                    transaction_id=txn_id,
                     type="one_time_vendor",
                     severity="low",
-                    description=f"High value transaction ({amount}) with one-time vendor: {vendor}",
-                    metadata={"vendor": vendor, "amount": amount}
+                    description=f"High value transaction ({value}) with one-time vendor: {name}",
+                    metadata={"vendor": name, "amount": value}
                 )
                 flags.append(flag)
             
-            # TODO: Check for vendors with unusual naming patterns
-            # (e.g., very short names, names with special chars)
-            if len(vendor) < 3 or re.search(r'[^a-zA-Z0-9\s\.\-\&]', vendor):
+            if is_odd:
                 flag = RedFlag(
-                    client_id=txn["client_id"],
-                    transaction_id=txn["id"],
+                    client_id=client_id,
+                    transaction_id=txn_id,
                     type="suspicious_vendor_name",
                     severity="medium",
-                    description=f"Unusual vendor name format: {vendor}",
-                    metadata={"vendor": vendor}
+                    description=f"Unusual vendor name format: {name}",
+                    metadata={"vendor": name}
                 )
                 flags.append(flag)
                 
-            # TODO: Check for missing GSTIN where required
-            # (Assuming GSTIN should be present for high value B2B transactions)
-            if amount > 250000 and not txn.get("gstin"):
+            if is_missing:
                 flag = RedFlag(
-                    client_id=txn["client_id"],
-                    transaction_id=txn["id"],
+                    client_id=client_id,
+                    transaction_id=txn_id,
                     type="missing_gstin",
                     severity="high",
-                    description=f"High value transaction ({amount}) missing GSTIN",
-                    metadata={"amount": amount}
+                    description=f"High value transaction ({value}) missing GSTIN",
+                    metadata={"amount": value}
                 )
                 flags.append(flag)
         
         # TODO: Return RedFlag objects
         return flags
+
+    def _iter_transaction_pages(self, sheet_id: str) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield a sheet's transactions page by page.
+        
+        A single select is silently capped at 1000 rows by PostgREST, so larger
+        sheets are read with range() pagination. Only the columns the in-memory
+        detectors read are selected.
+        """
+        offset = 0
+        while True:
+            response = supabase.table("transactions").select(
+                "id, vendor, amount, date, invoice_number, gstin"
+            ).eq("sheet_id", sheet_id).is_("deleted_at", "null").order("id").range(
+                offset, offset + TRANSACTION_PAGE_SIZE - 1
+            ).execute()
+            page = response.data or []
+            if page:
+                yield page
+            if len(page) < TRANSACTION_PAGE_SIZE:
+                return
+            offset += TRANSACTION_PAGE_SIZE
+
+    def _to_frame(self, client_id: str, transactions: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Load transactions into a DataFrame with the columns every detector reads.
+        """
+        df = pd.DataFrame(transactions)
+        # Transactions belong to a client through their sheet
+        df["client_id"] = client_id
+        for column in ("amount", "vendor", "date", "invoice_number", "gstin"):
+            if column not in df:
+                df[column] = None
+        
+        df["amount"] = pd.to_numeric(df["amount"], errors="coerce").fillna(0.0)
+        df["vendor"] = df["vendor"].fillna("").astype(str)
+        df["invoice_number"] = df["invoice_number"].fillna("").astype(str)
+        df["gstin"] = df["gstin"].fillna("").astype(str)
+        return df
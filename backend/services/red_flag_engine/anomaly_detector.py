@@ -3,8 +3,12 @@ from backend.models.redflag_models import RedFlag
 from backend.utils.supabase_client import supabase
 from backend.utils.logger import logger
 from datetime import datetime, timedelta
-from collections import defaultdict
 import uuid
+import pandas as pd
+
+# Flags per insert request; one bulk insert replaces a round trip per flag
+RED_FLAG_INSERT_BATCH_SIZE = 500
+
 
 class AnomalyDetectorService:
     """
@@ -97,13 +101,15 @@ class AnomalyDetectorService:
             response = supabase.table("transactions").select("*").eq("client_id", client_id).is_("deleted_at", "null").limit(1000).execute()
             transactions = response.data if response.data else []
             
-            flags_created = 0
+            # Run all detection methods over one frame, then save their flags together
+            df = self._to_frame(transactions)
+            flags = []
+            flags.extend(self._detect_duplicates(client_id, df))
+            flags.extend(self._detect_large_cash(client_id, df))
+            flags.extend(self._detect_round_numbers(client_id, df))
+            flags.extend(self._detect_missing_invoices(client_id, df))
             
-            # Run all detection methods
-            flags_created += self._detect_duplicates(client_id, transactions)
-            flags_created += self._detect_large_cash(client_id, transactions)
-            flags_created += self._detect_round_numbers(client_id, transactions)
-            flags_created += self._detect_missing_invoices(client_id, transactions)
+            flags_created = self._insert_flags(flags)
             
             return {
                 "client_id": client_id,
@@ -120,39 +126,23 @@ class AnomalyDetectorService:
                 "error": str(e)
             }
 
-    def _detect_duplicates(self, client_id: str, transactions: List[Dict[str, Any]]) -> int:
+    def _insert_flags(self, flags: List[Dict[str, Any]]) -> int:
         """
-        Detect duplicate transactions (same amount, vendor, and date within 24 hours).
+        Insert flags in batches and return how many were saved.
+        
+        A rejected batch (e.g. one conflicting row) is retried row by row so
+        the remaining flags in it are still saved.
         """
         flags_created = 0
         
-        # Group transactions by (amount, vendor, date)
-        txn_groups = defaultdict(list)
-        
-        for txn in transactions:
-            key = (
-                float(txn.get("amount", 0)),
-                str(txn.get("vendor", "")).lower(),
-                str(txn.get("date", ""))[:10]  # Date only (YYYY-MM-DD)
-            )
-            txn_groups[key].append(txn)
-        
-        # Find duplicates
-        for key, group in txn_groups.items():
-            if len(group) > 1:
-                # Potential duplicate
-                for txn in group:
-                    flag_data = {
-                        "id": str(uuid.uuid4()),
-                        "client_id": client_id,
-                        "transaction_id": txn.get("id"),
-                        "flag_type": "duplicate",
-                        "severity": "high",
-                        "message": f"Potential duplicate: {len(group)} transactions with same amount (₹{key[0]:,.2f}), vendor ({key[1]}), and date ({key[2]})",
-                        "resolved": False,
-                        "created_at": datetime.utcnow().isoformat()
-                    }
-                    
+        for start in range(0, len(flags), RED_FLAG_INSERT_BATCH_SIZE):
+            batch = flags[start:start + RED_FLAG_INSERT_BATCH_SIZE]
+            try:
+                supabase.table("red_flags").insert(batch).execute()
+                flags_created += len(batch)
+            except Exception as e:
+                logger.warning(f"Red flag batch insert failed, retrying row by row: {e}")
+                for flag_data in batch:
                     try:
                         supabase.table("red_flags").insert(flag_data).execute()
                         flags_created += 1
@@ -161,95 +151,112 @@ class AnomalyDetectorService:
         
         return flags_created
 
-    def _detect_large_cash(self, client_id: str, transactions: List[Dict[str, Any]]) -> int:
+    def _to_frame(self, transactions: List[Dict[str, Any]]) -> pd.DataFrame:
         """
-        Detect large cash transactions (potential Section 269ST violation).
+        Load transactions into a DataFrame with the normalized columns every detector reads.
         """
-        flags_created = 0
+        df = pd.DataFrame(transactions)
+        for column in ("id", "amount", "vendor", "date", "mode", "type", "invoice_number"):
+            if column not in df:
+                df[column] = None
         
-        for txn in transactions:
-            amount = float(txn.get("amount", 0))
-            mode = str(txn.get("mode", "")).upper()
-            
-            if mode == "CASH" and amount > self.large_cash_threshold:
-                flag_data = {
-                    "id": str(uuid.uuid4()),
-                    "client_id": client_id,
-                    "transaction_id": txn.get("id"),
-                    "flag_type": "large_cash",
-                    "severity": "high" if amount > 200000 else "medium",
-                    "message": f"Large cash transaction of ₹{amount:,.2f} detected. Section 269ST restricts cash transactions above ₹2,00,000",
-                    "resolved": False,
-                    "created_at": datetime.utcnow().isoformat()
-                }
-                
-                try:
-                    supabase.table("red_flags").insert(flag_data).execute()
-                    flags_created += 1
-                except Exception:
-                    pass
+        df["amount_f"] = pd.to_numeric(df["amount"], errors="coerce").fillna(0.0)
+        df["vendor_l"] = df["vendor"].fillna("").astype(str).str.lower()
+        df["date_only"] = df["date"].fillna("").astype(str).str[:10]  # YYYY-MM-DD
+        df["mode_u"] = df["mode"].fillna("").astype(str).str.upper()
+        return df
+
+    def _flag(
+        self,
+        client_id: str,
+        transaction_id: Any,
+        flag_type: str,
+        severity: str,
+        message: str,
+        created_at: str
+    ) -> Dict[str, Any]:
+        """Build a red_flags row."""
+        return {
+            "id": str(uuid.uuid4()),
+            "client_id": client_id,
+            "transaction_id": transaction_id,
+            "flag_type": flag_type,
+            "severity": severity,
+            "message": message,
+            "resolved": False,
+            "created_at": created_at
+        }
+
+    def _detect_duplicates(self, client_id: str, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """
+        Detect duplicate transactions (same amount, vendor, and date within 24 hours).
+        """
+        flags = []
+        created_at = datetime.utcnow().isoformat()
         
-        return flags_created
+        # Transactions sharing (amount, vendor, date) with at least one other
+        keys = ["amount_f", "vendor_l", "date_only"]
+        duplicates = df[df.duplicated(subset=keys, keep=False)]
+        
+        for (amount, vendor, date), group in duplicates.groupby(keys, sort=False):
+            # Every transaction in the group shares one message
+            message = f"Potential duplicate: {len(group)} transactions with same amount (₹{amount:,.2f}), vendor ({vendor}), and date ({date})"
+            for txn_id in group["id"]:
+                flags.append(self._flag(client_id, txn_id, "duplicate", "high", message, created_at))
+        
+        return flags
 
-    def _detect_round_numbers(self, client_id: str, transactions: List[Dict[str, Any]]) -> int:
+    def _detect_large_cash(self, client_id: str, df: pd.DataFrame) -> List[Dict[str, Any]]:
         """
-        Detect suspiciously round number transactions (potential manipulation).
+        Detect large cash transactions (potential Section 269ST violation).
         """
-        flags_created = 0
+        created_at = datetime.utcnow().isoformat()
+        large = df[(df["mode_u"] == "CASH") & (df["amount_f"] > self.large_cash_threshold)]
         
-        for txn in transactions:
-            amount = float(txn.get("amount", 0))
-            
-            # Check if amount is a round number (divisible by 10000, 50000, 100000)
-            if amount >= self.round_number_threshold:
-                if amount % 100000 == 0 or amount % 50000 == 0:
-                    flag_data = {
-                        "id": str(uuid.uuid4()),
-                        "client_id": client_id,
-                        "transaction_id": txn.get("id"),
-                        "flag_type": "round_number",
-                        "severity": "low",
-                        "message": f"Suspiciously round amount: ₹{amount:,.2f}. Verify if this is a genuine transaction.",
-                        "resolved": False,
-                        "created_at": datetime.utcnow().isoformat()
-                    }
-                    
-                    try:
-                        supabase.table("red_flags").insert(flag_data).execute()
-                        flags_created += 1
-                    except Exception:
-                        pass
+        return [
+            self._flag(
+                client_id, txn_id, "large_cash", "high" if amount > 200000 else "medium",
+                f"Large cash transaction of ₹{amount:,.2f} detected. Section 269ST restricts cash transactions above ₹2,00,000",
+                created_at
+            )
+            for txn_id, amount in zip(large["id"], large["amount_f"].tolist())
+        ]
+
+    def _detect_round_numbers(self, client_id: str, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """
+        Detect suspiciously round number transactions (potential manipulation).
+        """
+        created_at = datetime.utcnow().isoformat()
+        amount = df["amount_f"]
+        # Round multiples of ₹50,000 (which covers multiples of ₹1,00,000)
+        rounded = df[(amount >= self.round_number_threshold) & (amount % 50000 == 0)]
         
-        return flags_created
+        return [
+            self._flag(
+                client_id, txn_id, "round_number", "low",
+                f"Suspiciously round amount: ₹{value:,.2f}. Verify if this is a genuine transaction.",
+                created_at
+            )
+            for txn_id, value in zip(rounded["id"], rounded["amount_f"].tolist())
+        ]
 
-    def _detect_missing_invoices(self, client_id: str, transactions: List[Dict[str, Any]]) -> int:
+    def _detect_missing_invoices(self, client_id: str, df: pd.DataFrame) -> List[Dict[str, Any]]:
         """
         Detect expense transactions missing invoice numbers.
         """
-        flags_created = 0
+        created_at = datetime.utcnow().isoformat()
+        # Flag expenses above ₹50,000 without invoice numbers
+        missing = df[
+            (df["type"] == "debit")
+            & (df["amount_f"] > 50000)
+            & (df["invoice_number"].fillna("").astype(str) == "")
+        ]
         
-        for txn in transactions:
-            amount = float(txn.get("amount", 0))
-            invoice_number = txn.get("invoice_number")
-            txn_type = txn.get("type", "")
-            
-            # Flag expenses above ₹50,000 without invoice numbers
-            if txn_type == "debit" and amount > 50000 and not invoice_number:
-                flag_data = {
-                    "id": str(uuid.uuid4()),
-                    "client_id": client_id,
-                    "transaction_id": txn.get("id"),
-                    "flag_type": "missing_invoice",
-                    "severity": "medium",
-                    "message": f"Expense of ₹{amount:,.2f} missing invoice number. Required for audit trail.",
-                    "resolved": False,
-                    "created_at": datetime.utcnow().isoformat()
-                }
-                
-                try:
-                    supabase.table("red_flags").insert(flag_data).execute()
-                    flags_created += 1
-                except Exception:
-                    pass
-        
-        return flags_created
+        return [
+            self._flag(
+                client_id, txn_id, "missing_invoice", "medium",
+                f"Expense of ₹{amount:,.2f} missing invoice number. Required for audit trail.",
+                created_at
+            )
+            for txn_id, amount in zip(missing["id"], missing["amount_f"].tolist())
+        ]
@@ -1,9 +1,13 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
+from collections import defaultdict
 from backend.utils.supabase_client import supabase
 from backend.config import settings
 from backend.utils.logger import logger
 
+# Rows per transactions page; PostgREST returns at most 1000 rows per request
+TRANSACTION_PAGE_SIZE = 1000
+
 
 class CashTransactionChecker:
     """
@@ -20,6 +24,53 @@ class CashTransactionChecker:
         self.suspicious_threshold = 9000.0  # Just below limit - suspicious pattern
         self.large_cash_threshold = 50000.0  # Large cash transaction threshold
 
+    def _date_range(
+        self,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        days: int
+    ) -> Tuple[str, str]:
+        """
+        Fill in a missing end date with today and a missing start date with `days` ago.
+        """
+        if not end_date:
+            end_date = datetime.now().date().isoformat()
+        if not start_date:
+            start_date = (datetime.now() - timedelta(days=days)).date().isoformat()
+        return start_date, end_date
+
+    def _fetch_cash_txns(
+        self,
+        client_id: str,
+        start_date: str,
+        end_date: str,
+        debit_only: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch a client's cash transactions in a date range, oldest first.
+        
+        A single select is silently capped at 1000 rows by PostgREST, so the
+        rows are read with range() pagination.
+        """
+        transactions = []
+        offset = 0
+        while True:
+            query = supabase.table("transactions").select("*").eq(
+                "client_id", client_id
+            ).eq("mode", "CASH").gte("date", start_date).lte("date", end_date).is_(
+                "deleted_at", "null"
+            )
+            if debit_only:
+                query = query.eq("type", "debit")
+            response = query.order("date").order("id").range(
+                offset, offset + TRANSACTION_PAGE_SIZE - 1
+            ).execute()
+            page = response.data or []
+            transactions.extend(page)
+            if len(page) < TRANSACTION_PAGE_SIZE:
+                return transactions
+            offset += TRANSACTION_PAGE_SIZE
+
     def detect_large_cash_transactions(
         self, 
         client_id: str, 
@@ -38,20 +89,23 @@ class CashTransactionChecker:
             List of dictionaries containing transaction details and flags.
         """
         try:
-            # Set default date range if not provided
-            if not end_date:
-                end_date = datetime.now().date().isoformat()
-            if not start_date:
-                start_date = (datetime.now() - timedelta(days=30)).date().isoformat()
-            
-            # Fetch cash transactions
-            response = supabase.table("transactions").select("*").eq(
-                "client_id", client_id
-            ).eq("mode", "CASH").gte("date", start_date).lte("date", end_date).is_(
-                "deleted_at", "null"
-            ).execute()
-            
-            transactions = response.data if response.data else []
+            start_date, end_date = self._date_range(start_date, end_date, days=30)
+            transactions = self._fetch_cash_txns(client_id, start_date, end_date)
+        except Exception as e:
+            logger.error(f"Error detecting large cash transactions: {str(e)}")
+            return []
+        
+        return self.detect_large_cash_transactions_from(client_id, transactions)
+
+    def detect_large_cash_transactions_from(
+        self, 
+        client_id: str, 
+        transactions: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Detect large cash transactions among already fetched cash transactions.
+        """
+        try:
             large_transactions = []
             
             for txn in transactions:
@@ -104,20 +158,25 @@ class CashTransactionChecker:
             List of dictionaries containing suspicious withdrawal patterns.
         """
         try:
-            # Set default date range if not provided
-            if not end_date:
-                end_date = datetime.now().date().isoformat()
-            if not start_date:
-                start_date = (datetime.now() - timedelta(days=30)).date().isoformat()
-            
-            # Fetch cash transactions (debit type for withdrawals)
-            response = supabase.table("transactions").select("*").eq(
-                "client_id", client_id
-            ).eq("mode", "CASH").eq("type", "debit").gte("date", start_date).lte(
-                "date", end_date
-            ).is_("deleted_at", "null").order("date").execute()
-            
-            transactions = response.data if response.data else []
+            start_date, end_date = self._date_range(start_date, end_date, days=30)
+            transactions = self._fetch_cash_txns(client_id, start_date, end_date, debit_only=True)
+        except Exception as e:
+            logger.error(f"Error detecting suspicious cash withdrawals: {str(e)}")
+            return []
+        
+        return self.detect_suspicious_cash_withdrawals_from(client_id, transactions)
+
+    def detect_suspicious_cash_withdrawals_from(
+        self, 
+        client_id: str, 
+        transactions: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Detect suspicious withdrawal patterns among already fetched cash transactions.
+        """
+        try:
+            # Withdrawals are the debit side of the cash transactions
+            transactions = [t for t in transactions if t.get("type") == "debit"]
             suspicious_patterns = []
             
             # Group transactions by date
@@ -223,36 +282,36 @@ class CashTransactionChecker:
             List of dictionaries containing 40A(3) violation details.
         """
         try:
-            # Set default date range if not provided
-            if not end_date:
-                end_date = datetime.now().date().isoformat()
-            if not start_date:
-                start_date = (datetime.now() - timedelta(days=90)).date().isoformat()  # Check last 3 months
-            
-            # Fetch cash transactions (debit type for payments)
-            response = supabase.table("transactions").select("*").eq(
-                "client_id", client_id
-            ).eq("mode", "CASH").eq("type", "debit").gte("date", start_date).lte(
-                "date", end_date
-            ).is_("deleted_at", "null").order("date").execute()
-            
-            transactions = response.data if response.data else []
+            # Check the last 3 months by default
+            start_date, end_date = self._date_range(start_date, end_date, days=90)
+            transactions = self._fetch_cash_txns(client_id, start_date, end_date, debit_only=True)
+        except Exception as e:
+            logger.error(f"Error detecting 40A(3) violations: {str(e)}")
+            return []
+        
+        return self.detect_40a3_violations_from(client_id, transactions)
+
+    def detect_40a3_violations_from(
+        self, 
+        client_id: str, 
+        transactions: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Detect Section 40A(3) violations among already fetched cash transactions.
+        """
+        try:
+            # Payments are the debit side of the cash transactions
+            transactions = [t for t in transactions if t.get("type") == "debit"]
             violations = []
             
             # Group by date and vendor
-            transactions_by_date_vendor = {}
+            transactions_by_date_vendor: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
             for txn in transactions:
-                date = txn.get("date")
                 vendor = txn.get("vendor") or "Unknown"
-                key = f"{date}_{vendor}"
-                
-                if key not in transactions_by_date_vendor:
-                    transactions_by_date_vendor[key] = []
-                transactions_by_date_vendor[key].append(txn)
+                transactions_by_date_vendor[(txn.get("date"), vendor)].append(txn)
             
             # Check for violations
-            for key, txns in transactions_by_date_vendor.items():
-                date, vendor = key.split("_", 1)
+            for (date, vendor), txns in transactions_by_date_vendor.items():
                 total_amount = sum(float(t.get("amount", 0)) for t in txns)
                 
                 # Single transaction violation
@@ -324,9 +383,17 @@ class CashTransactionChecker:
             Dictionary containing all detected issues categorized by type.
         """
         try:
-            large_cash = self.detect_large_cash_transactions(client_id, start_date, end_date)
-            suspicious = self.detect_suspicious_cash_withdrawals(client_id, start_date, end_date)
-            violations = self.detect_40a3_violations(client_id, start_date, end_date)
+            # Fetch once over the widest default window (40A(3) looks back 90 days)
+            scan_start, scan_end = self._date_range(start_date, end_date, days=90)
+            transactions = self._fetch_cash_txns(client_id, scan_start, scan_end)
+            
+            # The other detectors look back 30 days unless a start date was given
+            recent_start, _ = self._date_range(start_date, end_date, days=30)
+            recent = [t for t in transactions if str(t.get("date", "")) >= recent_start]
+            
+            large_cash = self.detect_large_cash_transactions_from(client_id, recent)
+            suspicious = self.detect_suspicious_cash_withdrawals_from(client_id, recent)
+            violations = self.detect_40a3_violations_from(client_id, transactions)
             
             return {
                 "client_id": client_id,
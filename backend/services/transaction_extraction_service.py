@@ -69,19 +69,8 @@ class TransactionExtractionService:
         Extract text from PDF using OCR.
         """
         try:
-            import pytesseract
-            import pdf2image
-            from PIL import Image
-            import io
-            
-            # Convert PDF to images
-            images = pdf2image.convert_from_bytes(file_data)
-            
-            text = ""
-            for img in images:
-                text += pytesseract.image_to_string(img) + "\n"
-            
-            return text.strip()
+            # Pages are OCR'd concurrently and joined once, in page order
+            return self.ocr_service.ocr_pdf(file_data).strip()
             
         except Exception as e:
             logger.error(f"OCR extraction failed: {e}")
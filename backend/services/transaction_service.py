@@ -5,6 +5,9 @@ from fastapi import HTTPException
 from backend.models.transaction_models import TransactionCreate, TransactionUpdate, TransactionResponse
 from backend.utils.supabase_client import supabase
 from backend.utils.logger import logger
+from backend.services.ledger_classifier.ledger_classifier_service import invalidate_classification_cache
+from backend.services.ledger_classifier.recurrence_detector import clear_recurrence_cache
+from backend.services.query_engine.query_service import clear_query_cache
 
 class TransactionService:
     """
@@ -34,6 +37,8 @@ class TransactionService:
             }
             
             data = supabase.table("transactions").insert(new_transaction).execute()
+            clear_recurrence_cache()
+            clear_query_cache()
             
             if not data.data:
                 raise HTTPException(status_code=500, detail="Failed to create transaction")
@@ -73,6 +78,8 @@ class TransactionService:
             
             # Supabase/Postgres bulk insert
             data = supabase.table("transactions").insert(batch_data).execute()
+            clear_recurrence_cache()
+            clear_query_cache()
             
             if not data.data:
                  # Depending on Supabase version, insert might return data or not for bulk
@@ -114,10 +121,16 @@ class TransactionService:
             update_dict["updated_at"] = datetime.utcnow().isoformat()
             
             data = supabase.table("transactions").update(update_dict).eq("id", transaction_id).execute()
+            clear_recurrence_cache()
+            clear_query_cache()
             
             if not data.data:
                 raise HTTPException(status_code=404, detail="Transaction not found")
             
+            # Ledger suggestions are derived from the description
+            if "description" in update_dict or "ledger" in update_dict:
+                invalidate_classification_cache(transaction_id)
+            
             return TransactionResponse(**data.data[0])
             
         except Exception as e:
@@ -131,6 +144,8 @@ class TransactionService:
             data = supabase.table("transactions").update({
                 "deleted_at": datetime.utcnow().isoformat()
             }).eq("id", transaction_id).execute()
+            clear_recurrence_cache()
+            clear_query_cache()
             
             if not data.data:
                 raise HTTPException(status_code=404, detail="Transaction not found")
@@ -148,6 +163,8 @@ class TransactionService:
             data = supabase.table("transactions").update({
                 "deleted_at": None
             }).eq("id", transaction_id).execute()
+            clear_recurrence_cache()
+            clear_query_cache()
             
             if not data.data:
                 raise HTTPException(status_code=404, detail="Transaction not found")
@@ -0,0 +1,9 @@
+import os
+
+# backend.utils.supabase_client builds its client at import time and rejects
+# keys that are not JWT-shaped; tests replace the client before any query runs
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test.test.test")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test.test.test")
+# Keep QueryLLM on its offline fallback path
+os.environ.pop("OPENAI_API_KEY", None)
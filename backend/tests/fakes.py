@@ -0,0 +1,69 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+# A canned result: rows, a callable computing rows from the query, or an exception to raise
+Result = Union[List[Dict[str, Any]], Callable[["FakeQuery"], List[Dict[str, Any]]], Exception]
+
+
+class FakeResponse:
+    def __init__(self, data: List[Dict[str, Any]]) -> None:
+        self.data = data
+
+
+class FakeQuery:
+    """
+    Chainable stand-in for a PostgREST query builder.
+
+    Every builder call (select, eq, in_, range, ...) is recorded and returns
+    the query itself; execute() returns the canned result.
+    """
+
+    def __init__(self, name: str, result: Result) -> None:
+        self.name = name
+        self.result = result
+        self.calls: List[Tuple[str, tuple]] = []
+
+    def __getattr__(self, method: str) -> Callable[..., "FakeQuery"]:
+        def call(*args: Any, **kwargs: Any) -> "FakeQuery":
+            self.calls.append((method, args))
+            return self
+        return call
+
+    def arg(self, method: str, column: str) -> Optional[Any]:
+        """Return the value passed to the first `method(column, value)` call."""
+        for name, args in self.calls:
+            if name == method and args and args[0] == column:
+                return args[1]
+        return None
+
+    def execute(self) -> FakeResponse:
+        if isinstance(self.result, Exception):
+            raise self.result
+        return FakeResponse(self.result(self) if callable(self.result) else list(self.result))
+
+
+class FakeSupabase:
+    """
+    In-memory Supabase client returning canned rows per table and per RPC.
+
+    Executed queries are kept in `queries` and RPC calls in `rpc_calls`, so
+    tests can assert on what was asked of the database.
+    """
+
+    def __init__(
+        self,
+        tables: Optional[Dict[str, Result]] = None,
+        rpcs: Optional[Dict[str, Result]] = None
+    ) -> None:
+        self.tables = tables or {}
+        self.rpcs = rpcs or {}
+        self.queries: List[FakeQuery] = []
+        self.rpc_calls: List[Tuple[str, Dict[str, Any]]] = []
+
+    def table(self, name: str) -> FakeQuery:
+        query = FakeQuery(name, self.tables.get(name, []))
+        self.queries.append(query)
+        return query
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> FakeQuery:
+        self.rpc_calls.append((name, params or {}))
+        return FakeQuery(name, self.rpcs.get(name, []))
@@ -0,0 +1,247 @@
+import json
+import random
+import re
+from collections import defaultdict
+
+import pytest
+
+from backend.services.red_flag import anomaly_detector
+from backend.services.red_flag.anomaly_detector import AnomalyDetectorService
+from backend.tests.fakes import FakeSupabase
+
+CLIENT_ID = "client-1"
+SHEET_ID = "sheet-1"
+
+
+class _Flag(dict):
+    """
+    Records the fields a detector passes to RedFlag.
+
+    The detectors build flags with client_id/type/description/metadata, which
+    RedFlag does not declare, so the tests compare those fields directly.
+    """
+
+    def __init__(self, **fields):
+        super().__init__(fields)
+
+    def model_dump(self, mode=None, exclude=()):
+        return {key: value for key, value in self.items() if key not in exclude}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(anomaly_detector, "RedFlag", _Flag)
+    return AnomalyDetectorService()
+
+
+def _random_transactions(seed, count=300):
+    rng = random.Random(seed)
+    vendors = ["Acme Corp", "acme corp ", "ACME CORP", "Zoom", "AB", "X&Y Traders", "Bad*Vendor", "Globex", "Initech", ""]
+    amounts = [1000, 1500, 2000, 5000, 5000.5, 60000, 75000, 300000, 250001, 999, 12000]
+    rows = []
+    for i in range(count):
+        vendor = rng.choice(vendors)
+        invoice = rng.choice(["", f"INV-{rng.randint(1, 12):04d}", f"{rng.randint(1, 12)}", "NOTANUMBER"])
+        date = f"2024-0{rng.randint(1, 3)}-1{rng.randint(0, 2)}"
+        rows.append({
+            "id": f"t{i}",
+            "client_id": CLIENT_ID,
+            "vendor": vendor,
+            "amount": rng.choice(amounts),
+            "date": date + rng.choice(["", "T10:00:00"]),
+            "invoice_number": invoice or None,
+            "gstin": rng.choice(["", None, "29ABCDE1234F1Z5"])
+        })
+    # One-off vendors so the one-time vendor check has something to find
+    rows.append({"id": "solo", "client_id": CLIENT_ID, "vendor": "Umbrella Ltd", "amount": 90000,
+                 "date": "2024-02-01", "invoice_number": None, "gstin": None})
+    return rows
+
+
+def _canonical(flags):
+    return sorted(json.dumps(flag, sort_keys=True, default=str) for flag in flags)
+
+
+# Baseline per-row implementations the DataFrame detectors replaced
+
+def _baseline_duplicates(transactions):
+    groups = defaultdict(list)
+    for txn in transactions:
+        key = (
+            txn.get("vendor", "").lower().strip(),
+            float(txn.get("amount", 0)),
+            txn.get("date", "").split("T")[0]
+        )
+        groups[key].append(txn)
+    flags = []
+    for (vendor, amount, date), group in groups.items():
+        if len(group) > 1:
+            txn_ids = [t["id"] for t in group]
+            flags.append(dict(
+                client_id=group[0]["client_id"],
+                transaction_id=group[0]["id"],
+                type="duplicate_transaction",
+                severity="high",
+                description=f"Potential duplicate: {len(group)} transactions with same vendor, amount ({amount}), and date ({date})",
+                metadata={"duplicate_ids": txn_ids, "count": len(group)}
+            ))
+    return flags
+
+
+def _baseline_round_numbers(transactions, threshold):
+    flags = []
+    for txn in transactions:
+        amount = float(txn.get("amount", 0))
+        if amount > threshold and amount % 1000 == 0:
+            flags.append(dict(
+                client_id=txn["client_id"],
+                transaction_id=txn["id"],
+                type="round_number",
+                severity="medium",
+                description=f"Suspicious round number amount: {amount}",
+                metadata={"amount": amount}
+            ))
+    return flags
+
+
+def _baseline_missing_sequences(transactions):
+    vendor_invoices = defaultdict(list)
+    for txn in transactions:
+        vendor = txn.get("vendor")
+        inv_num = txn.get("invoice_number")
+        if vendor and inv_num:
+            match = re.search(r'(\d+)$', str(inv_num))
+            if match:
+                vendor_invoices[vendor].append((int(match.group(1)), txn))
+    flags = []
+    for vendor, items in vendor_invoices.items():
+        if len(items) < 3:
+            continue
+        items.sort(key=lambda x: x[0])
+        numbers = [x[0] for x in items]
+        for i in range(len(numbers) - 1):
+            if numbers[i+1] - numbers[i] > 1:
+                missing_range = f"{numbers[i]+1} to {numbers[i+1]-1}"
+                if numbers[i+1] - numbers[i] == 2:
+                    missing_range = str(numbers[i]+1)
+                flags.append(dict(
+                    client_id=items[i][1]["client_id"],
+                    transaction_id=items[i][1]["id"],
+                    type="missing_invoice_sequence",
+                    severity="medium",
+                    description=f"Missing invoice sequence for {vendor}: {missing_range}",
+                    metadata={"vendor": vendor, "gap_start": numbers[i], "gap_end": numbers[i+1]}
+                ))
+    return flags
+
+
+def _baseline_unusual_vendors(transactions):
+    vendor_counts = defaultdict(int)
+    for txn in transactions:
+        vendor_counts[txn.get("vendor", "")] += 1
+    flags = []
+    for txn in transactions:
+        vendor = txn.get("vendor", "")
+        amount = float(txn.get("amount", 0))
+        if vendor_counts[vendor] == 1 and amount > 50000:
+            flags.append(dict(
+                client_id=txn["client_id"], transaction_id=txn["id"], type="one_time_vendor", severity="low",
+                description=f"High value transaction ({amount}) with one-time vendor: {vendor}",
+                metadata={"vendor": vendor, "amount": amount}
+            ))
+        if len(vendor) < 3 or re.search(r'[^a-zA-Z0-9\s\.\-\&]', vendor):
+            flags.append(dict(
+                client_id=txn["client_id"], transaction_id=txn["id"], type="suspicious_vendor_name", severity="medium",
+                description=f"Unusual vendor name format: {vendor}",
+                metadata={"vendor": vendor}
+            ))
+        if amount > 250000 and not txn.get("gstin"):
+            flags.append(dict(
+                client_id=txn["client_id"], transaction_id=txn["id"], type="missing_gstin", severity="high",
+                description=f"High value transaction ({amount}) missing GSTIN",
+                metadata={"amount": amount}
+            ))
+    return flags
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_frame_detectors_match_baseline(service, seed):
+    transactions = _random_transactions(seed)
+    df = service._to_frame(CLIENT_ID, transactions)
+
+    assert _canonical(service._detect_duplicates_in_frame(df)) == _canonical(_baseline_duplicates(transactions))
+    assert _canonical(service._detect_round_numbers_in_frame(df)) == _canonical(
+        _baseline_round_numbers(transactions, service.round_number_threshold)
+    )
+    assert _canonical(service.detect_missing_sequences(df)) == _canonical(_baseline_missing_sequences(transactions))
+    assert _canonical(service.detect_unusual_vendors(df)) == _canonical(_baseline_unusual_vendors(transactions))
+
+
+def test_missing_sequences_reports_single_and_ranged_gaps(service):
+    transactions = [
+        {"id": f"t{n}", "vendor": "Acme", "amount": 100, "date": "2024-01-01", "invoice_number": f"INV-{n:03d}"}
+        for n in (1, 2, 4, 8)
+    ]
+    flags = service.detect_missing_sequences(service._to_frame(CLIENT_ID, transactions))
+
+    assert [flag["description"] for flag in flags] == [
+        "Missing invoice sequence for Acme: 3",
+        "Missing invoice sequence for Acme: 5 to 7"
+    ]
+    assert [flag["transaction_id"] for flag in flags] == ["t2", "t4"]
+
+
+def test_missing_sequences_skips_tails_too_long_for_int64(service):
+    invoice_numbers = ["INV-001", "INV-003", "INV-20240100000000000001", "INV-00000000000000000000006"]
+    transactions = [
+        {"id": f"t{i}", "vendor": "Acme", "amount": 100, "date": "2024-01-01", "invoice_number": number}
+        for i, number in enumerate(invoice_numbers)
+    ]
+    flags = service.detect_missing_sequences(service._to_frame(CLIENT_ID, transactions))
+
+    # Leading zeros do not count towards the limit, so the last invoice is still number 6
+    assert [flag["description"] for flag in flags] == [
+        "Missing invoice sequence for Acme: 2",
+        "Missing invoice sequence for Acme: 4 to 5"
+    ]
+
+
+def _scan_supabase(rpcs):
+    rows = [
+        {"id": "a", "vendor": "Acme", "amount": 5000, "date": "2024-01-05"},
+        {"id": "b", "vendor": "acme ", "amount": 5000, "date": "2024-01-05T09:30:00"},
+        {"id": "c", "vendor": "Globex", "amount": 1234, "date": "2024-01-06"}
+    ]
+    return FakeSupabase(tables={"transactions": rows}, rpcs=rpcs)
+
+
+def test_scan_uses_rpc_results(service, monkeypatch):
+    fake = _scan_supabase({
+        "detect_duplicates": [
+            {"vendor": "acme", "amount": "5000", "txn_date": "2024-01-05", "transaction_ids": ["a", "b"]}
+        ],
+        "detect_round_numbers": [{"id": "a", "amount": "5000"}, {"id": "b", "amount": "5000"}]
+    })
+    monkeypatch.setattr(anomaly_detector, "supabase", fake)
+
+    flags = service.scan_for_red_flags(CLIENT_ID, SHEET_ID)
+
+    assert ("detect_duplicates", {"sid": SHEET_ID}) in fake.rpc_calls
+    assert ("detect_round_numbers", {"sid": SHEET_ID, "thr": service.round_number_threshold}) in fake.rpc_calls
+    duplicates = [flag for flag in flags if flag["type"] == "duplicate_transaction"]
+    assert [flag["metadata"] for flag in duplicates] == [{"duplicate_ids": ["a", "b"], "count": 2}]
+    assert sorted(flag["transaction_id"] for flag in flags if flag["type"] == "round_number") == ["a", "b"]
+
+
+def test_scan_falls_back_to_frame_detectors_when_rpcs_fail(service, monkeypatch):
+    missing = Exception("function detect_duplicates(uuid) does not exist")
+    fake = _scan_supabase({"detect_duplicates": missing, "detect_round_numbers": missing})
+    monkeypatch.setattr(anomaly_detector, "supabase", fake)
+
+    flags = service.scan_for_red_flags(CLIENT_ID, SHEET_ID)
+
+    duplicates = [flag for flag in flags if flag["type"] == "duplicate_transaction"]
+    assert [flag["metadata"]["duplicate_ids"] for flag in duplicates] == [["a", "b"]]
+    assert sorted(flag["transaction_id"] for flag in flags if flag["type"] == "round_number") == ["a", "b"]
+    inserts = [query for query in fake.queries if query.name == "red_flags"]
+    assert len(inserts) == 1
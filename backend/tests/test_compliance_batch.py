@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from backend.services.query_engine.query_llm import QueryLLM
+
+pytestmark = pytest.mark.asyncio
+
+LAW_CONTEXT = ["Section 194C: TDS on contractor payments"]
+
+
+@pytest.fixture
+def llm():
+    return QueryLLM()
+
+
+def _stub_reasoning(llm, results=None):
+    """Replace the LLM call with canned verdicts and record which transactions were sent."""
+    calls = []
+
+    async def reasoning(transaction, law_context):
+        calls.append(transaction.get("id"))
+        return (results or {}).get(transaction.get("id"), {"compliant": True, "id": transaction.get("id")})
+
+    llm.aget_compliance_reasoning = reasoning
+    return calls
+
+
+def _read_checkpoint(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+async def test_resume_skips_checkpointed_transactions(llm, tmp_path):
+    checkpoint = tmp_path / "compliance.jsonl"
+    checkpoint.write_text(
+        json.dumps({"id": "t1", "reasoning": {"compliant": False, "from": "checkpoint"}}) + "\n"
+        + '{"id": "t2", "reas',  # Partial line from an interrupted write
+        encoding="utf-8"
+    )
+    calls = _stub_reasoning(llm)
+
+    results = await llm.acompliance_batch(
+        [{"id": "t1"}, {"id": "t2"}, {"id": "t3"}], LAW_CONTEXT, checkpoint_path=str(checkpoint)
+    )
+
+    assert sorted(calls) == ["t2", "t3"]
+    assert results == [
+        {"compliant": False, "from": "checkpoint"},
+        {"compliant": True, "id": "t2"},
+        {"compliant": True, "id": "t3"}
+    ]
+    # Entries appended after the partial line must survive the next resume
+    lines = checkpoint.read_text(encoding="utf-8").splitlines()
+    assert lines[1] == '{"id": "t2", "reas'
+    assert sorted(json.loads(line)["id"] for line in lines[2:]) == ["t2", "t3"]
+
+
+async def test_second_run_makes_no_calls(llm, tmp_path):
+    checkpoint = str(tmp_path / "compliance.jsonl")
+    transactions = [{"id": f"t{i}"} for i in range(5)]
+    _stub_reasoning(llm)
+    first = await llm.acompliance_batch(transactions, LAW_CONTEXT, checkpoint_path=checkpoint)
+
+    calls = _stub_reasoning(llm)
+    second = await llm.acompliance_batch(transactions, LAW_CONTEXT, checkpoint_path=checkpoint)
+
+    assert calls == []
+    assert second == first
+
+
+async def test_failed_results_are_retried(llm, tmp_path):
+    checkpoint = tmp_path / "compliance.jsonl"
+    _stub_reasoning(llm, {"t2": {"compliant": True, "error": "timeout"}})
+    await llm.acompliance_batch([{"id": "t1"}, {"id": "t2"}], LAW_CONTEXT, checkpoint_path=str(checkpoint))
+
+    assert [entry["id"] for entry in _read_checkpoint(checkpoint)] == ["t1"]
+
+    calls = _stub_reasoning(llm)
+    results = await llm.acompliance_batch([{"id": "t1"}, {"id": "t2"}], LAW_CONTEXT, checkpoint_path=str(checkpoint))
+
+    assert calls == ["t2"]
+    assert results[1] == {"compliant": True, "id": "t2"}
+
+
+async def test_offline_fallback_is_not_checkpointed(llm, tmp_path):
+    checkpoint = tmp_path / "compliance.jsonl"
+
+    results = await llm.acompliance_batch([{"id": "t1", "amount": 1000}], LAW_CONTEXT, checkpoint_path=str(checkpoint))
+
+    assert results[0]["error"] == "LLM unavailable"
+    assert not checkpoint.exists()
+
+
+async def test_transactions_without_ids_are_kept_apart(llm, tmp_path):
+    checkpoint = tmp_path / "compliance.jsonl"
+    verdicts = iter([{"compliant": True}, {"compliant": False}])
+
+    async def reasoning(transaction, law_context):
+        return next(verdicts)
+
+    llm.aget_compliance_reasoning = reasoning
+    results = await llm.acompliance_batch([{"vendor": "Acme"}, {"vendor": "Globex"}], LAW_CONTEXT, checkpoint_path=str(checkpoint))
+
+    assert sorted(result["compliant"] for result in results) == [False, True]
+    assert sorted(entry["id"] for entry in _read_checkpoint(checkpoint)) == ["#0", "#1"]
@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from backend.services.ledger_classifier.ledger_rules_engine import LedgerRulesEngine
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return LedgerRulesEngine()
+
+
+def _baseline_confidence(engine, transaction, ledger):
+    # Baseline per-transaction scoring the batched version replaced
+    description = str(transaction.get("description", "")).lower()
+    if not ledger or ledger not in engine.ledger_rules:
+        return 0.5
+    matches = sum(1 for kw in engine.ledger_rules[ledger] if kw in description)
+    if matches >= 2:
+        return 0.95
+    elif matches == 1:
+        return 0.75
+    return 0.5
+
+
+def test_batch_confidence_matches_baseline(engine):
+    rng = random.Random(0)
+    words = [kw for keywords in engine.ledger_rules.values() for kw in keywords] + ["misc", "Transfer", "RENT", "ola cab"]
+    ledgers = list(engine.ledger_rules) + ["Suspense", "", None]
+    transactions, predicted = [], []
+    for _ in range(2000):
+        transactions.append({"description": " ".join(rng.choices(words, k=rng.randint(0, 4)))})
+        predicted.append(rng.choice(ledgers))
+    # Missing and non-string descriptions go through str() like the baseline
+    transactions += [{}, {"description": None}, {"description": 42}]
+    predicted += ["Rent Expense", "Sales", "Sales"]
+
+    scores = engine.get_confidence_scores(transactions, predicted)
+
+    assert scores.tolist() == [
+        _baseline_confidence(engine, transaction, ledger) for transaction, ledger in zip(transactions, predicted)
+    ]
+
+
+@pytest.mark.parametrize("description, ledger, score", [
+    ("Office rent and lease for May", "Rent Expense", 0.95),
+    ("Monthly rent", "Rent Expense", 0.75),
+    ("Monthly rent", "Sales", 0.5),
+    ("Monthly rent", "Unknown Ledger", 0.5)
+])
+def test_single_confidence(engine, description, ledger, score):
+    assert engine.get_confidence_score({"description": description}, ledger) == score
+
+
+@pytest.mark.parametrize("description", ["Hotels stay Mumbai", "restaurants bill", "Team lunch at Clubhouse"])
+def test_gst_blocked_keywords_match_substrings(engine, description):
+    assert engine.is_gst_applicable({"description": description, "gstin": "27AAAAA0000A1Z5"}) is False
+
+
+@pytest.mark.parametrize("description", ["Dell computers purchase", "Office Furniture", "Plantation machinery"])
+def test_capital_keywords_match_substrings(engine, description):
+    assert engine.is_capital_expense({"description": description, "amount": 100}) is True
+
+
+@pytest.mark.parametrize("description", ["AWS subscriptions", "Salaryadvance", "Rental for May"])
+def test_recurring_keywords_match_substrings(engine, description):
+    assert engine.is_recurring({"description": description}) is True
+
+
+def test_keyword_checks_without_match(engine):
+    transaction = {"description": "Stationery order", "amount": 100, "gstin": "27AAAAA0000A1Z5"}
+
+    assert engine.is_gst_applicable(transaction) is True
+    assert engine.is_capital_expense(transaction) is False
+    assert engine.is_recurring(transaction) is False
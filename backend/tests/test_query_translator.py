@@ -0,0 +1,73 @@
+import itertools
+import re
+
+import pytest
+
+from backend.services.query_engine.query_translator import QueryTranslator, _find_quarter
+
+
+@pytest.fixture(scope="module")
+def translator():
+    return QueryTranslator()
+
+
+# Baseline per-call regexes the precompiled patterns replaced
+
+def _baseline_amount_range(query_text):
+    amount_min = amount_max = None
+    above_match = re.search(r'(?:above|greater than|more than|over)\s+([\d,]+)', query_text)
+    if above_match:
+        amount_min = float(above_match.group(1).replace(',', ''))
+    below_match = re.search(r'(?:below|less than|under)\s+([\d,]+)', query_text)
+    if below_match:
+        amount_max = float(below_match.group(1).replace(',', ''))
+    between_match = re.search(r'between\s+([\d,]+)\s+and\s+([\d,]+)', query_text)
+    if between_match:
+        amount_min = float(between_match.group(1).replace(',', ''))
+        amount_max = float(between_match.group(2).replace(',', ''))
+    return {"amount_min": amount_min, "amount_max": amount_max}
+
+
+def _baseline_quarter(query_text):
+    match = re.search(r'q([1-4])', query_text)
+    return int(match.group(1)) if match else None
+
+
+_AMOUNT_PHRASES = [
+    "", "above 5000", "over 1,00,000", "more than 250", "greater than 10", "below 900", "under 50,000",
+    "less than 7", "between 100 and 2,000", "between 5 and", "turnover 300", "over and under"
+]
+
+
+def test_amount_range_matches_baseline(translator):
+    for parts in itertools.permutations(_AMOUNT_PHRASES, 3):
+        query_text = "show expenses " + " ".join(parts)
+        assert translator._extract_amount_range(query_text) == _baseline_amount_range(query_text), query_text
+
+
+@pytest.mark.parametrize("query_text", [
+    "gst for q3 2024", "q1 and q2", "quarter q5 then q2", "faq q", "q", "", "sales q4fy24", "q0q9q1"
+])
+def test_find_quarter_matches_baseline(query_text):
+    assert _find_quarter(query_text) == _baseline_quarter(query_text)
+
+
+@pytest.mark.parametrize("query_text, vendor", [
+    ("payments to Acme from Globex", "Acme"),
+    ("payments from Globex to Acme", "Acme"),
+    ("vendor Initech from Globex", "Globex"),
+    ("show vendor Initech", "Initech"),
+    ("transfers into Savings from Acme", "Acme"),
+    ("expenses this month", None)
+])
+def test_vendor_precedence(translator, query_text, vendor):
+    assert translator._extract_vendor(query_text) == vendor
+
+
+def test_translate_extracts_filters(translator):
+    translation = translator.translate("Show payments to Acme above 5,000 in Q2 2024")
+
+    assert translation.filters["vendor"] == "acme"
+    assert translation.filters["amount_min"] == 5000.0
+    assert translation.filters["date_from"] == "2024-04-01"
+    assert translation.filters["date_to"] == "2024-06-30"
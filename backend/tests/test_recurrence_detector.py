@@ -0,0 +1,125 @@
+import random
+import statistics
+from datetime import date, timedelta
+
+import pytest
+
+from backend.services.ledger_classifier.recurrence_detector import RecurrenceDetector, clear_recurrence_cache
+from backend.tests.fakes import FakeSupabase
+
+CLIENT_ID = "client-1"
+
+
+@pytest.fixture
+def detector():
+    clear_recurrence_cache()
+    yield RecurrenceDetector()
+    clear_recurrence_cache()
+
+
+def test_detect_recurring_transactions_maps_rpc_rows(detector):
+    detector.supabase = FakeSupabase(rpcs={"recurring_patterns": [{
+        "vendor_name": "Acme",
+        "average_amount": "1499.50",
+        "frequency": "monthly",
+        "next_expected_date": "2024-05-01",
+        "transaction_ids": ["a", "b", "c"],
+        "occurrence_count": 3
+    }]})
+
+    patterns = detector.detect_recurring_transactions(CLIENT_ID, lookback_months=6)
+
+    assert detector.supabase.rpc_calls == [("recurring_patterns", {
+        "cid": CLIENT_ID,
+        "lookback_months": 6,
+        "min_count": detector.min_occurrences,
+        "amount_tolerance": detector.amount_tolerance
+    })]
+    assert patterns == [{
+        "vendor_name": "Acme",
+        "average_amount": 1499.5,
+        "frequency": "monthly",
+        "next_expected_date": "2024-05-01",
+        "transaction_ids": ["a", "b", "c"],
+        "occurrence_count": 3
+    }]
+
+
+def test_failed_rpc_is_not_cached(detector):
+    detector.supabase = FakeSupabase(rpcs={"recurring_patterns": Exception("function recurring_patterns does not exist")})
+    assert detector.detect_recurring_transactions(CLIENT_ID) == []
+
+    detector.supabase.rpcs["recurring_patterns"] = [{
+        "vendor_name": "Acme", "average_amount": 10, "frequency": "weekly",
+        "next_expected_date": "2024-01-08", "transaction_ids": ["a", "b", "c"], "occurrence_count": 3
+    }]
+    assert len(detector.detect_recurring_transactions(CLIENT_ID)) == 1
+
+
+def test_is_recurring_batch_reads_history_through_client_sheets(detector):
+    history = [{"vendor": "Acme", "amount": 1000, "date": f"2024-0{month}-05"} for month in range(1, 5)]
+    detector.supabase = FakeSupabase(tables={
+        "transactions": lambda query: (
+            [{"id": "t1", "vendor": "Acme", "amount": 1000, "sheet_id": "s1"}] if query.arg("in_", "id") else history
+        ),
+        "sheets": lambda query: (
+            [{"id": "s1", "client_id": CLIENT_ID}] if query.arg("in_", "id") else [{"id": "s1"}, {"id": "s2"}]
+        )
+    })
+
+    assert detector.is_recurring_batch(["t1", "t2"]) == {"t1": True, "t2": False}
+
+    history_query = [q for q in detector.supabase.queries if q.name == "transactions"][-1]
+    assert history_query.arg("in_", "sheet_id") == ["s1", "s2"]
+    assert history_query.arg("eq", "client_id") is None
+    sheets_query = [q for q in detector.supabase.queries if q.name == "sheets"][-1]
+    assert sheets_query.arg("eq", "client_id") == CLIENT_ID
+
+
+@pytest.mark.asyncio
+async def test_missed_payments_read_every_page(detector):
+    expected = date.today() - timedelta(days=30)
+    detector.detect_recurring_transactions = lambda client_id, lookback_months: [
+        {"vendor_name": vendor, "next_expected_date": expected.isoformat(), "average_amount": 1000.0}
+        for vendor in ("Acme", "Globex")
+    ]
+    # The only on-time Acme payment sits past the first two 1000-row pages
+    early = (expected - timedelta(days=20)).isoformat()
+    payments = [{"vendor": "Acme", "date": early}] * 2400 + [{"vendor": "Acme", "date": expected.isoformat()}]
+
+    def page(query):
+        start, end = next(args for name, args in query.calls if name == "range")
+        return payments[start:end + 1]
+
+    detector.supabase = FakeSupabase(tables={"transactions": page, "sheets": [{"id": "s1"}]})
+
+    missed = await detector.flag_missed_recurring_payments(CLIENT_ID)
+
+    assert [payment["vendor"] for payment in missed] == ["Globex"]
+    assert len([q for q in detector.supabase.queries if q.name == "transactions"]) == 3
+
+
+def _baseline_confidence(transactions):
+    # Baseline formula with statistics.stdev; needs at least two intervals
+    amounts = [t["amount"] for t in transactions]
+    dates = [date.fromisoformat(t["date"]) for t in transactions]
+    amount_score = max(0, 1 - statistics.stdev(amounts) / statistics.mean(amounts))
+    intervals = [(dates[i+1] - dates[i]).days for i in range(len(dates)-1)]
+    interval_score = 0
+    if statistics.mean(intervals) > 0:
+        interval_score = max(0, 1 - statistics.stdev(intervals) / statistics.mean(intervals))
+    count_score = min(1.0, len(transactions) / 10)
+    return round(amount_score * 0.4 + interval_score * 0.4 + count_score * 0.2, 2)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_confidence_matches_baseline(detector, seed):
+    rng = random.Random(seed)
+    day = date(2024, 1, 1)
+    transactions = []
+    for _ in range(rng.randint(3, 14)):
+        transactions.append({"amount": rng.choice([999.0, 1000.0, 1001.0, 1500.0]), "date": day.isoformat()})
+        day += timedelta(days=rng.choice([28, 30, 31, 45]))
+    detector.supabase = FakeSupabase(tables={"transactions": transactions})
+
+    assert detector.calculate_recurrence_confidence(["ignored"]) == _baseline_confidence(transactions)
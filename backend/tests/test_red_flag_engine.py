@@ -0,0 +1,138 @@
+import json
+import random
+from collections import defaultdict
+
+import pytest
+
+from backend.services.red_flag_engine import anomaly_detector
+from backend.services.red_flag_engine.anomaly_detector import AnomalyDetectorService
+from backend.tests.fakes import FakeSupabase
+
+CLIENT_ID = "client-1"
+
+
+@pytest.fixture
+def service():
+    return AnomalyDetectorService()
+
+
+def _random_transactions(seed, count=300):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        rows.append({
+            "id": f"t{i}",
+            "vendor": rng.choice(["Acme", "ACME", "Globex", "Initech", ""]),
+            "amount": rng.choice([5000, 10000, 10001, 50000, 75000, 100000, 150000, 250000, "60000", 49999.5]),
+            "date": f"2024-01-1{rng.randint(0, 3)}" + rng.choice(["", "T08:15:00"]),
+            "mode": rng.choice(["cash", "CASH", "upi", None]),
+            "type": rng.choice(["debit", "credit"]),
+            "invoice_number": rng.choice([None, "", "INV-1"])
+        })
+    return rows
+
+
+def _canonical(flags):
+    # id and created_at are generated per flag
+    return sorted(
+        json.dumps({k: v for k, v in flag.items() if k not in ("id", "created_at")}, sort_keys=True)
+        for flag in flags
+    )
+
+
+def _flag(txn, flag_type, severity, message):
+    return {
+        "client_id": CLIENT_ID,
+        "transaction_id": txn.get("id"),
+        "flag_type": flag_type,
+        "severity": severity,
+        "message": message,
+        "resolved": False
+    }
+
+
+# Baseline per-row implementations the DataFrame detectors replaced
+
+def _baseline_duplicates(transactions):
+    groups = defaultdict(list)
+    for txn in transactions:
+        key = (float(txn.get("amount", 0)), str(txn.get("vendor", "")).lower(), str(txn.get("date", ""))[:10])
+        groups[key].append(txn)
+    return [
+        _flag(txn, "duplicate", "high",
+              f"Potential duplicate: {len(group)} transactions with same amount (₹{key[0]:,.2f}), vendor ({key[1]}), and date ({key[2]})")
+        for key, group in groups.items() if len(group) > 1
+        for txn in group
+    ]
+
+
+def _baseline_large_cash(transactions, threshold):
+    flags = []
+    for txn in transactions:
+        amount = float(txn.get("amount", 0))
+        if str(txn.get("mode", "")).upper() == "CASH" and amount > threshold:
+            flags.append(_flag(
+                txn, "large_cash", "high" if amount > 200000 else "medium",
+                f"Large cash transaction of ₹{amount:,.2f} detected. Section 269ST restricts cash transactions above ₹2,00,000"
+            ))
+    return flags
+
+
+def _baseline_round_numbers(transactions, threshold):
+    flags = []
+    for txn in transactions:
+        amount = float(txn.get("amount", 0))
+        if amount >= threshold and (amount % 100000 == 0 or amount % 50000 == 0):
+            flags.append(_flag(
+                txn, "round_number", "low",
+                f"Suspiciously round amount: ₹{amount:,.2f}. Verify if this is a genuine transaction."
+            ))
+    return flags
+
+
+def _baseline_missing_invoices(transactions):
+    flags = []
+    for txn in transactions:
+        amount = float(txn.get("amount", 0))
+        if txn.get("type", "") == "debit" and amount > 50000 and not txn.get("invoice_number"):
+            flags.append(_flag(
+                txn, "missing_invoice", "medium",
+                f"Expense of ₹{amount:,.2f} missing invoice number. Required for audit trail."
+            ))
+    return flags
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_frame_detectors_match_baseline(service, seed):
+    transactions = _random_transactions(seed)
+    df = service._to_frame(transactions)
+
+    assert _canonical(service._detect_duplicates(CLIENT_ID, df)) == _canonical(_baseline_duplicates(transactions))
+    assert _canonical(service._detect_large_cash(CLIENT_ID, df)) == _canonical(
+        _baseline_large_cash(transactions, service.large_cash_threshold)
+    )
+    assert _canonical(service._detect_round_numbers(CLIENT_ID, df)) == _canonical(
+        _baseline_round_numbers(transactions, service.round_number_threshold)
+    )
+    assert _canonical(service._detect_missing_invoices(CLIENT_ID, df)) == _canonical(_baseline_missing_invoices(transactions))
+
+
+def test_empty_scan_creates_no_flags(service, monkeypatch):
+    monkeypatch.setattr(anomaly_detector, "supabase", FakeSupabase())
+
+    result = service.run_scan(CLIENT_ID)
+
+    assert result == {"client_id": CLIENT_ID, "scan_completed": True, "transactions_scanned": 0, "flags_created": 0}
+
+
+def test_rejected_insert_batch_is_retried_row_by_row(service, monkeypatch):
+    def insert(query):
+        rows = query.calls[0][1][0]
+        if isinstance(rows, list) or rows["transaction_id"] == "bad":
+            raise Exception("duplicate key value violates unique constraint")
+        return [rows]
+
+    monkeypatch.setattr(anomaly_detector, "supabase", FakeSupabase(tables={"red_flags": insert}))
+    flags = [service._flag(CLIENT_ID, txn_id, "anomaly", "low", "", "") for txn_id in ("a", "bad", "c")]
+
+    assert service._insert_flags(flags) == 2
@@ -0,0 +1,290 @@
+"""
+Tests for the Postgres functions in updates.sql and the raw SQL the services
+send over asyncpg, run against a real database.
+
+Set TEST_DATABASE_URL to a scratch Postgres (14+) to run them; the vector
+search tests also need pgvector 0.7+ on the server and the pgvector package.
+Each test works in its own schema inside a transaction that is rolled back, so
+no tables or functions are left behind.
+"""
+
+import os
+import random
+import re
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+import pytest_asyncio
+
+from backend.services.query_engine.query_service import _MATCH_LAW_CHUNKS_SQL
+from backend.services.red_flag.anomaly_detector import AnomalyDetectorService
+
+asyncpg = pytest.importorskip("asyncpg")
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+pytestmark = [
+    pytest.mark.asyncio,
+    pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+]
+
+UPDATES_SQL = Path(__file__).resolve().parents[1] / "updates.sql"
+FUNCTIONS = ("recurring_patterns", "detect_duplicates", "detect_round_numbers")
+
+# Just the columns the functions read
+SETUP_SQL = """
+    CREATE SCHEMA rpc_test;
+    SET LOCAL search_path TO rpc_test, public;
+    CREATE TABLE sheets (
+        id UUID PRIMARY KEY,
+        client_id UUID,
+        deleted_at TIMESTAMP WITH TIME ZONE
+    );
+    CREATE TABLE transactions (
+        id UUID PRIMARY KEY,
+        sheet_id UUID REFERENCES sheets(id),
+        date DATE NOT NULL,
+        amount DECIMAL(15,2) NOT NULL,
+        vendor TEXT,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT clock_timestamp(),
+        deleted_at TIMESTAMP WITH TIME ZONE
+    );
+"""
+
+CLIENT_ID = uuid.uuid4()
+SHEET_ID = uuid.uuid4()
+
+
+def _function_sql(name):
+    match = re.search(rf"CREATE OR REPLACE FUNCTION {name}\(.*?\$\$;", UPDATES_SQL.read_text(), re.DOTALL)
+    assert match, f"{name} is missing from updates.sql"
+    return match.group(0)
+
+
+@pytest_asyncio.fixture
+async def conn():
+    connection = await asyncpg.connect(TEST_DATABASE_URL)
+    transaction = connection.transaction()
+    await transaction.start()
+    try:
+        await connection.execute(SETUP_SQL)
+        for name in FUNCTIONS:
+            await connection.execute(_function_sql(name))
+        await connection.execute("INSERT INTO sheets (id, client_id) VALUES ($1, $2)", SHEET_ID, CLIENT_ID)
+        yield connection
+    finally:
+        await transaction.rollback()
+        await connection.close()
+
+
+async def _insert(conn, rows):
+    await conn.executemany(
+        "INSERT INTO transactions (id, sheet_id, date, amount, vendor, deleted_at) VALUES ($1, $2, $3, $4, $5, $6)",
+        [
+            (row["id"], row.get("sheet_id", SHEET_ID), row["date"], row["amount"], row["vendor"], row.get("deleted_at"))
+            for row in rows
+        ]
+    )
+
+
+def _txn(vendor, amount, days_ago, **extra):
+    return {"id": uuid.uuid4(), "vendor": vendor, "amount": amount, "date": date.today() - timedelta(days=days_ago), **extra}
+
+
+async def _recurring_patterns(conn, lookback_months=12, min_count=3, amount_tolerance=0.1):
+    rows = await conn.fetch(
+        "SELECT * FROM recurring_patterns($1, $2, $3, $4)", CLIENT_ID, lookback_months, min_count, amount_tolerance
+    )
+    return [dict(row) for row in rows]
+
+
+async def test_recurring_patterns_clusters_neighbouring_amounts(conn):
+    rows = [_txn("Acme", amount, days_ago) for amount, days_ago in ((9999, 90), (10001, 60), (10000, 30), (9999.5, 0))]
+    await _insert(conn, rows)
+
+    patterns = await _recurring_patterns(conn)
+
+    assert len(patterns) == 1
+    pattern = patterns[0]
+    assert pattern["vendor_name"] == "Acme"
+    assert pattern["frequency"] == "monthly"
+    assert float(pattern["average_amount"]) == pytest.approx(9999.88, abs=0.01)
+    assert pattern["transaction_ids"] == [row["id"] for row in rows]
+    assert pattern["occurrence_count"] == 4
+    assert pattern["next_expected_date"] == date.today() + timedelta(days=30)
+
+
+async def test_recurring_patterns_excludes_rows_outside_scope(conn):
+    other_sheet = uuid.uuid4()
+    await conn.execute("INSERT INTO sheets (id, client_id) VALUES ($1, $2)", other_sheet, uuid.uuid4())
+    await _insert(conn, [
+        # Another client's sheet
+        *[_txn("Acme", 500, days, sheet_id=other_sheet) for days in (0, 30, 60)],
+        # Deleted rows, old rows and non-positive amounts
+        *[_txn("Globex", 500, days, deleted_at=date.today()) for days in (0, 30, 60)],
+        *[_txn("Initech", 500, days) for days in (400, 430, 460)],
+        *[_txn("Refunds", -500, days) for days in (0, 30, 60)],
+        # Irregular intervals
+        *[_txn("Umbrella", 500, days) for days in (0, 3, 100)]
+    ])
+
+    assert await _recurring_patterns(conn) == []
+
+
+async def test_recurring_patterns_does_not_chain_drifting_amounts(conn):
+    # Each amount is within 10% of the previous one, but not of the first
+    rows = [_txn("Acme", 1000 + 90 * step, 150 - 30 * step) for step in range(6)]
+    await _insert(conn, rows)
+
+    patterns = await _recurring_patterns(conn, min_count=2)
+
+    assert sorted((float(p["average_amount"]), p["transaction_ids"]) for p in patterns) == [
+        (1045.0, [rows[0]["id"], rows[1]["id"]]),
+        (1225.0, [rows[2]["id"], rows[3]["id"]]),
+        (1405.0, [rows[4]["id"], rows[5]["id"]])
+    ]
+    assert {p["frequency"] for p in patterns} == {"monthly"}
+
+
+def _reference_patterns(rows, min_count=3, amount_tolerance=0.1):
+    """Python statement of what recurring_patterns computes, for one client's in-scope rows."""
+    by_vendor = defaultdict(list)
+    for row in rows:
+        by_vendor[row["vendor"]].append(row)
+
+    patterns = {}
+    for vendor, txns in by_vendor.items():
+        txns.sort(key=lambda row: (row["amount"], row["date"]))
+        clusters = [[txns[0]]]
+        for row in txns[1:]:
+            # Compared with the cluster's smallest amount, not its neighbour
+            if row["amount"] > (1 + amount_tolerance) * clusters[-1][0]["amount"]:
+                clusters.append([])
+            clusters[-1].append(row)
+        for cluster in clusters:
+            if len(cluster) < min_count:
+                continue
+            cluster.sort(key=lambda row: row["date"])
+            gaps = [(b["date"] - a["date"]).days for a, b in zip(cluster, cluster[1:])]
+            avg = sum(gaps) / len(gaps)
+            for frequency, (low, high) in (("weekly", (5, 9)), ("monthly", (25, 35)), ("quarterly", (85, 95)), ("annual", (355, 375))):
+                if low <= avg <= high:
+                    patterns[frozenset(row["id"] for row in cluster)] = (vendor, frequency)
+    return patterns
+
+
+@pytest.mark.parametrize("seed", range(10))
+async def test_recurring_patterns_matches_reference(conn, seed):
+    rng = random.Random(seed)
+    rows = []
+    for vendor in ("Acme", "Globex", "Initech", "Zoom"):
+        for base in rng.sample([500, 1000, 1080, 5000, 20000], 2):
+            days = 0
+            interval = rng.choice([7, 30, 45, 91])
+            for _ in range(rng.randint(2, 6)):
+                rows.append(_txn(vendor, round(base * rng.uniform(0.97, 1.03), 2), days))
+                days += interval + rng.randint(-2, 2)
+    # Both sides see only the 12 * 30 days recurring_patterns looks back over
+    in_scope = [row for row in rows if row["date"] >= date.today() - timedelta(days=360)]
+    await _insert(conn, in_scope)
+
+    patterns = await _recurring_patterns(conn)
+
+    expected = _reference_patterns(in_scope)
+    assert expected
+    assert {frozenset(p["transaction_ids"]): (p["vendor_name"], p["frequency"]) for p in patterns} == expected
+
+
+def _random_sheet_rows(seed):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(200):
+        rows.append({
+            "id": uuid.uuid4(),
+            "vendor": rng.choice(["Acme", "acme", " ACME ", "Globex", None]),
+            "amount": rng.choice([1000, 1500, 2000, 5000, 5000.5, 12000, 999]),
+            "date": date(2024, 1, rng.randint(1, 4))
+        })
+    return rows
+
+
+def _frame(rows):
+    return AnomalyDetectorService()._to_frame(str(CLIENT_ID), [
+        {**row, "id": str(row["id"]), "amount": float(row["amount"]), "date": row["date"].isoformat()}
+        for row in rows
+    ])
+
+
+@pytest.mark.parametrize("seed", range(3))
+async def test_detect_duplicates_matches_frame_detector(conn, seed, monkeypatch):
+    rows = _random_sheet_rows(seed)
+    await _insert(conn, rows)
+
+    groups = await conn.fetch("SELECT * FROM detect_duplicates($1)", SHEET_ID)
+    service = AnomalyDetectorService()
+    monkeypatch.setattr("backend.services.red_flag.anomaly_detector.RedFlag", lambda **fields: fields)
+    frame_groups = service._detect_duplicates_in_frame(_frame(rows))
+
+    assert {frozenset(map(str, row["transaction_ids"])) for row in groups} == {
+        frozenset(flag["metadata"]["duplicate_ids"]) for flag in frame_groups
+    }
+
+
+@pytest.mark.parametrize("seed", range(3))
+async def test_detect_round_numbers_matches_frame_detector(conn, seed, monkeypatch):
+    rows = _random_sheet_rows(seed)
+    await _insert(conn, rows)
+
+    hits = await conn.fetch("SELECT * FROM detect_round_numbers($1, $2)", SHEET_ID, 1000)
+    service = AnomalyDetectorService()
+    monkeypatch.setattr("backend.services.red_flag.anomaly_detector.RedFlag", lambda **fields: fields)
+    frame_hits = service._detect_round_numbers_in_frame(_frame(rows))
+
+    assert {str(row["id"]) for row in hits} == {flag["transaction_id"] for flag in frame_hits}
+
+
+@pytest_asyncio.fixture
+async def vector_conn(conn):
+    register_vector = pytest.importorskip("pgvector.asyncpg").register_vector
+    try:
+        # Savepoint, so a missing extension doesn't abort the outer transaction
+        async with conn.transaction():
+            await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            await conn.execute("SELECT '[1]'::vector::halfvec")
+    except asyncpg.PostgresError as e:
+        pytest.skip(f"pgvector with halfvec support is not available: {e}")
+    await register_vector(conn)
+    await conn.execute("""
+        CREATE TABLE embeddings (
+            id UUID PRIMARY KEY,
+            chunk_text TEXT NOT NULL,
+            embedding vector(1536)
+        );
+        CREATE INDEX ON embeddings USING hnsw ((embedding::halfvec(1536)) halfvec_cosine_ops);
+    """)
+    return conn
+
+
+def _embedding(x, y):
+    embedding = np.zeros(1536, dtype=np.float32)
+    embedding[:2] = (x, y)
+    return embedding
+
+
+async def test_match_law_chunks_binds_a_vector_parameter(vector_conn):
+    # Cosine similarity to the query (1, 0) falls as y grows
+    chunks = {"exact": (1, 0), "close": (1, 0.2), "near": (1, 0.5), "edge": (1, 0.9), "far": (0, 1), "opposite": (-1, 0)}
+    await vector_conn.executemany(
+        "INSERT INTO embeddings (id, chunk_text, embedding) VALUES ($1, $2, $3)",
+        [(uuid.uuid4(), text, _embedding(*point)) for text, point in chunks.items()]
+    )
+
+    # Bound the way QueryService._match_law_chunks binds it: a float32 array
+    rows = await vector_conn.fetch(_MATCH_LAW_CHUNKS_SQL, _embedding(1, 0), 0.7, 3)
+    assert [row["content"] for row in rows] == ["exact", "close", "near"]
+
+    rows = await vector_conn.fetch(_MATCH_LAW_CHUNKS_SQL, _embedding(1, 0), 0.7, 10)
+    assert [row["content"] for row in rows] == ["exact", "close", "near", "edge"]
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import time
+import weakref
+from typing import Any, Optional
+
+from backend.config import settings
+from backend.utils.logger import logger
+
+try:
+    import redis
+    from redis import asyncio as aioredis
+except ImportError:  # Redis is optional; caching is skipped without it
+    redis = aioredis = None
+
+# A cache must never be slower than the work it saves: give up on Redis quickly
+REDIS_SOCKET_TIMEOUT = 0.5
+REDIS_CONNECT_TIMEOUT = 0.5
+# Seconds to bypass Redis after a connection failure before trying it again
+REDIS_RETRY_INTERVAL = 30
+
+_redis_client = None
+_redis_failed_at: Optional[float] = None
+# redis.asyncio connections are bound to the loop that opened them
+_async_redis_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _redis_options() -> dict:
+    return {
+        "decode_responses": True,
+        "socket_timeout": REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": REDIS_CONNECT_TIMEOUT,
+    }
+
+
+def _recently_failed() -> bool:
+    return _redis_failed_at is not None and time.monotonic() - _redis_failed_at < REDIS_RETRY_INTERVAL
+
+
+def _record_failure(e: Exception) -> None:
+    """
+    Bypass Redis for REDIS_RETRY_INTERVAL after a connection error or timeout,
+    so an unreachable server costs one timeout instead of one per request.
+    """
+    global _redis_failed_at
+
+    if isinstance(e, (redis.ConnectionError, redis.TimeoutError)):
+        _redis_failed_at = time.monotonic()
+        logger.warning("Redis unavailable, retrying in %ss: %s", REDIS_RETRY_INTERVAL, e)
+
+
+def get_redis_client() -> Optional["redis.Redis"]:
+    """
+    Return a shared Redis client, or None if Redis is not configured or was
+    unreachable within the last REDIS_RETRY_INTERVAL seconds.
+
+    The client is created lazily on first use and reused afterwards so every
+    caller shares one connection pool.
+    """
+    global _redis_client
+
+    if redis is None or not settings.REDIS_URL or _recently_failed():
+        return None
+
+    if _redis_client is None:
+        try:
+            _redis_client = redis.Redis.from_url(settings.REDIS_URL, **_redis_options())
+        except Exception as e:
+            logger.warning("Failed to initialize Redis client: %s", e)
+
+    return _redis_client
+
+
+def get_async_redis_client() -> Optional["aioredis.Redis"]:
+    """
+    Return the running event loop's asyncio Redis client, or None under the
+    same conditions as get_redis_client. Must be called from a coroutine.
+    """
+    if aioredis is None or not settings.REDIS_URL or _recently_failed():
+        return None
+
+    loop = asyncio.get_running_loop()
+    client = _async_redis_clients.get(loop)
+    if client is None:
+        try:
+            client = aioredis.Redis.from_url(settings.REDIS_URL, **_redis_options())
+        except Exception as e:
+            logger.warning("Failed to initialize Redis client: %s", e)
+            return None
+        _async_redis_clients[loop] = client
+
+    return client
+
+
+async def close_async_redis_client() -> None:
+    """
+    Close the running event loop's asyncio Redis client, if one was opened.
+    """
+    client = _async_redis_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def cache_get(key: str) -> Optional[Any]:
+    """
+    Fetch a JSON value from the cache. Returns None on a miss or any cache error.
+    """
+    client = get_redis_client()
+    if client is None:
+        return None
+
+    try:
+        raw = client.get(key)
+        return json.loads(raw) if raw is not None else None
+    except Exception as e:
+        _record_failure(e)
+        logger.warning("Cache read failed for %s: %s", key, e)
+        return None
+
+
+def cache_set(key: str, value: Any, ttl: int) -> None:
+    """
+    Store a JSON-serializable value in the cache with a TTL in seconds.
+    """
+    client = get_redis_client()
+    if client is None:
+        return
+
+    try:
+        client.setex(key, ttl, json.dumps(value, default=str))
+    except Exception as e:
+        _record_failure(e)
+        logger.warning("Cache write failed for %s: %s", key, e)
+
+
+def cache_hget(key: str, field: str) -> Optional[Any]:
+    """
+    Fetch a JSON value stored under a field of a cached hash.
+    """
+    client = get_redis_client()
+    if client is None:
+        return None
+
+    try:
+        raw = client.hget(key, field)
+        return json.loads(raw) if raw is not None else None
+    except Exception as e:
+        _record_failure(e)
+        logger.warning("Cache read failed for %s[%s]: %s", key, field, e)
+        return None
+
+
+def cache_hset(key: str, field: str, value: Any, ttl: int) -> None:
+    """
+    Store a JSON value under a field of a cached hash and refresh the hash TTL.
+    """
+    client = get_redis_client()
+    if client is None:
+        return
+
+    try:
+        pipe = client.pipeline()
+        pipe.hset(key, field, json.dumps(value, default=str))
+        pipe.expire(key, ttl)
+        pipe.execute()
+    except Exception as e:
+        _record_failure(e)
+        logger.warning("Cache write failed for %s[%s]: %s", key, field, e)
+
+
+def cache_delete(*keys: str) -> None:
+    """
+    Invalidate one or more cache keys.
+    """
+    client = get_redis_client()
+    if client is None or not keys:
+        return
+
+    try:
+        client.delete(*keys)
+    except Exception as e:
+        _record_failure(e)
+        logger.warning("Cache invalidation failed for %s: %s", keys, e)
+
+
+async def acache_get(key: str) -> Optional[Any]:
+    """
+    Async version of cache_get, for code running on the event loop.
+    """
+    client = get_async_redis_client()
+    if client is None:
+        return None
+
+    try:
+        raw = await client.get(key)
+        return json.loads(raw) if raw is not None else None
+    except Exception as e:
+        _record_failure(e)
+        logger.warning("Cache read failed for %s: %s", key, e)
+        return None
+
+
+async def acache_set(key: str, value: Any, ttl: int) -> None:
+    """
+    Async version of cache_set, for code running on the event loop.
+    """
+    client = get_async_redis_client()
+    if client is None:
+        return
+
+    try:
+        await client.setex(key, ttl, json.dumps(value, default=str))
+    except Exception as e:
+        _record_failure(e)
+        logger.warning("Cache write failed for %s: %s", key, e)
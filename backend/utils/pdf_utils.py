@@ -29,7 +29,7 @@ class PDFUtils:
         """
         try:
             # TODO: Initialize PDF reader (e.g., PyPDF2 or pdfplumber)
-            text = ""
+            parts = []
             with io.BytesIO(file_content) as f:
                 reader = PyPDF2.PdfReader(f)
                 
@@ -37,10 +37,10 @@ class PDFUtils:
                 for page in reader.pages:
                     extracted = page.extract_text()
                     if extracted:
-                        text += extracted + "\n"
+                        parts.append(extracted)
                         
             # TODO: Return extracted text
-            return text.strip()
+            return "\n".join(parts).strip()
         except Exception as e:
             logger.error(f"Failed to extract text from PDF: {e}")
             return ""
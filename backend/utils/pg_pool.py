@@ -0,0 +1,69 @@
+import asyncio
+import time
+from typing import Optional
+
+from backend.config import settings
+from backend.utils.logger import logger
+
+try:
+    import asyncpg
+except ImportError:  # asyncpg is optional; callers fall back to the Supabase REST client
+    asyncpg = None
+
+try:
+    from pgvector.asyncpg import register_vector
+except ImportError:
+    register_vector = None
+
+# After a failed connect, callers get None until this many seconds have passed,
+# instead of every request retrying against an unreachable database
+PG_POOL_RETRY_INTERVAL = 60
+
+_pg_pool = None
+_pg_pool_lock = asyncio.Lock()
+_pg_pool_failed_at: Optional[float] = None
+
+
+async def _init_connection(conn) -> None:
+    # Send and receive pgvector values in binary instead of JSON text
+    await register_vector(conn)
+
+
+def _recently_failed() -> bool:
+    return _pg_pool_failed_at is not None and time.monotonic() - _pg_pool_failed_at < PG_POOL_RETRY_INTERVAL
+
+
+async def get_pg_pool() -> Optional["asyncpg.Pool"]:
+    """
+    Return a shared asyncpg pool for direct Postgres access, or None if unavailable.
+
+    Requires DATABASE_URL plus the asyncpg and pgvector packages. asyncpg caches
+    prepared statements per connection, so repeated queries skip re-planning.
+    """
+    global _pg_pool, _pg_pool_failed_at
+
+    if asyncpg is None or register_vector is None or not settings.DATABASE_URL:
+        return None
+
+    if _pg_pool is None:
+        if _recently_failed():
+            return None
+        async with _pg_pool_lock:
+            # Callers queued on the lock behind a failed attempt don't retry it
+            if _recently_failed():
+                return None
+            if _pg_pool is None:
+                try:
+                    _pg_pool = await asyncpg.create_pool(
+                        settings.DATABASE_URL,
+                        min_size=1,
+                        max_size=10,
+                        init=_init_connection
+                    )
+                    _pg_pool_failed_at = None
+                except Exception as e:
+                    _pg_pool_failed_at = time.monotonic()
+                    logger.warning(f"Failed to initialize Postgres pool, retrying in {PG_POOL_RETRY_INTERVAL}s: {e}")
+                    return None
+
+    return _pg_pool
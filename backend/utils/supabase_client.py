@@ -1,3 +1,4 @@
+from functools import lru_cache
 from supabase import create_client, Client
 from backend.config import settings
 
@@ -6,4 +7,25 @@ from backend.config import settings
 url: str = settings.SUPABASE_URL or "https://your-project.supabase.co"
 key: str = settings.SUPABASE_KEY or "your-anon-key"
 
-supabase: Client = create_client(url, key)
+
+@lru_cache(maxsize=1)
+def get_supabase_client() -> Client:
+    """
+    Return the process-wide Supabase client.
+
+    The client keeps its underlying HTTP session open, so reusing one instance
+    lets every query share pooled keep-alive connections instead of paying a
+    new TCP/TLS handshake.
+    """
+    return create_client(url, key)
+
+
+@lru_cache(maxsize=1)
+def get_supabase_admin_client() -> Client:
+    """
+    Return the process-wide service-role Supabase client (bypasses RLS).
+    """
+    return create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+
+
+supabase: Client = get_supabase_client()
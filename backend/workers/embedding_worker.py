@@ -1,8 +1,8 @@
 import logging
-from typing import List, Dict, Any
-from backend.services.rag_service.embedding_service import EmbeddingService
+from typing import List, Dict, Any, Optional
+from backend.services.rag_service.embedding_service import get_embedding_service
 from backend.rag.chunker import TextChunker
-from backend.rag.vector_store import VectorStore
+from backend.rag.vector_store import get_vector_store
 from backend.models.rag_models import EmbeddingChunk
 
 # Configure logging
@@ -15,9 +15,9 @@ class EmbeddingWorker:
     """
 
     def __init__(self):
-        self.embedding_service = EmbeddingService()
+        self.embedding_service = get_embedding_service()
         self.chunker = TextChunker()
-        self.vector_store = VectorStore()
+        self.vector_store = get_vector_store()
 
     def process_document_content(self, content: str, source: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
         """
@@ -53,8 +53,7 @@ class EmbeddingWorker:
                 raise ValueError("Mismatch between number of chunks and generated embeddings")
 
             # 3. Assign embeddings back to chunks
-            for i, chunk in enumerate(chunks):
-                chunk.embedding = embeddings[i]
+            chunks = self.assign_embeddings(chunks, embeddings)
 
             # 4. Store in Vector Store
             self.vector_store.store_embeddings(chunks)
@@ -74,6 +73,29 @@ class EmbeddingWorker:
                 "source": source
             }
 
+    def assign_embeddings(self, chunks: List[EmbeddingChunk], embeddings: List[Optional[List[float]]]) -> List[EmbeddingChunk]:
+        """
+        Attach embeddings to their chunks and return the chunks that got one.
+
+        Chunks whose embedding failed (None) are left out, so they are never
+        stored with a placeholder vector and can be picked up by a later run.
+
+        Raises:
+            ValueError: If no chunk could be embedded.
+        """
+        embedded = []
+        for chunk, embedding in zip(chunks, embeddings):
+            if embedding is None:
+                continue
+            chunk.embedding = embedding
+            embedded.append(chunk)
+
+        if chunks and not embedded:
+            raise ValueError("Embedding generation failed for every chunk")
+        if len(embedded) < len(chunks):
+            logger.warning(f"Skipping {len(chunks) - len(embedded)} of {len(chunks)} chunks whose embeddings failed")
+        return embedded
+
     def process_law_update(self, update_text: str, law_id: str) -> Dict[str, Any]:
         """
         Process a specific update to a law.
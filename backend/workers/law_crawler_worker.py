@@ -107,14 +107,13 @@ class LawCrawlerWorker:
             chunk_texts = [chunk.chunk_text for chunk in chunks]
             
             # Use the embedding service from the embedding worker
-            embeddings = self.embedding_worker.embedding_service.generate_embeddings_batch(chunk_texts)
+            embeddings = await self.embedding_worker.embedding_service.aembed_documents(chunk_texts)
             
             if len(embeddings) != len(chunks):
                 raise ValueError("Mismatch between chunks and embeddings count")
                 
-            # Assign embeddings
-            for i, chunk in enumerate(chunks):
-                chunk.embedding = embeddings[i]
+            # Assign embeddings; chunks whose embedding failed are skipped
+            chunks = self.embedding_worker.assign_embeddings(chunks, embeddings)
                 
             # 3. Store
             self.embedding_worker.vector_store.store_embeddings(chunks)
@@ -17,6 +17,9 @@ class MockUploadFile:
         self.file = io.BytesIO(content)
         self.content_type = "application/octet-stream"
 
+    async def read(self) -> bytes:
+        return self.file.read()
+
 class OCRWorker:
     """
     Worker responsible for processing OCR jobs asynchronously.
@@ -67,7 +70,7 @@ class OCRWorker:
 
             # Text Extraction
             try:
-                text_result = self.ocr_service.extract_text(mock_file)
+                text_result = await self.ocr_service.extract_text(mock_file)
                 if text_result.success:
                     extracted_text = text_result.data
                 else:
@@ -80,7 +83,7 @@ class OCRWorker:
                 try:
                     # Reset file pointer for next read
                     mock_file.file.seek(0) 
-                    table_result = self.ocr_service.extract_table(mock_file)
+                    table_result = await self.ocr_service.extract_table(mock_file)
                     if table_result.success:
                         extracted_tables = table_result.data
                 except Exception as e: